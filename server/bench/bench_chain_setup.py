@@ -0,0 +1,55 @@
+"""
+Microbenchmark: per-request setup cost of the world generation pipeline.
+
+Compares rebuilding prompts, dynamic schemas and structured output wrappers on every
+request (previous behaviour) with looking up the prebuilt pipeline in the ChainRegistry.
+No LLM calls are made.
+
+Run from the repository root:
+    python -m server.bench.bench_chain_setup
+"""
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "bench-api-key")
+
+from server.src.models.enums import Tags
+from server.src.models.story import get_target_character_schema, get_target_location_schema
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.llm_client_pool import LLMClientPool
+
+ITERATIONS = 200
+
+def _per_request(pool: LLMClientPool, tag: Tags) -> None:
+    # Previous behaviour: schemas and chains were rebuilt for every request
+    get_target_character_schema.cache_clear()
+    get_target_location_schema.cache_clear()
+    ChainRegistry(pool).world_pipeline(tag)
+
+def _registry_lookup(registry: ChainRegistry, tag: Tags) -> None:
+    registry.world_pipeline(tag)
+
+def main() -> None:
+    pool = LLMClientPool()
+    registry = ChainRegistry(pool)
+
+    start = time.perf_counter()
+    registry.build()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"registry build at startup: {build_ms:.1f} ms")
+
+    for tag in Tags:
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            _per_request(pool, tag)
+        before_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            _registry_lookup(registry, tag)
+        after_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+        print(f"{tag:<8} per-request build: {before_us:10.1f} us | registry lookup: {after_us:6.2f} us | speedup: {before_us / after_us:,.0f}x")
+
+if __name__ == "__main__":
+    main()
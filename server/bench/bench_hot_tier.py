@@ -0,0 +1,53 @@
+"""
+Microbenchmark: chat memory search of one session, Chroma collection vs in-memory hot tier.
+
+Searches a session of a few hundred 384-dimensional embeddings (the size of the default
+embedding model) with Chroma's persistent HNSW index and with the hot tier's exact
+matrix-vector search. No embedding model is loaded, vectors are random.
+
+Run from the repository root:
+    python -m server.bench.bench_hot_tier
+"""
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import chromadb
+import numpy as np
+
+from server.db.hot_tier import HotTier
+
+ITERATIONS = 500
+DIM = 384
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="bench_hot_tier_"))
+    hot_tier = HotTier()
+    for size in (100, 300, 1000):
+        vectors = rng.normal(size=(size, DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = [str(i) for i in range(size)]
+        documents = [f"message {i}" for i in ids]
+        metadatas = [{"session_id": str(size)} for _ in ids]
+        collection = client.create_collection(name=f"chat_session_{size}", embedding_function=None)
+        collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=vectors) # type: ignore
+        hot_tier.load(str(size), ids, documents, metadatas, vectors)
+        queries = rng.normal(size=(ITERATIONS, DIM)).astype(np.float32)
+
+        start = time.perf_counter()
+        for query in queries:
+            collection.query(query_embeddings=[query.tolist()], n_results=6)
+        chroma_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+        start = time.perf_counter()
+        for query in queries:
+            hot_tier.query(str(size), query.tolist(), n_results=6)
+        hot_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+        print(f"{size:>5} messages | chroma query: {chroma_us:8.1f} us | hot tier: {hot_us:6.1f} us | speedup: {chroma_us / hot_us:,.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Microbenchmark: our own overhead around LLM calls, measured against the fake backend.
+
+The fake model answers instantly (no latency, no token delay), so the timings are the
+cost of prompt rendering, chain plumbing, structured output parsing and the client
+pool only.
+
+Run from the repository root:
+    python -m server.bench.bench_llm_overhead
+"""
+import asyncio
+import os
+import time
+
+os.environ["LLM_BACKEND"] = "fake"
+
+from server.src.models.enums import Tags
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.fake_llm import FakeChatModel
+from server.src.service.llm_client_pool import LLMClientPool
+from server.src.service.llm_service import LLMService
+
+ITERATIONS = 50
+CONCURRENCY = 8
+
+async def _timed(label: str, make_call) -> None:
+    await make_call(0)  # warm up
+    start = time.perf_counter()
+    for i in range(0, ITERATIONS, CONCURRENCY):
+        await asyncio.gather(*[make_call(j) for j in range(i, min(i + CONCURRENCY, ITERATIONS))])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed / ITERATIONS * 1000:8.2f} ms/call")
+
+async def main() -> None:
+    pool = LLMClientPool(model_factory=lambda model_name, temperature: FakeChatModel(latency_ms=0, latency_jitter_ms=0, tokens_per_second=0))
+    registry = ChainRegistry(pool)
+    registry.build()
+    llm_service = LLMService(pool, registry)
+    context = {"settings": [[]], "chat_history": [[]]}
+
+    for tag in Tags:
+        await _timed(f"create_world {tag}", lambda i: llm_service.create_world(tag=tag, prompt=f"prompt {i}"))
+    await _timed("send_message", lambda i: llm_service.send_message(context, [], f"action {i}"))
+
+    async def stream(i: int) -> None:
+        async for _ in llm_service.stream_message(context, [], f"action {i}"):
+            pass
+    await _timed("stream_message", stream)
+
+if __name__ == "__main__":
+    asyncio.run(main())
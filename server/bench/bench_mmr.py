@@ -0,0 +1,57 @@
+"""
+Microbenchmark: cost of the maximal marginal relevance step of chat retrieval.
+
+Picks n results out of n * MMR_CANDIDATE_FACTOR candidates of 384-dimensional embeddings
+(the size of the default embedding model), from one similarity matrix product, and
+compares it with recomputing the similarities to the picked results at every step.
+
+Run from the repository root:
+    python -m server.bench.bench_mmr
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import numpy as np
+
+from server.db.ranking import maximal_marginal_relevance
+from server.src.models.enums import Config
+
+ITERATIONS = 2000
+DIM = 384
+
+def _naive_mmr(relevance: np.ndarray, vectors: np.ndarray, n: int, diversity: float) -> list:
+    picked: list = []
+    available = list(range(len(relevance)))
+    while len(picked) < n:
+        def score(i: int) -> float:
+            penalty = max((float(vectors[i] @ vectors[j] / np.linalg.norm(vectors[i]) / np.linalg.norm(vectors[j])) for j in picked), default=0.0)
+            return (1 - diversity) * relevance[i] - diversity * penalty
+        best = max(available, key=score)
+        picked.append(best)
+        available.remove(best)
+    return picked
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    for n in (Config.RETRIEVAL_CANDIDATES, 20):
+        candidates = n * Config.MMR_CANDIDATE_FACTOR
+        vectors = rng.normal(size=(candidates, DIM)).astype(np.float32)
+        relevance = np.sort(rng.random(candidates))[::-1]
+        assert maximal_marginal_relevance(relevance, vectors, n, Config.MMR_DIVERSITY) == _naive_mmr(relevance, vectors, n, Config.MMR_DIVERSITY)
+
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            maximal_marginal_relevance(relevance, vectors, n, Config.MMR_DIVERSITY)
+        vectorized_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+        start = time.perf_counter()
+        for _ in range(ITERATIONS // 20):
+            _naive_mmr(relevance, vectors, n, Config.MMR_DIVERSITY)
+        naive_us = (time.perf_counter() - start) / (ITERATIONS // 20) * 1e6
+
+        print(f"{n:>3} of {candidates:>3} candidates | vectorized: {vectorized_us:7.1f} us | per pair: {naive_us:9.1f} us | speedup: {naive_us / vectorized_us:,.1f}x")
+
+if __name__ == "__main__":
+    main()
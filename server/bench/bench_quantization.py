@@ -0,0 +1,64 @@
+"""
+Benchmark: recall and memory of the int8 quantized hot tier against full precision.
+
+Builds sessions of clustered, normalized 384-dimensional vectors (the shape of the default
+embedding model's output) and reports recall@k of the int8 hot tier alone and after
+re-ranking its candidates at full precision, with the bytes used per message and per
+million messages.
+
+Run from the repository root:
+    python -m server.bench.bench_quantization
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import numpy as np
+
+from server.db.hot_tier import HotTier
+from server.src.models.enums import Config, VectorQuantization
+
+DIM = 384
+SESSIONS = 20
+SESSION_SIZE = 1000
+QUERIES = 50
+K = Config.RETRIEVAL_CANDIDATES
+
+def _session(rng: np.random.Generator) -> np.ndarray:
+    # Chat turns of a session cluster around a few scenes and characters
+    centers = rng.normal(size=(12, DIM))
+    vectors = centers[rng.integers(0, len(centers), SESSION_SIZE)] + 0.6 * rng.normal(size=(SESSION_SIZE, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def _exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(((vectors - query) ** 2).sum(axis=1), kind='stable')[:k]
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    full = HotTier(max_sessions=SESSIONS, max_vectors=SESSION_SIZE, quantization=VectorQuantization.NONE)
+    int8 = HotTier(max_sessions=SESSIONS, max_vectors=SESSION_SIZE, quantization=VectorQuantization.INT8)
+    recall_int8, recall_reranked = [], []
+    for session in range(SESSIONS):
+        vectors = _session(rng)
+        ids = [str(i) for i in range(SESSION_SIZE)]
+        for hot_tier in (full, int8):
+            hot_tier.load(str(session), ids, ids, [{} for _ in ids], vectors)
+        queries = vectors[rng.integers(0, SESSION_SIZE, QUERIES)] + 0.3 * rng.normal(size=(QUERIES, DIM)).astype(np.float32)
+        for query in queries:
+            expected = set(_exact_top_k(vectors, query, K).tolist())
+            candidates = [int(id) for id in int8.query(str(session), query, K)["ids"][0]] # type: ignore
+            recall_int8.append(len(expected & set(candidates[:K])) / K)
+            # Full precision re-ranking of the candidates, as VectorStore does with the vectors kept by Chroma
+            reranked = [candidates[i] for i in _exact_top_k(vectors[candidates], query, K)]
+            recall_reranked.append(len(expected & set(reranked)) / K)
+
+    messages = SESSIONS * SESSION_SIZE
+    full_bytes, int8_bytes = full.nbytes() / messages, int8.nbytes() / messages
+    print(f"{messages} messages, recall@{K} against exact float32 search")
+    print(f"int8:                      {np.mean(recall_int8):.4f}")
+    print(f"int8 + re-rank of {K * int8.rerank_factor:>3}:     {np.mean(recall_reranked):.4f}")
+    print(f"bytes per message:         float32 {full_bytes:.0f} | int8 {int8_bytes:.0f} | {full_bytes / int8_bytes:.1f}x smaller")
+    print(f"saved per million messages: {(full_bytes - int8_bytes) * 1e6 / 2**20:,.0f} MiB")
+
+if __name__ == "__main__":
+    main()
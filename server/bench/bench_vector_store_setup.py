@@ -0,0 +1,60 @@
+"""
+Microbenchmark: per-request cost of getting a vector store.
+
+Compares building a VectorStore on every request (previous behaviour: new Chroma client,
+get_or_create_collection calls and a new embedding function whose ONNX session is loaded
+on its first inference) with looking up the one created by the app lifespan.
+
+Run from the repository root:
+    python -m server.bench.bench_vector_store_setup
+"""
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("VECTOR_STORE_URL", tempfile.mkdtemp(prefix="bench_vector_store_"))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from server.db.vector_store import VectorStore
+from server.src.dependencies import get_vector_db
+
+ITERATIONS = 50
+
+def _first_inference_ms(vector_store: VectorStore) -> float:
+    start = time.perf_counter()
+    vector_store.warm_up()
+    return (time.perf_counter() - start) * 1000
+
+async def main() -> None:
+    start = time.perf_counter()
+    vector_store = VectorStore()
+    startup_ms = (time.perf_counter() - start) * 1000
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(vector_store=vector_store)))
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        VectorStore()
+    before_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await get_vector_db(request) # type: ignore
+    after_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    print(f"vector store created at startup: {startup_ms:.1f} ms")
+    print(f"per-request build: {before_us:10.1f} us | dependency lookup: {after_us:6.2f} us | speedup: {before_us / after_us:,.0f}x")
+
+    # Every per-request store also paid for loading the embedding model on its first inference
+    try:
+        cold_ms = _first_inference_ms(VectorStore())
+        vector_store.warm_up()
+        warm_ms = _first_inference_ms(vector_store)
+        print(f"first inference, new store: {cold_ms:.1f} ms | warmed-up store: {warm_ms:.1f} ms")
+    except Exception as e:
+        print(f"embedding model unavailable, inference not measured: {e}")
+    vector_store.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
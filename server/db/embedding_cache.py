@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import fcntl
+import hashlib
+from pathlib import Path
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from server.src.models.enums import Config
+from server.src.models.metrics import EmbeddingCacheStats
+
+Embedder = Callable[[List[str]], Sequence[Any]]
+
+# Header of the disk tier: dimension, capacity, next row to write, rows filled
+_HEADER_FIELDS = 4
+_KEY_BYTES = 32
+
+def _model_name(embedding_fn: Any) -> str:
+    """Name identifying the model behind an embedding function, part of every cache key"""
+    name = getattr(embedding_fn, 'name', None)
+    if callable(name):
+        try:
+            value = name()
+            if isinstance(value, str):
+                return value
+        except Exception:
+            pass
+    return type(embedding_fn).__name__
+
+def _key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\x00{text}".encode()).digest()
+
+class _DiskTier:
+    """
+    Fixed capacity ring of embeddings in memory-mapped files, surviving restarts.
+
+    `vectors.f32` holds one float32 row per entry and `keys.bin` the sha256 key of each
+    row. Once full, the oldest rows are overwritten.
+
+    The files may be shared by several processes (e.g. uvicorn workers). Reads and writes
+    hold a lock on the `lock` file, each process indexes the rows others wrote since it
+    last looked, and a row is only served if it still holds the key asked for.
+    """
+    def __init__(self, path: str, dim: int, capacity: int) -> None:
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        header_path, keys_path, vectors_path = directory / "header.bin", directory / "keys.bin", directory / "vectors.f32"
+        self._lock_file = open(directory / "lock", "a+")
+
+        with self._locked(fcntl.LOCK_EX):
+            reset = True
+            if header_path.exists() and keys_path.exists() and vectors_path.exists():
+                header = np.memmap(header_path, dtype=np.int64, mode='r+', shape=(_HEADER_FIELDS,))
+                # Files written for another model dimension or capacity are discarded
+                reset = int(header[0]) != dim or int(header[1]) != capacity
+                del header
+            mode = 'w+' if reset else 'r+'
+            self._header = np.memmap(header_path, dtype=np.int64, mode=mode, shape=(_HEADER_FIELDS,))
+            self._keys = np.memmap(keys_path, dtype=np.uint8, mode=mode, shape=(capacity, _KEY_BYTES))
+            self._vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+            if reset:
+                self._header[:] = [dim, capacity, 0, 0]
+                self._header.flush()
+
+            self.dim = dim
+            self.capacity = capacity
+            self._rows: Dict[bytes, int] = {}
+            self._row_keys: List[Optional[bytes]] = [None] * capacity
+            for row in range(int(self._header[3])):
+                self._index(row)
+            self._synced_row = int(self._header[2])
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        fcntl.flock(self._lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _index(self, row: int) -> None:
+        previous = self._row_keys[row]
+        if previous is not None and self._rows.get(previous) == row:
+            del self._rows[previous]
+        key = self._keys[row].tobytes()
+        self._rows[key] = row
+        self._row_keys[row] = key
+
+    def _sync(self) -> None:
+        """Index the rows written by other processes since the last sync. Must hold the lock"""
+        next_row = int(self._header[2])
+        row = self._synced_row
+        while row != next_row:
+            self._index(row)
+            row = (row + 1) % self.capacity
+        self._synced_row = next_row
+
+    def __len__(self) -> int:
+        return int(self._header[3])
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            row = self._rows.get(key)
+            if row is None or self._keys[row].tobytes() != key:
+                return None
+            return np.array(self._vectors[row])
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            row = self._rows.get(key)
+            if row is not None and self._keys[row].tobytes() == key:
+                return
+            row = int(self._header[2])
+            self._vectors[row] = vector
+            self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+            self._header[2] = (row + 1) % self.capacity
+            self._header[3] = min(int(self._header[3]) + 1, self.capacity)
+            self._index(row)
+            self._synced_row = int(self._header[2])
+
+    def flush(self) -> None:
+        with self._locked(fcntl.LOCK_EX):
+            self._vectors.flush()
+            self._keys.flush()
+            self._header.flush()
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of text embeddings, keyed by a hash of the model name and
+    the text.
+
+    Lookups go through an in-memory LRU tier, then an optional memory-mapped disk tier
+    at `path`. Only the texts missing from both are embedded, in a single batch.
+    """
+    def __init__(self, path: Optional[str] = None, memory_size: int = Config.EMBEDDING_CACHE_MEMORY_SIZE,
+                 disk_capacity: int = Config.EMBEDDING_CACHE_DISK_CAPACITY) -> None:
+        self._path = path
+        self._memory_size = memory_size
+        self._disk_capacity = disk_capacity
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk: Optional[_DiskTier] = None
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        # Reopen the disk tier left by a previous run
+        header_path = Path(path, "header.bin") if path else None
+        if header_path and header_path.exists():
+            header = np.fromfile(header_path, dtype=np.int64, count=_HEADER_FIELDS)
+            if len(header) == _HEADER_FIELDS:
+                self._disk_tier(int(header[0]))
+
+    def _disk_tier(self, dim: int) -> Optional[_DiskTier]:
+        if self._path and (self._disk is None or self._disk.dim != dim):
+            self._disk = _DiskTier(self._path, dim, self._disk_capacity)
+        return self._disk
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: bytes) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self._memory_hits += 1
+            return vector
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self._disk_hits += 1
+                return vector
+        self._misses += 1
+        return None
+
+    def embed(self, texts: List[str], embedding_fn: Embedder) -> List[np.ndarray]:
+        """Embeddings of texts, computing only the ones not cached yet"""
+        model = _model_name(embedding_fn)
+        keys = [_key(model, text) for text in texts]
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            results = [self._lookup(key) for key in keys]
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            # The same text may appear several times in one batch
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = {text: np.asarray(vector, dtype=np.float32) for text, vector in zip(unique_texts, embedding_fn(unique_texts))}
+            with self._lock:
+                disk = self._disk_tier(len(next(iter(computed.values()))))
+                for i in missing:
+                    results[i] = computed[texts[i]]
+                    self._remember(keys[i], computed[texts[i]])
+                    if disk is not None:
+                        disk.put(keys[i], computed[texts[i]])
+                if disk is not None:
+                    disk.flush()
+        return results # type: ignore[return-value]
+
+    def stats(self) -> EmbeddingCacheStats:
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return EmbeddingCacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                hit_rate=(self._memory_hits + self._disk_hits) / lookups if lookups else 0.0,
+                memory_entries=len(self._memory),
+                memory_size=self._memory_size,
+                disk_entries=len(self._disk) if self._disk is not None else 0,
+                disk_capacity=self._disk_capacity if self._path else 0
+            )
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache, persisted under `Config.EMBEDDING_CACHE_PATH` if set"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(Config.EMBEDDING_CACHE_PATH or None)
+        return _default_cache
@@ -0,0 +1,158 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing import get_context
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+
+from server.db.embedding_cache import _model_name
+from server.src.exceptions import DatabaseError
+from server.src.models.enums import Config
+
+# Embedding function of the current worker process
+_worker_fn: Optional[Callable[[List[str]], Sequence[Any]]] = None
+
+def _init_worker(embedding_fn: Callable[[List[str]], Sequence[Any]]) -> None:
+    """Load the embedding model once per worker process, before it takes any batch"""
+    global _worker_fn
+    _worker_fn = embedding_fn
+    _worker_fn(["warm up"])
+
+def _embed(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_fn(texts), dtype=np.float32) # type: ignore[misc]
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: "Future[List[np.ndarray]]" = field(default_factory=Future)
+
+class EmbeddingWorkerPool:
+    """
+    Runs an embedding function in worker processes, so ONNX inference does not compete
+    with request handling for the GIL.
+
+    Calls from any thread are queued and a dispatcher thread merges them into batches of
+    up to `max_batch_size` texts, waiting at most `max_wait_ms` for a batch to fill. At
+    most two batches per worker are in flight: once they are, the queue fills up and
+    callers wait up to `submit_timeout_s` for room before a DatabaseError is raised.
+
+    If a worker process dies, the batches it was running fail and the workers are
+    started again for the next ones.
+    """
+    def __init__(self, embedding_fn: Callable[[List[str]], Sequence[Any]], workers: int = Config.EMBEDDING_WORKERS,
+                 max_batch_size: int = Config.EMBEDDING_MAX_BATCH_SIZE, max_wait_ms: float = Config.EMBEDDING_MAX_WAIT_MS,
+                 queue_size: int = Config.EMBEDDING_QUEUE_SIZE, submit_timeout_s: float = Config.EMBEDDING_SUBMIT_TIMEOUT_S) -> None:
+        self._name = _model_name(embedding_fn)
+        self._max_batch_size = max_batch_size
+        self._max_wait_s = max_wait_ms / 1000
+        self._submit_timeout_s = submit_timeout_s
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue(maxsize=queue_size)
+        self._in_flight = threading.BoundedSemaphore(2 * workers)
+        # Worker processes are spawned rather than forked from a process running threads
+        self._new_executor = partial(ProcessPoolExecutor, max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker, initargs=(embedding_fn,))
+        self._executor = self._new_executor()
+        self._executor_lock = threading.Lock()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, name="embedding-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def name(self) -> str:
+        """Name of the wrapped model, so cached embeddings are shared with in-process embedding"""
+        return self._name
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        if self._closed:
+            raise DatabaseError("Embedding pool is closed!")
+        if not input:
+            return []
+        request = _Request(list(input))
+        try:
+            self._queue.put(request, timeout=self._submit_timeout_s)
+        except queue.Full:
+            raise DatabaseError("Embedding queue is full!")
+        return request.future.result()
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """Block for a request, then gather more until the batch is full or max wait elapses"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, size = [first], len(first.texts)
+        deadline = time.monotonic() + self._max_wait_s
+        while size < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Closing: embed what was gathered, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._in_flight.acquire()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                executor = self._executor
+                try:
+                    future = executor.submit(_embed, texts)
+                except BrokenProcessPool:
+                    executor = self._restart(executor)
+                    future = executor.submit(_embed, texts)
+            except Exception as e:
+                self._in_flight.release()
+                self._resolve(batch, e)
+                continue
+            future.add_done_callback(partial(self._on_done, batch, executor))
+
+    def _on_done(self, batch: List[_Request], executor: ProcessPoolExecutor, future: "Future[np.ndarray]") -> None:
+        self._in_flight.release()
+        try:
+            self._resolve(batch, future.result())
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            self._resolve(batch, e)
+        except Exception as e:
+            self._resolve(batch, e)
+
+    def _restart(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Replace the executor after a worker died, unless another batch already did"""
+        with self._executor_lock:
+            if self._executor is broken and not self._closed:
+                self._executor = self._new_executor()
+                broken.shutdown(wait=False)
+            return self._executor
+
+    def _resolve(self, batch: List[_Request], result: Any) -> None:
+        offset = 0
+        for request in batch:
+            if isinstance(result, BaseException):
+                request.future.set_exception(result)
+                continue
+            request.future.set_result(list(result[offset:offset + len(request.texts)]))
+            offset += len(request.texts)
+
+    def close(self) -> None:
+        """Embed the requests already queued, then stop the dispatcher and the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        with self._executor_lock:
+            self._executor.shutdown(wait=True)
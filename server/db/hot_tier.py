@@ -0,0 +1,151 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from server.src.models.enums import Config, VectorQuantization
+
+
+class _SessionMatrix:
+    """
+    Embeddings of one session in a contiguous matrix, grown by doubling.
+
+    With int8 quantization each vector is stored as int8 codes times a float32 scale
+    (its largest absolute component / 127), a quarter of the float32 size. Squared norms
+    are kept at full precision so only the dot product is approximated.
+    """
+    def __init__(self, dim: int, capacity: int = 64, quantization: VectorQuantization = VectorQuantization.NONE) -> None:
+        self.quantization = quantization
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        dtype = np.int8 if quantization == VectorQuantization.INT8 else np.float32
+        self._vectors = np.empty((capacity, dim), dtype=dtype)
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._norms = np.empty(capacity, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Bytes used by the vectors of the session, excluding spare capacity"""
+        size = len(self.ids)
+        scales = self._scales[:size].nbytes if self.quantization == VectorQuantization.INT8 else 0
+        return self._vectors[:size].nbytes + self._norms[:size].nbytes + scales
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]], embeddings: Any) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        for id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+            row = self._rows.get(id)
+            if row is None:
+                row = len(self.ids)
+                if row == len(self._vectors):
+                    self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+                    self._scales = np.concatenate([self._scales, np.ones_like(self._scales)])
+                    self._norms = np.concatenate([self._norms, np.empty_like(self._norms)])
+                self._rows[id] = row
+                self.ids.append(id)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+            else:
+                self.documents[row] = document
+                self.metadatas[row] = metadata
+            if self.quantization == VectorQuantization.INT8:
+                scale = float(np.abs(vector).max()) / 127 or 1.0
+                self._vectors[row] = np.clip(np.rint(vector / scale), -127, 127)
+                self._scales[row] = scale
+            else:
+                self._vectors[row] = vector
+            self._norms[row] = vector @ vector
+
+    def query(self, embedding: Sequence[float], n_results: int) -> Dict[str, Any]:
+        """Top n_results by squared L2 distance, the space of the Chroma collections, in Chroma's result format
+        with their embeddings. Exact at full precision, approximate with quantization"""
+        size = len(self.ids)
+        n = min(n_results, size)
+        if n <= 0:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]], "embeddings": [[]]}
+        query = np.asarray(embedding, dtype=np.float32)
+        # |v - q|^2 = |v|^2 - 2 v.q + |q|^2, a single matrix-vector product over the session
+        dots = self._vectors[:size] @ query
+        if self.quantization == VectorQuantization.INT8:
+            dots *= self._scales[:size]
+        distances = self._norms[:size] - 2 * dots + query @ query
+        top = np.argpartition(distances, n - 1)[:n] if n < size else np.arange(size)
+        top = top[np.argsort(distances[top], kind='stable')]
+        embeddings = self._vectors[top].astype(np.float32)
+        if self.quantization == VectorQuantization.INT8:
+            embeddings *= self._scales[top, None]
+        return {
+            "ids": [[self.ids[i] for i in top]],
+            "documents": [[self.documents[i] for i in top]],
+            "metadatas": [[self.metadatas[i] for i in top]],
+            "distances": [distances[top].tolist()],
+            "embeddings": [list(embeddings)]
+        }
+
+class HotTier:
+    """
+    In-memory search over the chat history of the most recently active sessions.
+
+    Sessions are loaded from their Chroma collection on first query and kept up to date
+    by write-through, Chroma staying the durable copy. Sessions larger than
+    `max_vectors` are left to Chroma's index, and the least recently queried sessions
+    are evicted past `max_sessions`.
+
+    With int8 `quantization`, queries return `rerank_factor` times more candidates,
+    to be re-ranked against the full precision vectors kept by Chroma.
+    """
+    def __init__(self, max_sessions: int = Config.HOT_TIER_MAX_SESSIONS, max_vectors: int = Config.HOT_TIER_MAX_VECTORS,
+                 quantization: VectorQuantization = VectorQuantization(Config.HOT_TIER_QUANTIZATION), rerank_factor: int = Config.HOT_TIER_RERANK_FACTOR) -> None:
+        self.max_sessions = max_sessions
+        self.max_vectors = max_vectors
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor if quantization != VectorQuantization.NONE else 1
+        self._sessions: "OrderedDict[str, _SessionMatrix]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def load(self, session_id: str, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]], embeddings: Any) -> bool:
+        """Keep a session in memory, unless it is too large. Returns whether it is kept"""
+        if not ids or len(ids) > self.max_vectors:
+            return False
+        matrix = _SessionMatrix(dim=len(embeddings[0]), capacity=max(64, len(ids)), quantization=self.quantization)
+        matrix.upsert(ids, documents, metadatas, embeddings)
+        with self._lock:
+            self._sessions[session_id] = matrix
+            self._sessions.move_to_end(session_id)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return True
+
+    def upsert(self, session_id: str, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]], embeddings: Any) -> None:
+        """Write through documents just stored in Chroma, if their session is loaded"""
+        with self._lock:
+            matrix = self._sessions.get(session_id)
+            if matrix is None:
+                return
+            matrix.upsert(ids, documents, metadatas, embeddings)
+            if len(matrix) > self.max_vectors:
+                del self._sessions[session_id]
+
+    def query(self, session_id: str, embedding: Sequence[float], n_results: int) -> Optional[Dict[str, Any]]:
+        """Chroma-formatted results, n_results * rerank_factor candidates, or None if the session is not loaded"""
+        with self._lock:
+            matrix = self._sessions.get(session_id)
+            if matrix is None:
+                return None
+            self._sessions.move_to_end(session_id)
+            return matrix.query(embedding, n_results * self.rerank_factor)
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(matrix.nbytes() for matrix in self._sessions.values())
+
+    def evict(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
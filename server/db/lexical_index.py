@@ -0,0 +1,162 @@
+from collections import OrderedDict
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from server.src.models.enums import Config
+from server.src.models.metrics import LexicalIndexStats
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Function words match nearly every message, only the content words of a query are searched
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "for", "from", "has", "have", "he", "her", "him",
+    "his", "how", "i", "if", "in", "into", "is", "it", "its", "me", "my", "no", "not", "of", "on", "or", "our", "she",
+    "so", "that", "the", "their", "them", "then", "there", "they", "this", "to", "up", "us", "was", "we", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your"
+}
+
+def _match_query(query: str) -> str:
+    """FTS5 query matching any content word of query, each quoted so user text is never parsed as syntax"""
+    words = [word for word in dict.fromkeys(_WORD_PATTERN.findall(query.lower())) if word not in _STOPWORDS]
+    return " OR ".join(f'"{word}"' for word in words)
+
+class _Partition:
+    """FTS5 table of the messages of one session, in its own SQLite database"""
+    def __init__(self, path: str) -> None:
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5("
+                "content, story_id UNINDEXED, role UNINDEXED, created_at UNINDEXED, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def insert(self, rows: List[Tuple[int, str, str, Optional[str], Optional[str]]]) -> None:
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO chat_messages_fts (rowid, content, story_id, role, created_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+class LexicalIndex:
+    """
+    BM25 full-text index of chat messages in SQLite FTS5 tables, keyed by message id.
+
+    Catches the exact proper nouns (characters, items, places) that dense embeddings
+    blur. Like the Chroma collections, the index is partitioned into one database per
+    session under `directory` (kept in memory without one), so a search only reads the
+    session's own messages. Searches are aborted once their latency budget is spent,
+    and counted in `stats()`.
+    """
+    def __init__(self, directory: Optional[str] = None, max_open: int = Config.CHAT_COLLECTION_CACHE_SIZE) -> None:
+        self._directory = directory
+        self._max_open = max_open
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._searches = 0
+        self._budget_overruns = 0
+
+    def _partition_path(self, session_id: str) -> str:
+        return os.path.join(self._directory, f"chat_session_{session_id}.db") if self._directory is not None else ":memory:"
+
+    def _partition(self, session_id: str, create: bool) -> Optional[_Partition]:
+        """Index of a session, None if it has none and create is False"""
+        with self._lock:
+            partition = self._partitions.get(session_id)
+            if partition is not None:
+                self._partitions.move_to_end(session_id)
+                return partition
+            path = self._partition_path(session_id)
+            if not create and (path == ":memory:" or not os.path.exists(path)):
+                return None
+            partition = _Partition(path)
+            self._partitions[session_id] = partition
+            # Partitions held in memory only live in this map and are never evicted. Evicted
+            # connections close once the searches still using them are done
+            if self._directory is not None and len(self._partitions) > self._max_open:
+                self._partitions.popitem(last=False)
+            return partition
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, str]]) -> None:
+        """Index messages, replacing any already indexed under the same id"""
+        sessions: Dict[str, List[Tuple[int, str, str, Optional[str], Optional[str]]]] = {}
+        for id, document, metadata in zip(ids, documents, metadatas):
+            sessions.setdefault(metadata["session_id"], []).append((int(id), document, metadata["story_id"], metadata.get("role"), metadata.get("created_at")))
+        for session_id, rows in sessions.items():
+            self._partition(session_id, create=True).insert(rows) # type: ignore[union-attr]
+
+    def search(self, story_id: str, session_id: str, query: str, n_results: int,
+               budget_ms: Optional[float] = None) -> List[Tuple[str, str, Dict[str, str]]]:
+        """
+        Best BM25 matches of query in a session.
+
+        Returns:
+            List[Tuple[str, str, Dict[str, str]]]: (id, document, metadata) by decreasing
+            relevance, empty if nothing matches or the search overran budget_ms.
+        """
+        match = _match_query(query)
+        if not match or n_results <= 0:
+            return []
+        with self._lock:
+            self._searches += 1
+        if budget_ms is not None and budget_ms <= 0:
+            self._count_overrun()
+            return []
+        partition = self._partition(session_id, create=False)
+        if partition is None:
+            return []
+        with partition.lock:
+            if budget_ms is not None:
+                deadline = time.monotonic() + budget_ms / 1000
+                # Checked every 1000 virtual machine instructions, aborts the query once past the deadline
+                partition.connection.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+            try:
+                rows = partition.connection.execute(
+                    "SELECT rowid, content, role, created_at FROM chat_messages_fts "
+                    "WHERE chat_messages_fts MATCH ? AND story_id = ? ORDER BY bm25(chat_messages_fts) LIMIT ?",
+                    (match, story_id, n_results)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    self._count_overrun()
+                    return []
+                raise
+            finally:
+                partition.connection.set_progress_handler(None, 0)
+        return [(str(rowid), content, {"story_id": story_id, "session_id": session_id, "role": role, "created_at": created_at})
+                for rowid, content, role, created_at in rows]
+
+    def _count_overrun(self) -> None:
+        with self._lock:
+            self._budget_overruns += 1
+
+    def stats(self) -> LexicalIndexStats:
+        with self._lock:
+            return LexicalIndexStats(
+                searches=self._searches,
+                budget_overruns=self._budget_overruns,
+                overrun_rate=self._budget_overruns / self._searches if self._searches else 0.0,
+                open_partitions=len(self._partitions)
+            )
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            partition = self._partitions.pop(session_id, None)
+            if partition is not None:
+                with partition.lock:
+                    partition.connection.close()
+            path = self._partition_path(session_id)
+            if path != ":memory:" and os.path.exists(path):
+                os.remove(path)
+
+    def close(self) -> None:
+        with self._lock:
+            for partition in self._partitions.values():
+                with partition.lock:
+                    partition.connection.close()
+            self._partitions.clear()
@@ -36,6 +36,13 @@ class WorldDB(Base):
 
     stories = relationship("UserStoryDB", back_populates="world", cascade="all, delete-orphan")
 
+class PooledWorldDB(Base):
+    __tablename__ = "world_pool"
+    id = Column(Integer, primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), nullable=False, index=True)
+    world = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
 class UserStoryDB(Base):
     __tablename__ = "user_stories"
     id = Column(Integer, primary_key=True)
@@ -44,6 +51,7 @@ class UserStoryDB(Base):
     tag_id = Column(Integer, ForeignKey("tags.id"), nullable=False)
     prompt = Column(String(120), nullable=False)
     world_id = Column(Integer, ForeignKey("world.id"), nullable=False)
+    intro = Column(Text, nullable=True)
 
     world = relationship("WorldDB", back_populates="stories")
     chat_sessions = relationship("ChatSessionDB")
@@ -61,7 +69,8 @@ class ChatMessageDB(Base):
     session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=False)
     role = Column(String, nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    token_count = Column(Integer, nullable=True)  # cached by the prompt packer, counted once per message
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
 class ChatSessionDB(Base):
     __tablename__ = "chat_sessions"
@@ -69,7 +78,28 @@ class ChatSessionDB(Base):
     id = Column(Integer, primary_key=True)
     story_id = Column(String, ForeignKey("user_stories.id"), nullable=False)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     has_started = Column(Boolean, default=False)
-    messages = relationship("ChatMessageDB", lazy=True)
\ No newline at end of file
+    embedded_at = Column(DateTime, nullable=True)  # every message created up to then is in the vector store
+    messages = relationship("ChatMessageDB", lazy=True)
+
+class SessionSummaryDB(Base):
+    __tablename__ = "session_summaries"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False, index=True)
+    level = Column(Integer, nullable=False)  # 0 summarizes chat turns, n + 1 summarizes summaries of level n
+    content = Column(Text, nullable=False)
+    start_message_id = Column(Integer, nullable=False)
+    end_message_id = Column(Integer, nullable=False)
+    compacted = Column(Boolean, default=False, nullable=False)  # folded into a summary of the level above
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+class EmbeddingQueueDB(Base):
+    __tablename__ = "embedding_queue"
+
+    message_id = Column(Integer, ForeignKey("chat_messages.id", ondelete="CASCADE"), primary_key=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    enqueued_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,44 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from server.src.models.enums import Config
+
+
+def reciprocal_rank_fusion_scores(rankings: Sequence[Sequence[str]], weights: Sequence[float], k: int = Config.HYBRID_RRF_K) -> Dict[str, float]:
+    """Score of each id: sum(weight / (k + rank)) over the ranked lists it appears in"""
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + weight / (k + rank)
+    return scores
+
+def maximal_marginal_relevance(relevance: np.ndarray, vectors: np.ndarray, n: int, diversity: float = Config.MMR_DIVERSITY) -> List[int]:
+    """
+    Pick n candidates, each time the one maximising
+    (1 - diversity) * relevance - diversity * (highest cosine similarity to those already picked).
+
+    Args:
+        relevance: Relevance of each candidate, in [0, 1].
+        vectors: Embedding of each candidate, one per row.
+
+    Returns:
+        List[int]: Indexes of the picked candidates, in the order they were picked.
+    """
+    count = len(relevance)
+    if count <= n or diversity <= 0:
+        return [int(i) for i in np.argsort(-relevance, kind='stable')[:n]]
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    # All pairwise similarities in one product, the selection loop only updates a running maximum
+    similarities = unit @ unit.T
+    max_similarity = np.full(count, -np.inf, dtype=np.float64)
+    available = np.ones(count, dtype=bool)
+    picked: List[int] = []
+    for _ in range(n):
+        penalty = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        scores = np.where(available, (1 - diversity) * relevance - diversity * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarities[best])
+    return picked
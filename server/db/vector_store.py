@@ -1,11 +1,24 @@
+from collections import OrderedDict
 from datetime import timezone, datetime
 import os
+import threading
 from pathlib import Path
 import chromadb
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import EmbeddingFunction
+from chromadb.errors import NotFoundError
 from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from server.db.embedding_cache import EmbeddingCache, get_embedding_cache
+from server.db.embedding_worker import EmbeddingWorkerPool
+from server.db.hot_tier import HotTier
+from server.db.lexical_index import LexicalIndex
+from server.db.ranking import maximal_marginal_relevance, reciprocal_rank_fusion_scores
 from server.src.exceptions import DatabaseError 
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import Config
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # server/ directory
 ENV_PATH = BASE_DIR / ".env"
@@ -14,21 +27,107 @@ ENV_PATH = BASE_DIR / ".env"
 DATABASE_URL = os.getenv("VECTOR_STORE_URL", '')
 
 class VectorStore:
-    def __init__(self):
-        """Initialize ChromaDB client"""
-        self.client = chromadb.PersistentClient(path=DATABASE_URL)
-        self.story_collection = self.client.get_or_create_collection(name="story_settings")
-        self.chat_collection = self.client.get_or_create_collection(name="chat_history")
-        self.embedding_fn = DefaultEmbeddingFunction()
+    def __init__(self, path: str = DATABASE_URL, embedding_fn: Optional[EmbeddingFunction] = None, embedding_cache: Optional[EmbeddingCache] = None,
+                 embedding_pool: Optional[EmbeddingWorkerPool] = None, lexical_index: Optional[LexicalIndex] = None, hot_tier: Optional[HotTier] = None):
+        """Initialize ChromaDB client. The same embedding function is used to write and to query both collections,
+        through the content-addressed embedding cache, and run in embedding_pool's worker processes if given.
+        Chat messages are also kept in a lexical index, stored next to the collections, and active sessions
+        are searched in memory by the hot tier"""
+        self.embedding_fn: EmbeddingFunction = embedding_fn or DefaultEmbeddingFunction() # type: ignore
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self._embedder = embedding_pool or self.embedding_fn
+        self.client = chromadb.PersistentClient(path=path)
+        self.story_collection = self.client.get_or_create_collection(name="story_settings", embedding_function=self.embedding_fn) # type: ignore
+        # Chat history is partitioned into one collection per session, found through a routing table.
+        # Sessions still in the former shared collection are moved out of it on first use
+        self._session_collections: "OrderedDict[str, Collection]" = OrderedDict()
+        self._session_collections_lock = threading.Lock()
+        try:
+            self._legacy_chat_collection: Optional[Collection] = self.client.get_collection(name="chat_history", embedding_function=self.embedding_fn) # type: ignore
+        except NotFoundError:
+            self._legacy_chat_collection = None
+        self.lexical_index = lexical_index or LexicalIndex(os.path.join(path, "chat_messages_fts") if path else None)
+        self.hot_tier = hot_tier or (HotTier() if Config.HOT_TIER_ENABLED else None)
+        # Serializes loading a session into the hot tier with writes to it, so none is missed
+        self._hot_tier_lock = threading.RLock()
+
+    def warm_up(self) -> None:
+        """Run one dummy inference so the embedding model is loaded before the first request"""
+        self._embedder(["warm up"])
+
+    def close(self) -> None:
+        self.client.close()
+        self.lexical_index.close()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings of texts, served from the embedding cache when already computed"""
+        return [vector.tolist() for vector in self.embedding_cache.embed(texts, self._embedder)]
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.embed([query])[0]
+
+    def session_collection(self, session_id: str, create: bool = True) -> Optional[Collection]:
+        """Collection holding the chat history of a session, None if it has none and create is False"""
+        with self._session_collections_lock:
+            collection = self._session_collections.get(session_id)
+            if collection is not None:
+                self._session_collections.move_to_end(session_id)
+                return collection
+            name = _session_collection_name(session_id)
+            try:
+                collection = self.client.get_collection(name=name, embedding_function=self.embedding_fn) # type: ignore
+            except NotFoundError:
+                if not create and not self._has_legacy_history(session_id):
+                    return None
+                collection = self.client.get_or_create_collection(name=name, embedding_function=self.embedding_fn) # type: ignore
+            self._migrate_legacy_history(session_id, collection)
+            self._session_collections[session_id] = collection
+            if len(self._session_collections) > Config.CHAT_COLLECTION_CACHE_SIZE:
+                self._session_collections.popitem(last=False)
+            return collection
+
+    def _has_legacy_history(self, session_id: str) -> bool:
+        if self._legacy_chat_collection is None or self._legacy_chat_collection.count() == 0:
+            return False
+        return len(self._legacy_chat_collection.get(where={"session_id": session_id}, limit=1, include=[])["ids"]) > 0
+
+    def _migrate_legacy_history(self, session_id: str, collection: Collection) -> None:
+        """Move the messages of a session from the former shared collection into its own, with their embeddings"""
+        if self._legacy_chat_collection is None or self._legacy_chat_collection.count() == 0:
+            return
+        legacy = self._legacy_chat_collection.get(where={"session_id": session_id}, include=["documents", "metadatas", "embeddings"]) # type: ignore
+        if not legacy["ids"]:
+            return
+        collection.upsert(ids=legacy["ids"], documents=legacy["documents"], metadatas=legacy["metadatas"], embeddings=legacy["embeddings"]) # type: ignore
+        self._legacy_chat_collection.delete(ids=legacy["ids"])
 
+    def delete_session(self, session_id: str) -> None:
+        """Drop the chat history partition of a deleted session"""
+        if self.hot_tier is not None:
+            self.hot_tier.evict(session_id)
+        with self._session_collections_lock:
+            self._session_collections.pop(session_id, None)
+            try:
+                self.client.delete_collection(name=_session_collection_name(session_id))
+            except NotFoundError:
+                pass
+            if self._legacy_chat_collection is not None:
+                self._legacy_chat_collection.delete(where={"session_id": session_id})
+        self.lexical_index.delete_session(session_id)
 
-    def add_story_settings(self, story_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
-        """Store generated story settings for later retrieval"""
+    def add_story_settings(self, story_id: str, chunks: List[Tuple[str, str, str]], metadata: Optional[Dict[str, Any]] = None):
+        """Store generated story settings for later retrieval, one document per (type, name, text) chunk.
+        All chunks are embedded in a single batch"""
+        if not chunks:
+            return
         metadata = metadata or {}
-        metadata = {**metadata, "story_id": story_id, "created_at": datetime.now(timezone.utc).isoformat()}
-        emb = self.embedding_fn([text])
+        created_at = datetime.now(timezone.utc).isoformat()
+        ids = [f"{story_id}:{i}" for i in range(len(chunks))]
+        documents = [text for (_, _, text) in chunks]
+        metadatas = [{**metadata, "story_id": story_id, "type": chunk_type, "name": name, "created_at": created_at} for (chunk_type, name, _) in chunks]
+        emb = self.embed(documents)
         try:
-            self.story_collection.add(ids=[story_id], documents=[text], metadatas=[metadata], embeddings=emb)
+            self.story_collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=emb) # type: ignore
         except Exception:
             raise DatabaseError("Could not save to vector store!")
     
@@ -36,33 +135,168 @@ class VectorStore:
         """Store chat messages for context retrieval"""
         metadata = metadata or {}
         metadata = {**metadata, "story_id": story_id, "role": role, "session_id": session_id, "created_at": datetime.now(timezone.utc).isoformat()}
-        emb = self.embedding_fn([content])
-        self.chat_collection.add(ids=[message_id], documents=[content], metadatas=[metadata], embeddings=emb)
+        if self._upsert_chat_documents([message_id], [content], [metadata]):
+            raise DatabaseError("Could not save to vector store!")
+
+    def add_chat_messages(self, messages: List[ChatMessage], metadata: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Store chat messages for context retrieval, embedded in a single batch and upserted by
+        message id, so storing the same messages again is a no-op.
+
+        Returns:
+            List[str]: Ids of the messages that could not be written.
+        """
+        # Last copy wins if a message appears twice
+        unique = {str(message.id): message for message in messages if message.id is not None}
+        metadata = metadata or {}
+        now = datetime.now(timezone.utc)
+        metadatas = [{**metadata, "story_id": str(message.story_id), "role": message.role, "session_id": str(message.session_id),
+                      "created_at": (message.created_at or now).isoformat()} for message in unique.values()]
+        return self._upsert_chat_documents(list(unique), [message.content for message in unique.values()], metadatas)
+
+    def _upsert_chat_documents(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """Embed documents in one batch and upsert them in write batches. A failed batch is retried
+        document by document, so one bad document does not lose the others. Returns the failed ids"""
+        if not ids:
+            return []
+        emb = self.embed(documents)
+        failed: List[str] = []
+        batch_size = min(Config.VECTOR_STORE_WRITE_BATCH_SIZE, self.client.get_max_batch_size())
+        sessions: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            sessions.setdefault(metadata["session_id"], []).append(i)
+        for session_id, rows in sessions.items():
+            try:
+                collection: Collection = self.session_collection(session_id) # type: ignore
+            except Exception:
+                failed.extend(ids[i] for i in rows)
+                continue
+            with self._hot_tier_lock:
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    try:
+                        collection.upsert(ids=[ids[i] for i in batch], documents=[documents[i] for i in batch], metadatas=[metadatas[i] for i in batch],
+                                          embeddings=[emb[i] for i in batch]) # type: ignore
+                    except Exception:
+                        for i in batch:
+                            try:
+                                collection.upsert(ids=[ids[i]], documents=[documents[i]], metadatas=[metadatas[i]], embeddings=[emb[i]]) # type: ignore
+                            except Exception:
+                                failed.append(ids[i])
+                if self.hot_tier is not None:
+                    stored = [i for i in rows if ids[i] not in failed]
+                    self.hot_tier.upsert(session_id, [ids[i] for i in stored], [documents[i] for i in stored], [metadatas[i] for i in stored], [emb[i] for i in stored])
+
+        written = [i for i, id in enumerate(ids) if id not in failed]
+        try:
+            self.lexical_index.add([ids[i] for i in written], [documents[i] for i in written], [metadatas[i] for i in written])
+        except Exception:
+            # Reported as failed so the message is written again, both writes are idempotent
+            failed.extend(ids[i] for i in written)
+        return failed
+
+    def _query_chat(self, session_id: str, query_embedding: List[float], n_results: int) -> Dict[str, Any]:
+        """Nearest chat messages of a session with their embeddings, searched in memory if the session fits in the hot tier"""
+        if self.hot_tier is not None:
+            results = self.hot_tier.query(session_id, query_embedding, n_results)
+            if results is not None:
+                return self._rerank(session_id, query_embedding, results, n_results)
+        collection = self.session_collection(session_id, create=False)
+        if collection is None:
+            return {}
+        if self.hot_tier is not None and collection.count() <= self.hot_tier.max_vectors:
+            with self._hot_tier_lock:
+                stored = collection.get(include=["documents", "metadatas", "embeddings"]) # type: ignore
+                loaded = self.hot_tier.load(session_id, stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]) # type: ignore
+            if loaded:
+                return self._rerank(session_id, query_embedding, self.hot_tier.query(session_id, query_embedding, n_results) or {}, n_results)
+        return collection.query(query_embeddings=[query_embedding], n_results=n_results, include=["documents", "metadatas", "distances", "embeddings"]) # type: ignore
+
+    def _rerank(self, session_id: str, query_embedding: List[float], candidates: Dict[str, Any], n_results: int) -> Dict[str, Any]:
+        """Order candidates of the quantized hot tier by their full precision distance, kept by Chroma"""
+        ids: List[str] = (candidates.get("ids") or [[]])[0]
+        if self.hot_tier is None or self.hot_tier.rerank_factor == 1 or len(ids) <= 1:
+            return candidates
+        collection = self.session_collection(session_id, create=False)
+        stored = collection.get(ids=ids, include=["embeddings"]) if collection is not None else None # type: ignore
+        if not stored or len(stored["ids"]) != len(ids):
+            # Not written to Chroma yet, keep the approximate order
+            return {key: [values[0][:n_results]] for key, values in candidates.items()}
+        vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+        distances = ((vectors - np.asarray(query_embedding, dtype=np.float32)) ** 2).sum(axis=1)
+        rows = {id: row for row, id in enumerate(stored["ids"])}
+        order = sorted(range(len(ids)), key=lambda i: distances[rows[ids[i]]])[:n_results]
+        return {
+            "ids": [[ids[i] for i in order]],
+            "documents": [[candidates["documents"][0][i] for i in order]],
+            "metadatas": [[candidates["metadatas"][0][i] for i in order]],
+            "distances": [[float(distances[rows[ids[i]]]) for i in order]],
+            "embeddings": [[vectors[rows[ids[i]]] for i in order]]
+        }
+
+    def _select_chat_results(self, session_id: str, dense_results: Dict[str, Any], lexical_results: List[Tuple[str, str, Dict[str, str]]],
+                             n_results: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Merge dense and lexical chat matches by weighted reciprocal rank fusion, then pick n_results
+        of them by maximal marginal relevance, so near-duplicate messages do not fill the context.
+        """
+        dense_ids: List[str] = (dense_results.get("ids") or [[]])[0]
+        found: Dict[str, Tuple[str, Dict[str, Any]]] = {id: (document, metadata) for id, document, metadata in lexical_results}
+        found.update(zip(dense_ids, zip((dense_results.get("documents") or [[]])[0], (dense_results.get("metadatas") or [[]])[0])))
+        scores = reciprocal_rank_fusion_scores([dense_ids, [id for id, _, _ in lexical_results]], [Config.HYBRID_DENSE_WEIGHT, Config.HYBRID_LEXICAL_WEIGHT])
+        fused = sorted(scores, key=lambda id: scores[id], reverse=True)
+        if len(fused) > n_results and Config.MMR_DIVERSITY > 0:
+            vectors = self._chat_embeddings(session_id, fused, dense_results)
+            # Messages without a stored embedding cannot be compared, they only fill the places MMR leaves
+            embedded = [id for id in fused if id in vectors]
+            relevance = np.array([scores[id] for id in embedded])
+            # Rank fusion scores only differ by a few percent, stretched to [0, 1] so relevance is not drowned out by similarity
+            relevance = (relevance - relevance.min()) / ((relevance.max() - relevance.min()) or 1.0)
+            picked = maximal_marginal_relevance(relevance, np.array([vectors[id] for id in embedded], dtype=np.float32), n_results, Config.MMR_DIVERSITY) if embedded else []
+            best = [embedded[i] for i in picked]
+            best += [id for id in fused if id not in vectors][:n_results - len(best)]
+        else:
+            best = fused[:n_results]
+        return [found[id][0] for id in best], [found[id][1] for id in best]
+
+    def _chat_embeddings(self, session_id: str, ids: List[str], dense_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Embeddings of chat messages by id: those returned with the dense matches, the others read from Chroma.
+        Messages not written to Chroma are left out"""
+        dense_embeddings = dense_results.get("embeddings")
+        known: Dict[str, Any] = dict(zip(dense_results["ids"][0], dense_embeddings[0])) if dense_embeddings is not None else {}
+        missing = [id for id in ids if id not in known]
+        if missing:
+            collection = self.session_collection(session_id, create=False)
+            if collection is not None:
+                stored = collection.get(ids=missing, include=["embeddings"]) # type: ignore
+                known.update(zip(stored["ids"], stored["embeddings"])) # type: ignore
+        return known
 
     def retrieve_context(self, story_id: str, session_id: str, query: str, n_results: int = 3) -> Dict[str, Any]:
         """RAG: Retrieve relevant settings + chat history for context"""
-        # Get relevant story settings
+        # Embed the query once for both collections
+        query_embedding = self.embed_query(query)
+
+        # Get relevant story settings chunks
         settings_results = self.story_collection.query(
-            query_texts=[query],
-            n_results=min(n_results, 2),
-            where={"story_id": story_id}
-        )
-        
-        # Get relevant chat history
-        chat_results = self.chat_collection.query(
-            query_texts=[query],
+            query_embeddings=[query_embedding],
             n_results=n_results,
-            where={
-                "$and": [
-                    {"story_id": story_id},
-                    {"session_id": session_id}
-                ]
-            }
+            where={"story_id": story_id}
         )
         
+        # Get relevant chat history, by meaning and by exact words such as names.
+        # Only the session's own partition is searched, for more candidates than needed to leave room for diversity
+        candidates = n_results * Config.MMR_CANDIDATE_FACTOR
+        chat_results = self._query_chat(session_id, query_embedding, candidates)
+        lexical_results = self.lexical_index.search(story_id, session_id, query, candidates, budget_ms=Config.HYBRID_LEXICAL_BUDGET_MS)
+        chat_documents, chat_metadatas = self._select_chat_results(session_id, chat_results, lexical_results, n_results)
+
         return {
             "settings": settings_results.get("documents", [[]]),
-            "chat_history": chat_results.get("documents", [[]]),
+            "chat_history": [chat_documents],
             "settings_metadata": settings_results.get("metadatas", [[]]),
-            "chat_metadata": chat_results.get("metadatas", [[]])
+            "chat_metadata": [chat_metadatas]
         }
+
+def _session_collection_name(session_id: str) -> str:
+    return f"chat_session_{session_id}"
@@ -1,11 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from server.db.embedding_worker import EmbeddingWorkerPool
+from server.db.vector_store import VectorStore
 from .routers.story_router import story_router
 from .routers.user_router import user_router
 from .routers.chat_router import chat_router
+from .routers.metrics_router import metrics_router
+from .dependencies import create_story_service
+from .models.enums import Config
+from .service.chain_registry import ChainRegistry
+from .service.embedding_queue_service import EmbeddingQueueWorker
+from .service.llm_client_pool import LLMClientPool
+from .service.llm_service import LLMService
+from .service.story_job_service import StoryJobManager
+from .service.world_pool_service import WorldPool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Long-lived resources shared by all requests
+    app.state.llm_pool = LLMClientPool()
+    # Embeddings are computed in worker processes, off the request handling process
+    embedding_fn = DefaultEmbeddingFunction()
+    app.state.embedding_pool = EmbeddingWorkerPool(embedding_fn) if Config.EMBEDDING_WORKERS > 0 else None
+    app.state.vector_store = VectorStore(embedding_fn=embedding_fn, embedding_pool=app.state.embedding_pool) # type: ignore
+    if Config.VECTOR_STORE_WARMUP:
+        # Load the embedding model now rather than on the first request
+        await asyncio.to_thread(app.state.vector_store.warm_up)
+    app.state.embedding_queue = EmbeddingQueueWorker(app.state.vector_store)
+    if Config.EMBEDDING_QUEUE_ENABLED:
+        app.state.embedding_queue.start()
+    app.state.chain_registry = ChainRegistry(app.state.llm_pool)
+    app.state.chain_registry.build()
+    app.state.world_pool = WorldPool(app.state.llm_pool, LLMService(app.state.llm_pool, app.state.chain_registry))
+    if Config.WORLD_POOL_ENABLED:
+        app.state.world_pool.start()
+    app.state.story_jobs = StoryJobManager(lambda: create_story_service(app))
+    yield
+    await app.state.story_jobs.aclose()
+    await app.state.world_pool.aclose()
+    await app.state.llm_pool.aclose()
+    await app.state.embedding_queue.aclose()
+    app.state.vector_store.close()
+    if app.state.embedding_pool is not None:
+        app.state.embedding_pool.close()
 
-app = FastAPI() 
+app = FastAPI(lifespan=lifespan) 
 # Configure CORS settings
 origins = [
     "http://localhost:5173",
@@ -20,4 +64,5 @@ app.add_middleware(
 )
 app.include_router(user_router)
 app.include_router(story_router)
-app.include_router(chat_router)
\ No newline at end of file
+app.include_router(chat_router)
+app.include_router(metrics_router)
\ No newline at end of file
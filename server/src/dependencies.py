@@ -1,19 +1,24 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from server.db.db import get_db
+from server.db.db import SessionLocal, get_db
 from server.db.vector_store import VectorStore
 from server.src.models import TokenData
 from server.src.models.user import UserResponseDTO
 from server.src.repository import IUserRepository, UserRepository, IStoryRepository, StoryRepository, IWorldRepository, WorldRepository, IChatRespository, ChatRepository
-from server.src.service import UserService, StoryService, LLMService
+from server.src.service import UserService, StoryService, LLMService, StoryJobManager
 from server.src.service.chat_service import ChatService
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.embedding_queue_service import EmbeddingQueueWorker
+from server.src.service.llm_client_pool import LLMClientPool
+from server.src.service.world_pool_service import WorldPool
 from server.src.utils import ALGORITHM, JWT_SECRET_KEY
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/users/login', scheme_name='JWT')
@@ -33,14 +38,38 @@ async def get_chat_repository(db: Session = Depends(get_db)) -> IChatRespository
 async def get_user_service(repository: IUserRepository = Depends(get_user_repository)) -> UserService:
     return UserService(repository)
 
-async def get_llm_service() -> LLMService:
-    return LLMService()
+async def get_llm_pool(request: Request) -> LLMClientPool:
+    return request.app.state.llm_pool
 
-async def get_vector_db() -> VectorStore:
-    return VectorStore()
+async def get_chain_registry(request: Request) -> ChainRegistry:
+    return request.app.state.chain_registry
 
-async def get_story_service(repository: IStoryRepository = Depends(get_story_repository), world_repository: IWorldRepository = Depends(get_world_repository), llm_service: LLMService =  Depends(get_llm_service), vector_store: VectorStore = Depends(get_vector_db)) -> StoryService:
-    return StoryService(repository, world_repository, llm_service, vector_store)
+async def get_llm_service(pool: LLMClientPool = Depends(get_llm_pool), registry: ChainRegistry = Depends(get_chain_registry)) -> LLMService:
+    return LLMService(pool, registry)
+
+async def get_vector_db(request: Request) -> VectorStore:
+    return request.app.state.vector_store
+
+async def get_world_pool(request: Request) -> WorldPool:
+    return request.app.state.world_pool
+
+async def get_embedding_queue(request: Request) -> EmbeddingQueueWorker:
+    return request.app.state.embedding_queue
+
+async def get_story_service(repository: IStoryRepository = Depends(get_story_repository), world_repository: IWorldRepository = Depends(get_world_repository), llm_service: LLMService =  Depends(get_llm_service), vector_store: VectorStore = Depends(get_vector_db), world_pool: WorldPool = Depends(get_world_pool)) -> StoryService:
+    return StoryService(repository, world_repository, llm_service, vector_store, world_pool)
+
+async def get_story_job_manager(request: Request) -> StoryJobManager:
+    return request.app.state.story_jobs
+
+@asynccontextmanager
+async def create_story_service(app: FastAPI) -> AsyncIterator[StoryService]:
+    """Builds a StoryService with its own db session, for work that outlives a request"""
+    db = SessionLocal()
+    try:
+        yield StoryService(StoryRepository(db), WorldRepository(db), LLMService(app.state.llm_pool, app.state.chain_registry), app.state.vector_store, app.state.world_pool)
+    finally:
+        db.close()
 
 async def get_chat_service(story_repository: IStoryRepository = Depends(get_story_repository), chat_repository: IChatRespository = Depends(get_chat_repository), llm_service: LLMService =  Depends(get_llm_service), vector_store: VectorStore = Depends(get_vector_db)) -> ChatService:
     return ChatService(story_repository, chat_repository, llm_service, vector_store)
@@ -1,9 +1,9 @@
 from .user import UserDTO, UserResponseDTO, TokenData, Token
 from .story import TagsResponseDTO, CreateStoryDTO, StorySettingsDTO
-from .enums import Tags, LocationPrompt, CharacterPrompt, Config
+from .enums import Tags, LocationPrompt, CharacterPrompt, CharacterBatch, Config
 from .chat import ChatMessage, ChatSession
 __all__ = ['UserDTO', 'UserResponseDTO', 'TokenData', 
            'Token', 'TagsResponseDTO', 'CreateStoryDTO', 
            'StorySettingsDTO', 'Tags', 'LocationPrompt', 
-           'CharacterPrompt', 'ChatMessage', 'ChatSession',
+           'CharacterPrompt', 'CharacterBatch', 'ChatMessage', 'ChatSession',
            'Config']
\ No newline at end of file
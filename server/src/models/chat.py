@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import List, Literal, Optional
+import json
+from typing import List, Literal, Optional, Union
 from pydantic import BaseModel
 from sympy import content
 
@@ -11,6 +12,7 @@ class ChatMessage(BaseModel):
     session_id: int
     role: Literal['human', 'ai']
     content: str
+    token_count: Optional[int] = None
     created_at: Optional[datetime] = None
 
     class Config:
@@ -29,6 +31,32 @@ class ChatSession(BaseModel):
     messages: List[ChatMessage] = []
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    embedded_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+class SessionSummary(BaseModel):
+    id: Optional[int] = None
+    session_id: int
+    level: int
+    content: str
+    start_message_id: int
+    end_message_id: int
+    compacted: bool = False
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ChatStreamEvent(BaseModel):
+    event: Literal['token', 'message', 'error']
+    data: Union[ChatMessage, str]
+
+    def to_sse(self) -> str:
+        """Serialize event in Server-Sent Events wire format"""
+        if isinstance(self.data, ChatMessage):
+            payload = self.data.model_dump_json()
+        else:
+            payload = json.dumps(self.data)
+        return f"event: {self.event}\ndata: {payload}\n\n"
@@ -1,10 +1,48 @@
 from enum import StrEnum
+import os
 
 class Tags(StrEnum):
     FANTASY = "Fantasy"
     ROMANCE = "Romance"
     MYSTERY = "Mystery"
 
+class StoryJobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class StoryJobStage(StrEnum):
+    SETTING = "setting"
+    LOCATIONS = "locations"
+    CHARACTERS = "characters"
+    INDEXED = "indexed"
+
+class CassetteMode(StrEnum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+class VectorQuantization(StrEnum):
+    NONE = "none"
+    INT8 = "int8"
+
+class CassetteTiming(StrEnum):
+    ORIGINAL = "original"
+    NONE = "none"
+
+class WorldPrompt:
+    SYSTEM_PROMPT = """
+Your job is to help create interesting {tag} worlds that 
+players would love to play in.
+Instructions:
+- Only generate in plain text without formatting.
+- Use simple clear language without being flowery.
+- You must stay below 3-5 sentences for each description.
+"""
+    HUMAN_PROMPT = """
+Generate a creative description for a unique {tag} world based on this prompt: {prompt}"""
+
 class LocationPrompt(StrEnum):
     FANTASY = """
 Create 3 different locations for a fantasy world.
@@ -21,7 +59,8 @@ world data: {world_data}"""
 
 class CharacterPrompt(StrEnum):
     FANTASY = """
-Create 9 different characters for a fantasy world including the protagonist, based on the world they're in.
+Create characters for a fantasy world, based on the world they're in.
+{batch_instructions}
 For each character, describe their personality, desires, major conflicts and any abilities they have, based on 
 the power systems of the world they're in.
 You may associate the character (except protagonist) with one or more locations in the world they're in.
@@ -29,12 +68,14 @@ world_data: {world_data}
 locations_data:{locations_data}
 """
     ROMANCE = """
-Create 9 different characters for a romance world including the protagonist, based on the world they're in.
+Create characters for a romance world, based on the world they're in.
+{batch_instructions}
 For each character, describe their personality, desires, major conflicts.
 For the love interests, briefly mention their dating/marriage history (if any)
 world_data: {world_data}
 """
-    MYSTERY = """Create 9 different characters for a mystery world including the protagonist and criminal.
+    MYSTERY = """Create characters for a mystery world, based on the world they're in.
+{batch_instructions}
 For each character, describe their personality, desires, major conflicts, potential motive and plausible alibi.
 You may associate the character with one or more locations in the world they're in.
 For the criminal, ensure that events leading up to discovery of the crime and the other character's alibis and 
@@ -43,6 +84,28 @@ world data: {world_data}
 locations_data:{locations_data}
 """
 
+class CharacterBatch:
+    """
+    Character generation is split into batches that run concurrently.
+    Each entry is substituted for {batch_instructions} in the tag's CharacterPrompt,
+    the first batch of every tag must produce the protagonist.
+    """
+    FANTASY = [
+        "Create exactly 1 character: the protagonist. Set is_protagonist to True.",
+        "Create exactly 4 different characters who are allies of the protagonist ex: friends/mentors/companions. Set is_protagonist to False.",
+        "Create exactly 4 different characters who are antagonists or rivals of the protagonist ex: villains/their followers. Set is_protagonist to False.",
+    ]
+    ROMANCE = [
+        "Create exactly 1 character: the protagonist. Set is_protagonist to True.",
+        "Create exactly 3 different characters who are love interests of the protagonist. Set is_protagonist to False.",
+        "Create exactly 5 different characters who are friends, family or rivals of the protagonist. Set is_protagonist to False.",
+    ]
+    MYSTERY = [
+        "Create exactly 1 character: the protagonist, who investigates the crime. Set is_protagonist to True.",
+        "Create exactly 4 different suspects, exactly one of whom is the criminal. Set is_protagonist to False.",
+        "Create exactly 4 different characters who are witnesses or allies of the protagonist. Set is_protagonist to False.",
+    ]
+
 class ChatPrompt:
     INITIAL_SYSTEM_PROMPT = """
 You are an AI Game master. Your job is to write what 
@@ -73,6 +136,9 @@ happens next in a player's adventure game.
 relevant world settings:{settings}
 relevant chat history:{chat_history}
 
+===STORY SO FAR===
+{summary}
+
 ===RECENT CHAT HISTORY===
 history: {messages}
 
@@ -83,6 +149,80 @@ history: {messages}
 4. Keep responses max 2-5 sentences.
 """
 
+class SummaryPrompt:
+    SYSTEM_PROMPT = """
+You keep the memory of a player's adventure game.
+Summarize the {material} below into a single paragraph of at most {max_words} words.
+
+Instructions:
+1. Keep names of characters, places and items, and the player's important decisions
+2. Keep unresolved threads, promises and open mysteries
+3. Drop flavour text, repeated descriptions and small talk
+4. Write in past tense, third person, without any preamble
+"""
+    TURNS = "chat turns"
+    SUMMARIES = "consecutive summaries of the story, oldest first,"
+
 class Config:
-    MEMORY_THRESHOLD = 50
-    CHAT_HISTORY_SIZE = 10
\ No newline at end of file
+    CHAT_HISTORY_SIZE = 10
+    ENTITY_INDEX_CACHE_SIZE = 256  # stories
+    RETRIEVAL_CANDIDATES = 6  # retrieved per collection, then packed by the token budget
+    HYBRID_DENSE_WEIGHT = 1.0
+    HYBRID_LEXICAL_WEIGHT = 1.0
+    HYBRID_RRF_K = 60
+    HYBRID_LEXICAL_BUDGET_MS = 25  # lexical matches are dropped past this
+    MMR_CANDIDATE_FACTOR = 3  # chat candidates fetched per result, then picked for diversity
+    MMR_DIVERSITY = 0.3  # weight of redundancy against relevance, 0 keeps the relevance order
+    # Embeddings persist next to the vector store unless EMBEDDING_CACHE_PATH says otherwise
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(os.getenv("VECTOR_STORE_URL", ""), "embedding_cache") if os.getenv("VECTOR_STORE_URL") else "")
+    EMBEDDING_CACHE_MEMORY_SIZE = 4096  # embeddings
+    EMBEDDING_CACHE_DISK_CAPACITY = 200_000  # embeddings
+    VECTOR_STORE_WRITE_BATCH_SIZE = 256  # documents per upsert
+    CHAT_COLLECTION_CACHE_SIZE = 1024  # session collections kept open
+    HOT_TIER_ENABLED = os.getenv("HOT_TIER_ENABLED", "true").lower() == "true"
+    HOT_TIER_MAX_SESSIONS = 256
+    HOT_TIER_MAX_VECTORS = 2000  # larger sessions are searched by Chroma's index
+    HOT_TIER_QUANTIZATION = os.getenv("HOT_TIER_QUANTIZATION", "none")  # none | int8
+    HOT_TIER_RERANK_FACTOR = 4  # quantized candidates re-ranked at full precision per result
+    VECTOR_STORE_WARMUP = os.getenv("VECTOR_STORE_WARMUP", "true").lower() == "true"
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))  # processes, 0 embeds in-process
+    EMBEDDING_MAX_BATCH_SIZE = 64  # texts
+    EMBEDDING_MAX_WAIT_MS = 5
+    EMBEDDING_QUEUE_SIZE = 256  # pending embedding calls
+    EMBEDDING_SUBMIT_TIMEOUT_S = 10
+    EMBEDDING_QUEUE_ENABLED = os.getenv("EMBEDDING_QUEUE_ENABLED", "true").lower() == "true"
+    EMBEDDING_QUEUE_BATCH_SIZE = 32  # messages
+    EMBEDDING_QUEUE_MAX_ATTEMPTS = 5
+    EMBEDDING_QUEUE_POLL_INTERVAL_SECONDS = 1
+    PROMPT_BUDGET_WORLD_TOKENS = 800
+    PROMPT_BUDGET_MEMORY_TOKENS = 400
+    PROMPT_BUDGET_SUMMARY_TOKENS = 600
+    PROMPT_BUDGET_HISTORY_TOKENS = 1200
+    PROMPT_BUDGET_USER_MESSAGE_TOKENS = 300
+    PROMPT_TOKEN_ESTIMATE_MARGIN = 0.1  # share of the estimate reserved for words split into more tokens than counted
+    SUMMARY_INTERVAL = 20  # summarize older turns every N messages
+    SUMMARY_FANOUT = 4  # summaries of one level merged into a summary of the level above
+    SUMMARY_MAX_LEVEL = 2
+    SUMMARY_MAX_WORDS = [120, 200, 300]  # per level
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # gemini | fake
+    LLM_MODEL = 'gemini-2.5-flash'
+    LLM_TEMPERATURE = 0.7
+    LLM_MAX_RETRIES = 2
+    LLM_MAX_IN_FLIGHT = 16
+    LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")  # off | record | replay
+    LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.db")
+    LLM_CASSETTE_TIMING = os.getenv("LLM_CASSETTE_TIMING", "original")  # original | none
+    FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+    FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+    FAKE_LLM_LATENCY_JITTER_MS = float(os.getenv("FAKE_LLM_LATENCY_JITTER_MS", "200"))
+    FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "60"))
+    FAKE_LLM_TOKENS_PER_SECOND_JITTER = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND_JITTER", "10"))
+    STORY_JOB_MAX_CONCURRENCY = 4
+    STORY_JOB_RETENTION_SECONDS = 3600
+    WORLD_POOL_ENABLED = os.getenv("WORLD_POOL_ENABLED", "false").lower() == "true"
+    WORLD_POOL_SIZE = int(os.getenv("WORLD_POOL_SIZE", "5"))
+    WORLD_POOL_TAGS = [Tags.FANTASY, Tags.ROMANCE, Tags.MYSTERY]
+    WORLD_POOL_REFILL_INTERVAL_SECONDS = 60
+    WORLD_POOL_OFF_PEAK_MAX_IN_FLIGHT = 2
+    WORLD_POOL_PROMPT = "Surprise me with an original setting"
+    GENERIC_PROMPTS = ["", "any", "anything", "random", "surprise me", "something", "whatever", "you choose", "idk", "none"]
\ No newline at end of file
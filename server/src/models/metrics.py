@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+class LLMPoolStats(BaseModel):
+    clients: int
+    max_in_flight: int
+    in_flight: int
+    queue_depth: int
+    total_calls: int
+    client_creations: int
+    reuse_ratio: float
+
+class WorldPoolStats(BaseModel):
+    enabled: bool
+    target_size: int
+    stock: Dict[str, int]
+    hits: int
+    misses: int
+    hit_rate: float
+    generated: int
+    refill_errors: int
+    last_error: Optional[str] = None
+
+class EmbeddingCacheStats(BaseModel):
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    hit_rate: float
+    memory_entries: int
+    memory_size: int
+    disk_entries: int
+    disk_capacity: int
+
+class EmbeddingQueueStats(BaseModel):
+    enabled: bool
+    pending: int
+    dead: int
+    embedded: int
+    failed: int
+    drain_errors: int
+    last_error: Optional[str] = None
+
+class LexicalIndexStats(BaseModel):
+    searches: int
+    budget_overruns: int
+    overrun_rate: float
+    open_partitions: int
@@ -1,10 +1,14 @@
+from datetime import datetime
+from functools import cache
 import json
-from typing import Any, List, Optional, Set, Tuple, Type, Union, cast
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union, cast
 
 from pydantic import BaseModel, Field, create_model
 
 from server.db.models import WorldDB
-from server.src.models.enums import CharacterPrompt, LocationPrompt, Tags
+from server.src.exceptions import LLMResponseException
+from server.src.models.enums import CharacterBatch, CharacterPrompt, LocationPrompt, StoryJobStage, StoryJobStatus, Tags
 
 
 class TagDTO(BaseModel):
@@ -116,9 +120,20 @@ class StorySettingsDTO(BaseModel):
     tag_id: int
     world : WorldDTO
 
+class StoryJobDTO(BaseModel):
+    id: str
+    user_id: int
+    status: StoryJobStatus
+    completed_stages: List[StoryJobStage] = []
+    story_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+@cache
 def get_target_character_schema(tag: str) -> Tuple[str, Type[CharactersDTO]]:
     """
-    Generates a specific Pydantic Model at runtime
+    Generates a specific Pydantic Model at runtime, once per tag
     """
     match tag:
         case Tags.FANTASY:
@@ -141,9 +156,56 @@ def get_target_character_schema(tag: str) -> Tuple[str, Type[CharactersDTO]]:
 
     return (prompt, cast(Type[CharactersDTO], model))
 
+def get_character_batches(tag: str) -> List[str]:
+    """
+    Returns the batch instructions used to generate a tag's characters concurrently.
+    The first batch always generates the protagonist.
+    """
+    match tag:
+        case Tags.FANTASY:
+            return CharacterBatch.FANTASY
+        case Tags.MYSTERY:
+            return CharacterBatch.MYSTERY
+        case Tags.ROMANCE:
+            return CharacterBatch.ROMANCE
+        case _:
+            return CharacterBatch.FANTASY
+
+def merge_character_batches(batches: List[CharactersDTO]) -> CharactersDTO:
+    """
+    Merges concurrently generated character batches into a single cast.
+
+    Batches are generated without seeing each other, so the merged cast is made consistent:
+    names are de-duplicated (first occurrence wins) and exactly one protagonist is kept,
+    taken from the first batch.
+
+    Raises:
+        LLMResponseException: If the protagonist batch produced no characters
+    """
+    if not batches or not batches[0].characters:
+        raise LLMResponseException("Could not generate protagonist!")
+
+    protagonist_batch = batches[0].characters
+    protagonist = next((character for character in protagonist_batch if character.is_protagonist), protagonist_batch[0])
+    protagonist.is_protagonist = True
+
+    merged: List[Characters] = [protagonist]
+    seen_names: Set[str] = {protagonist.name.strip().lower()}
+    for batch in batches:
+        for character in batch.characters:
+            name = character.name.strip().lower()
+            if character is protagonist or name in seen_names:
+                continue
+            character.is_protagonist = False
+            seen_names.add(name)
+            merged.append(character)
+
+    return type(batches[0])(characters=merged)
+
+@cache
 def get_target_location_schema(tag: str) -> Optional[Tuple[str, Type[LocationsDTO]]]:
     """
-    Generates a specific Pydantic Model at runtime
+    Generates a specific Pydantic Model at runtime, once per tag
     """
     match tag:
         case Tags.FANTASY:
@@ -193,31 +255,119 @@ def convert_world_db_to_world_dto(world: WorldDB, target_schema: Type[WorldSetti
     properties['id'] = world.id
     return target_schema.model_validate(properties)
 
-def process_story(story: StorySettingsDTO) -> dict[str, Any]:
-    world = story.world
+_ALIAS_STOPWORDS = {"the", "of", "and", "lady", "lord", "sir", "dame", "mr", "mrs", "miss", "dr", "old", "young"}
+
+def _entity_aliases(name: str, is_character: bool) -> Set[str]:
+    """Lowercase names an entity may be referred to by: its full name, without a leading article,
+    and for characters their first and last name"""
+    full_name = re.sub(r"\s+", " ", name.strip().lower())
+    aliases = {full_name, re.sub(r"^(the|a|an) ", "", full_name)}
+    if is_character:
+        aliases.update(part for part in re.split(r"[\s,]+", full_name) if len(part) > 2 and part not in _ALIAS_STOPWORDS)
+    return {alias for alias in aliases if alias}
+
+def setting_document(setting: WorldSettingDTO) -> str:
+    """World setting without its power systems, which are documents of their own"""
+    return f"World: {setting.model_dump_json(exclude={'power_systems'})}"
 
-    # Extract world settings
-    world_info: WorldSettingDTO = world.setting
+def power_system_document(power_system: PowerSystem) -> str:
+    return f"Power system: {power_system.model_dump_json()}"
 
-    # Extract locations
-    locations: List[Locations] = []
+def character_document(character: Characters) -> str:
+    return f"{'Protagonist' if character.is_protagonist else 'Character'}: {character.model_dump_json()}"
+
+def location_document(location: Locations) -> str:
+    return f"Location: {location.model_dump_json()}"
+
+def chunk_story_settings(world: WorldDTO) -> List[Tuple[str, str, str]]:
+    """
+    Split a world into one chunk per setting section, power system, location and character,
+    so that retrieval returns only the relevant pieces.
+
+    Returns:
+        List[Tuple[str, str, str]]: (type, name, document) of every chunk
+    """
+    chunks: List[Tuple[str, str, str]] = [('setting', world.setting.name, setting_document(world.setting))]
+    for power_system in getattr(world.setting, 'power_systems', []):
+        chunks.append(('power_system', power_system.name, power_system_document(power_system)))
     if world.locations:
-        locations = world.locations.locations
+        chunks.extend(('location', location.name, location_document(location)) for location in world.locations.locations)
+    chunks.extend(('protagonist' if character.is_protagonist else 'character', character.name, character_document(character))
+                  for character in world.characters.characters)
+    return chunks
 
-    # Extract characters
-    characters: List[Characters]  = world.characters.characters
+class EntityIndex:
+    """
+    Index of a story's characters and locations by name and alias.
+
+    Used to build the world context of a turn from only the entities the turn mentions
+    instead of the whole world.
+    """
+    def __init__(self, world: WorldDTO) -> None:
+        self.setting: WorldSettingDTO = world.setting
+        characters: List[Characters] = world.characters.characters
+        self.protagonist: Characters = next((character for character in characters if character.is_protagonist), characters[0])
+        self.characters: List[Characters] = [character for character in characters if character is not self.protagonist]
+        self.locations: List[Locations] = world.locations.locations if world.locations else []
+
+        self._aliases: Dict[str, List[Union[Characters, Locations]]] = {}
+        for character in self.characters:
+            for alias in _entity_aliases(character.name, is_character=True):
+                self._aliases.setdefault(alias, []).append(character)
+        for location in self.locations:
+            for alias in _entity_aliases(location.name, is_character=False):
+                self._aliases.setdefault(alias, []).append(location)
+        # Longest aliases first so that "Silver Harbor" wins over "Silver"
+        alternatives = "|".join(re.escape(alias) for alias in sorted(self._aliases, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE) if alternatives else None
+
+    def match(self, texts: List[str]) -> Tuple[List[Characters], List[Locations]]:
+        """
+        Characters and locations mentioned in texts.
+
+        Args:
+            texts: Texts to scan, most relevant (latest) first. Entities are returned in
+                   the order they are first found.
+        """
+        characters: List[Characters] = []
+        locations: List[Locations] = []
+        if self._pattern is None:
+            return (characters, locations)
+        for text in texts:
+            for mention in self._pattern.finditer(text):
+                for entity in self._aliases[mention.group(0).lower()]:
+                    if isinstance(entity, CharacterDTO):
+                        if not any(entity is character for character in characters):
+                            characters.append(entity)
+                    elif not any(entity is location for location in locations):
+                        locations.append(entity)
+        return (characters, locations)
+
+    def world_documents(self, texts: List[str]) -> List[str]:
+        """World context documents for a turn: the setting, the protagonist, then the entities texts mention"""
+        characters, locations = self.match(texts)
+        return [
+            setting_document(self.setting),
+            character_document(self.protagonist),
+            *(character_document(character) for character in characters),
+            *(location_document(location) for location in locations)
+        ]
+
+def process_story(story: StorySettingsDTO) -> dict[str, Any]:
+    """
+    Inputs of the introduction prompt. Only the characters and locations related to the
+    protagonist or the world description are included, falling back to the first
+    location so that the intro has a place to start in.
+    """
+    index = EntityIndex(story.world)
+    protagonist: Characters = index.protagonist
+    characters, locations = index.match([protagonist.model_dump_json(), index.setting.model_dump_json()])
+    if not locations and index.locations:
+        locations = index.locations[:1]
 
-    # Extract protagonist
-    protagonist: Characters = [character for character in characters if character.is_protagonist][0]
-    # Remove protagonist from character list
-    characters = [character for character in characters if not character.is_protagonist]
-    
     return {
-        "world_info": world_info,
+        "world_info": index.setting,
         "locations": locations,
         "characters": characters,
         "protagonist": protagonist
     }
-
-
-
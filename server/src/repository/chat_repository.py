@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from server.db.models import ChatMessageDB
-from server.src.models.chat import ChatMessage, ChatSession
+from server.db.models import ChatMessageDB, SessionSummaryDB
+from server.src.models.chat import ChatMessage, ChatSession, SessionSummary
 
 
 class IChatRespository(ABC):
@@ -14,6 +14,10 @@ class IChatRespository(ABC):
     def get_session(self, session_id: int) -> Optional[ChatSession]:
         pass
 
+    @abstractmethod
+    def delete_session(self, session_id: int) -> bool:
+        pass
+
     @abstractmethod
     def save_message(self, message: ChatMessageDB) -> Optional[ChatMessage]:
         pass 
@@ -28,4 +32,40 @@ class IChatRespository(ABC):
     
     @abstractmethod
     def update_has_started_for_chat_session(self, session_id: int):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def save_token_counts(self, token_counts: Dict[int, int]) -> None:
+        pass
+
+    @abstractmethod
+    def get_messages_after(self, session_id: int, after_id: int, limit: Optional[int] = None) -> List[ChatMessage]:
+        pass
+
+    @abstractmethod
+    def save_summary(self, summary: SessionSummaryDB, compacted_ids: List[int]) -> SessionSummary:
+        pass
+
+    @abstractmethod
+    def get_summaries(self, session_id: int, include_compacted: bool = False) -> List[SessionSummary]:
+        pass
+
+    @abstractmethod
+    def get_summary_watermark(self, session_id: int) -> int:
+        pass
+
+    @abstractmethod
+    def get_pending_embeddings(self, limit: int, max_attempts: int) -> List[ChatMessage]:
+        pass
+
+    @abstractmethod
+    def complete_embeddings(self, message_ids: List[int]) -> None:
+        pass
+
+    @abstractmethod
+    def fail_embeddings(self, message_ids: List[int], error: str) -> None:
+        pass
+
+    @abstractmethod
+    def count_pending_embeddings(self, max_attempts: int) -> Tuple[int, int]:
+        pass
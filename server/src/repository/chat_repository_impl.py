@@ -1,12 +1,12 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, insert, select, update
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
-from server.db.models import ChatMessageDB, ChatSessionDB
+from server.db.models import ChatMessageDB, ChatSessionDB, EmbeddingQueueDB, SessionSummaryDB
 from server.src.exceptions import DatabaseError
-from server.src.models.chat import ChatMessage, ChatSession
+from server.src.models.chat import ChatMessage, ChatSession, SessionSummary
 from server.src.repository.chat_repository import IChatRespository
 
 
@@ -43,6 +43,19 @@ class ChatRepository(IChatRespository):
             return ChatSession.model_validate(session)
         return None
     
+    def delete_session(self, session_id: int) -> bool:
+        """Delete a session with its messages, summaries and pending embeddings. Returns False if it does not exist"""
+        try:
+            self.session.execute(delete(EmbeddingQueueDB).where(EmbeddingQueueDB.session_id == session_id))
+            self.session.execute(delete(SessionSummaryDB).where(SessionSummaryDB.session_id == session_id))
+            self.session.execute(delete(ChatMessageDB).where(ChatMessageDB.session_id == session_id))
+            deleted = self.session.execute(delete(ChatSessionDB).where(ChatSessionDB.id == session_id)).rowcount
+            self.session.commit()
+            return deleted > 0
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Failed to delete session: {str(e)}") from e
+
     def save_message(self, message: ChatMessageDB) -> Optional[ChatMessage]:
         try:
             stmt = insert(ChatMessageDB).values(
@@ -50,7 +63,8 @@ class ChatRepository(IChatRespository):
             user_id=message.user_id,
             session_id=message.session_id,
             role=message.role,
-            content=message.content
+            content=message.content,
+            token_count=message.token_count
             ).returning(
                 ChatMessageDB
             )
@@ -60,6 +74,8 @@ class ChatRepository(IChatRespository):
                 self.session.rollback()
                 raise DatabaseError("Could not insert session!")
             msg = ChatMessage.model_validate(saved_message[0])
+            # Queued for embedding in the same transaction, so no message is ever left out of the vector store
+            self.session.execute(insert(EmbeddingQueueDB).values(message_id=msg.id, session_id=msg.session_id, attempts=0))
             self.session.commit()
             return msg
         except IntegrityError as e:
@@ -90,4 +106,124 @@ class ChatRepository(IChatRespository):
             updated_at=datetime.now(timezone.utc)
             )
         self.session.execute(stmt)
-        self.session.commit()
\ No newline at end of file
+        self.session.commit()
+
+    def save_token_counts(self, token_counts: Dict[int, int]) -> None:
+        """Cache token counts of messages saved before they were counted on insert"""
+        if not token_counts:
+            return
+        try:
+            for message_id, token_count in token_counts.items():
+                self.session.execute(update(ChatMessageDB).where(ChatMessageDB.id == message_id).values(token_count=token_count))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Failed to save token counts: {str(e)}") from e
+
+    def get_messages_after(self, session_id: int, after_id: int, limit: Optional[int] = None) -> List[ChatMessage]:
+        """Messages of a session with an id greater than after_id, oldest first"""
+        try:
+            stmt = select(ChatMessageDB).where(ChatMessageDB.session_id == session_id, ChatMessageDB.id > after_id).order_by(ChatMessageDB.id).limit(limit)
+            return [ChatMessage.model_validate(message) for message in self.session.execute(stmt).scalars().all()]
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to retrieve messages: {str(e)}") from e
+
+    def save_summary(self, summary: SessionSummaryDB, compacted_ids: List[int]) -> SessionSummary:
+        """Insert a summary and mark the summaries it replaces as compacted, in one transaction"""
+        try:
+            stmt = insert(SessionSummaryDB).values(
+                session_id=summary.session_id,
+                level=summary.level,
+                content=summary.content,
+                start_message_id=summary.start_message_id,
+                end_message_id=summary.end_message_id,
+                compacted=False
+            ).returning(
+                SessionSummaryDB
+            )
+            saved_summary = self.session.execute(stmt).first()
+            if not saved_summary:
+                self.session.rollback()
+                raise DatabaseError("Could not insert summary!")
+            result = SessionSummary.model_validate(saved_summary[0])
+            if compacted_ids:
+                self.session.execute(update(SessionSummaryDB).where(SessionSummaryDB.id.in_(compacted_ids)).values(compacted=True))
+            self.session.commit()
+            return result
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Failed to insert summary: {str(e)}") from e
+
+    def get_summaries(self, session_id: int, include_compacted: bool = False) -> List[SessionSummary]:
+        """Summaries of a session in story order"""
+        try:
+            stmt = select(SessionSummaryDB).where(SessionSummaryDB.session_id == session_id)
+            if not include_compacted:
+                stmt = stmt.where(SessionSummaryDB.compacted.is_(False))
+            stmt = stmt.order_by(SessionSummaryDB.start_message_id, SessionSummaryDB.level.desc())
+            return [SessionSummary.model_validate(summary) for summary in self.session.execute(stmt).scalars().all()]
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to retrieve summaries: {str(e)}") from e
+
+    def get_summary_watermark(self, session_id: int) -> int:
+        """Id of the last message covered by a summary, 0 if none are"""
+        try:
+            stmt = select(func.max(SessionSummaryDB.end_message_id)).where(SessionSummaryDB.session_id == session_id)
+            return self.session.execute(stmt).scalar() or 0
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to retrieve summary watermark: {str(e)}") from e
+
+    def get_pending_embeddings(self, limit: int, max_attempts: int) -> List[ChatMessage]:
+        """Oldest queued messages, skipping the ones that failed max_attempts times"""
+        try:
+            stmt = (select(ChatMessageDB).join(EmbeddingQueueDB, EmbeddingQueueDB.message_id == ChatMessageDB.id)
+                    .where(EmbeddingQueueDB.attempts < max_attempts).order_by(EmbeddingQueueDB.message_id).limit(limit))
+            return [ChatMessage.model_validate(message) for message in self.session.execute(stmt).scalars().all()]
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to retrieve embedding queue: {str(e)}") from e
+
+    def complete_embeddings(self, message_ids: List[int]) -> None:
+        """Remove embedded messages from the queue and advance the embedded_at watermark of their sessions"""
+        if not message_ids:
+            return
+        try:
+            session_ids = self.session.execute(select(EmbeddingQueueDB.session_id).where(EmbeddingQueueDB.message_id.in_(message_ids)).distinct()).scalars().all()
+            self.session.execute(delete(EmbeddingQueueDB).where(EmbeddingQueueDB.message_id.in_(message_ids)))
+            for session_id in session_ids:
+                # Every message before the oldest one still queued is embedded. The watermark also stays
+                # below the creation time of every queued message, should clocks of writers disagree
+                oldest_pending, earliest_pending = self.session.execute(
+                    select(func.min(EmbeddingQueueDB.message_id), func.min(ChatMessageDB.created_at))
+                    .join(ChatMessageDB, ChatMessageDB.id == EmbeddingQueueDB.message_id).where(EmbeddingQueueDB.session_id == session_id)).one()
+                stmt = select(func.max(ChatMessageDB.created_at)).where(ChatMessageDB.session_id == session_id)
+                if oldest_pending is not None:
+                    stmt = stmt.where(ChatMessageDB.id < oldest_pending, ChatMessageDB.created_at < earliest_pending)
+                embedded_at = self.session.execute(stmt).scalar()
+                if embedded_at is not None:
+                    self.session.execute(update(ChatSessionDB).where(ChatSessionDB.id == session_id).values(embedded_at=embedded_at))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Failed to complete embeddings: {str(e)}") from e
+
+    def fail_embeddings(self, message_ids: List[int], error: str) -> None:
+        """Count a failed attempt on queued messages, leaving them queued for a retry"""
+        if not message_ids:
+            return
+        try:
+            self.session.execute(update(EmbeddingQueueDB).where(EmbeddingQueueDB.message_id.in_(message_ids))
+                                 .values(attempts=EmbeddingQueueDB.attempts + 1, last_error=error))
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Failed to record embedding failures: {str(e)}") from e
+
+    def count_pending_embeddings(self, max_attempts: int) -> Tuple[int, int]:
+        """Number of queued messages still to embed, and of those given up after max_attempts"""
+        try:
+            stmt = select(func.count()).select_from(EmbeddingQueueDB)
+            pending = self.session.execute(stmt.where(EmbeddingQueueDB.attempts < max_attempts)).scalar() or 0
+            dead = self.session.execute(stmt.where(EmbeddingQueueDB.attempts >= max_attempts)).scalar() or 0
+            return pending, dead
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to count embedding queue: {str(e)}") from e
@@ -20,4 +20,12 @@ class IStoryRepository(ABC):
 
     @abstractmethod
     def get_story(self, story_id: int) -> Optional[StorySettingsDTO]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def save_intro(self, story_id: int, intro: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_intro(self, story_id: int) -> Optional[str]:
+        pass
@@ -2,7 +2,7 @@ from typing import Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from server.src.exceptions import DatabaseError
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
 import json 
 
 from server.db.models import TagsDB, UserStoryDB, WorldDB
@@ -97,4 +97,20 @@ class StoryRepository(IStoryRepository):
                 return StorySettingsDTO.model_validate(story_dict)
             return None 
         except SQLAlchemyError as e:
-            raise DatabaseError(f"Failed to retrieve user by id {id}: {str(e)}") from e
\ No newline at end of file
+            raise DatabaseError(f"Failed to retrieve user by id {id}: {str(e)}") from e
+
+    def save_intro(self, story_id: int, intro: str) -> None:
+        try:
+            stmt = update(UserStoryDB).where(UserStoryDB.id == story_id).values(intro=intro)
+            self.session.execute(stmt)
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Could not save intro for story {story_id}: {str(e)}") from e
+
+    def get_intro(self, story_id: int) -> Optional[str]:
+        try:
+            stmt = select(UserStoryDB.intro).where(UserStoryDB.id == story_id)
+            return self.session.execute(stmt).scalar()
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Failed to retrieve intro for story {story_id}: {str(e)}") from e
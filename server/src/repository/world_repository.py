@@ -9,4 +9,14 @@ class IWorldRepository(ABC):
     def create_world(self, world: WorldDB) -> Optional[WorldDB]:
         pass
 
-    
\ No newline at end of file
+    @abstractmethod
+    def add_pooled_world(self, tag_id: int, world: str) -> None:
+        pass
+
+    @abstractmethod
+    def claim_pooled_world(self, tag_id: int) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def count_pooled_worlds(self, tag_id: int) -> int:
+        pass
@@ -1,9 +1,9 @@
 from typing import Optional
-from sqlalchemy import insert
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from server.src.exceptions import DatabaseError
-from server.db.models import WorldDB
+from server.db.models import PooledWorldDB, WorldDB
 from .world_repository import IWorldRepository
 
 
@@ -29,4 +29,43 @@ class WorldRepository(IWorldRepository):
         except SQLAlchemyError as e:
             raise DatabaseError(f"Failed to retrieve user by id {id}: {str(e)}") from e
 
-    
\ No newline at end of file
+    def add_pooled_world(self, tag_id: int, world: str) -> None:
+        try:
+            stmt = insert(PooledWorldDB).values(
+                tag_id=tag_id,
+                world=world
+            )
+            self.session.execute(stmt)
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Could not add world to pool: {str(e)}") from e
+
+    def claim_pooled_world(self, tag_id: int) -> Optional[str]:
+        """Removes the oldest pooled world for tag_id and returns it"""
+        try:
+            oldest = select(PooledWorldDB.id).where(
+                PooledWorldDB.tag_id == tag_id
+            ).order_by(
+                PooledWorldDB.id
+            ).limit(1).scalar_subquery()
+            stmt = delete(PooledWorldDB).where(
+                PooledWorldDB.id == oldest
+            ).returning(
+                PooledWorldDB.world
+            )
+            claimed = self.session.execute(stmt).first()
+            self.session.commit()
+            if claimed:
+                return claimed[0]
+            return None
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            raise DatabaseError(f"Could not claim world from pool: {str(e)}") from e
+
+    def count_pooled_worlds(self, tag_id: int) -> int:
+        stmt = select(func.count()).select_from(PooledWorldDB).where(PooledWorldDB.tag_id == tag_id)
+        count = self.session.execute(stmt).scalar()
+        if count:
+            return count
+        return 0
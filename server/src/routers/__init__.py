@@ -1,4 +1,5 @@
 from .user_router import user_router
 from .story_router import story_router
 from .chat_router import chat_router
-__all__ = ['user_router', 'story_router', 'chat_router']
\ No newline at end of file
+from .metrics_router import metrics_router
+__all__ = ['user_router', 'story_router', 'chat_router', 'metrics_router']
\ No newline at end of file
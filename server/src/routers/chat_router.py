@@ -1,4 +1,5 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, status, HTTPException
+from fastapi.responses import StreamingResponse
 
 from server.src.dependencies import get_chat_service, get_current_user
 from server.src.models.chat import ChatMessage, ChatSession
@@ -46,4 +47,48 @@ async def send_message(session_id: int, user_msg: ChatMessage, backgroundTasks:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={str(e)}
-        ) 
\ No newline at end of file
+        )
+
+@chat_router.post("/{session_id}/stream_message", summary="Send message to LLM and stream the response as Server-Sent Events", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def stream_message(session_id: int, user_msg: ChatMessage, backgroundTasks: BackgroundTasks, user: UserResponseDTO = Depends(get_current_user), chat_service: ChatService = Depends(get_chat_service)):
+    try:
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid user or password"
+            )
+        if user.id and user.id == user_msg.user_id:
+            events = chat_service.stream_message(user_msg, backgroundTasks)
+            return StreamingResponse(
+                (event.to_sse() async for event in events),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        else:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={str(e)}
+        )
+
+
+@chat_router.delete("/{session_id}", summary="Delete chat session and its memory", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_chat(session_id: int, user: UserResponseDTO = Depends(get_current_user), chat_service: ChatService = Depends(get_chat_service)):
+    try:
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid user or password"
+            )
+        if not user.id or not await chat_service.delete_session(session_id, user.id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found!")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={str(e)}
+        )
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from server.db.embedding_cache import get_embedding_cache
+from server.db.vector_store import VectorStore
+from server.src.dependencies import get_current_user, get_embedding_queue, get_llm_pool, get_vector_db, get_world_pool
+from server.src.models.metrics import EmbeddingCacheStats, EmbeddingQueueStats, LexicalIndexStats, LLMPoolStats, WorldPoolStats
+from server.src.models.user import UserResponseDTO
+from server.src.service.embedding_queue_service import EmbeddingQueueWorker
+from server.src.service.llm_client_pool import LLMClientPool
+from server.src.service.world_pool_service import WorldPool
+
+
+metrics_router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@metrics_router.get("/llm_pool", summary="Get LLM client pool statistics", response_model=LLMPoolStats)
+async def get_llm_pool_stats(pool: LLMClientPool = Depends(get_llm_pool), user: UserResponseDTO = Depends(get_current_user)):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user or password")
+    return pool.stats()
+
+@metrics_router.get("/world_pool", summary="Get pre-generated world pool stock and hit rate", response_model=WorldPoolStats)
+async def get_world_pool_stats(world_pool: WorldPool = Depends(get_world_pool), user: UserResponseDTO = Depends(get_current_user)):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user or password")
+    return world_pool.stats()
+
+@metrics_router.get("/embedding_cache", summary="Get embedding cache statistics", response_model=EmbeddingCacheStats)
+async def get_embedding_cache_stats(user: UserResponseDTO = Depends(get_current_user)):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user or password")
+    return get_embedding_cache().stats()
+
+@metrics_router.get("/embedding_queue", summary="Get chat messages waiting to be embedded", response_model=EmbeddingQueueStats)
+async def get_embedding_queue_stats(embedding_queue: EmbeddingQueueWorker = Depends(get_embedding_queue), user: UserResponseDTO = Depends(get_current_user)):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user or password")
+    return embedding_queue.stats()
+
+@metrics_router.get("/lexical_index", summary="Get lexical chat search statistics, with searches dropped past their latency budget", response_model=LexicalIndexStats)
+async def get_lexical_index_stats(vector_store: VectorStore = Depends(get_vector_db), user: UserResponseDTO = Depends(get_current_user)):
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user or password")
+    return vector_store.lexical_index.stats()
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 
-from server.src.dependencies import get_current_user, get_story_service
-from server.src.models.story import CreateStoryDTO, StorySettingsDTO, TagsResponseDTO
+from server.src.dependencies import get_current_user, get_story_job_manager, get_story_service
+from server.src.models.enums import StoryJobStatus
+from server.src.models.story import CreateStoryDTO, StoryJobDTO, StorySettingsDTO, TagsResponseDTO
+from server.src.service.story_job_service import StoryJobManager
 
 
 story_router = APIRouter(prefix="/story", tags=["story"])
@@ -23,18 +25,66 @@ async def get_tags(story_service = Depends(get_story_service)):
         )
     
 @story_router.post(path="/create", summary="Start a new story", response_model=StorySettingsDTO)
-async def create_story_settings(create_story: CreateStoryDTO, user = Depends(get_current_user), story_service = Depends(get_story_service)):
+async def create_story_settings(create_story: CreateStoryDTO, background_tasks: BackgroundTasks, user = Depends(get_current_user), story_service = Depends(get_story_service)):
     try:
         if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid user or password"
                 )
-        return await story_service.create_story(create_story, user.id)
+        story = await story_service.create_story(create_story, user.id)
+        background_tasks.add_task(story_service.prefetch_intro, story)
+        return story
     except HTTPException as e:
          raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={str(e)}
-        )
\ No newline at end of file
+        )
+
+@story_router.post(path="/jobs", summary="Start creating a new story in the background", response_model=StoryJobDTO, status_code=status.HTTP_202_ACCEPTED)
+async def create_story_job(create_story: CreateStoryDTO, user = Depends(get_current_user), job_manager: StoryJobManager = Depends(get_story_job_manager)):
+    try:
+        if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid user or password"
+                )
+        return job_manager.submit(create_story, user.id)
+    except HTTPException as e:
+         raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={str(e)}
+        )
+
+@story_router.get(path="/jobs/{job_id}", summary="Get status and completed stages of a story creation job", response_model=StoryJobDTO)
+async def get_story_job(job_id: str, user = Depends(get_current_user), job_manager: StoryJobManager = Depends(get_story_job_manager)):
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user or password"
+        )
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@story_router.get(path="/jobs/{job_id}/result", summary="Get the story created by a finished job", response_model=StorySettingsDTO)
+async def get_story_job_result(job_id: str, user = Depends(get_current_user), job_manager: StoryJobManager = Depends(get_story_job_manager)):
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid user or password"
+        )
+    job = job_manager.get_job(job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status == StoryJobStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=job.error)
+    story = job_manager.get_result(job_id)
+    if job.status != StoryJobStatus.SUCCEEDED or story is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+    return story
@@ -2,4 +2,5 @@ from .user_service import UserService
 from .story_service import StoryService
 from .llm_service import LLMService
 from .chat_service import ChatService
-__all__ = ['UserService', 'StoryService', 'LLMService', 'ChatService']
\ No newline at end of file
+from .story_job_service import StoryJobManager
+__all__ = ['UserService', 'StoryService', 'LLMService', 'ChatService', 'StoryJobManager']
\ No newline at end of file
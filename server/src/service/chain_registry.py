@@ -0,0 +1,189 @@
+from typing import Any, Dict, Optional, Type
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig, RunnablePassthrough, RunnableBranch, RunnableLambda, RunnableParallel
+
+from server.src.models.enums import ChatPrompt, StoryJobStage, SummaryPrompt, Tags, WorldPrompt
+from server.src.models.story import WorldSettingDTO, get_character_batches, get_target_character_schema, get_target_location_schema, get_target_world_schema, merge_character_batches
+from server.src.service.llm_client_pool import LLMClientPool
+
+
+def _resolve_tag(tag: str) -> Tags:
+    """Map a tag name onto a known tag, falling back to fantasy like the schema lookups do"""
+    try:
+        return Tags(tag)
+    except ValueError:
+        return Tags.FANTASY
+
+def _report_stage(stage: StoryJobStage) -> Runnable:
+    """
+    Pass-through step notifying the `on_progress` callback, if one was supplied in the
+    invocation's configurable, that a stage of the world pipeline has completed
+    """
+    def report(input: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        on_progress = config.get('configurable', {}).get('on_progress')
+        if on_progress:
+            on_progress(stage)
+        return input
+    return RunnableLambda(report)
+
+class ChainRegistry:
+    """
+    Registry of prebuilt LLM chains, built once at startup and reused by every request.
+
+    Prompt templates, structured output wrappers and the world generation pipeline for
+    each tag only depend on the tag, so they are compiled once instead of per request.
+    Request specific values (tag, prompt, user message...) are passed as chain inputs.
+    """
+    def __init__(self, pool: LLMClientPool) -> None:
+        self._pool = pool
+        self._world_pipelines: Dict[Tags, Runnable] = {}
+        self._intro_chain: Optional[Runnable] = None
+        self._chat_chain: Optional[Runnable] = None
+        self._chat_stream_chain: Optional[Runnable] = None
+        self._summary_chain: Optional[Runnable] = None
+
+    def build(self) -> None:
+        """Build the chains for every tag"""
+        for tag in Tags:
+            self.world_pipeline(tag)
+        self.intro_chain()
+        self.chat_chain()
+        self.chat_stream_chain()
+        self.summary_chain()
+
+    def world_pipeline(self, tag: str) -> Runnable:
+        """Pipeline generating world settings, locations and characters for tag"""
+        resolved_tag = _resolve_tag(tag)
+        if resolved_tag not in self._world_pipelines:
+            self._world_pipelines[resolved_tag] = self._build_world_pipeline(resolved_tag)
+        return self._world_pipelines[resolved_tag]
+
+    def intro_chain(self) -> Runnable:
+        """Chain generating the introduction message of a chat session"""
+        if self._intro_chain is None:
+            initial_prompt = ChatPromptTemplate.from_messages([
+                ("system", ChatPrompt.INITIAL_SYSTEM_PROMPT),
+                ("human",  "Generate introduction")
+            ])
+            self._intro_chain = initial_prompt | self._pool.bounded(self._pool.get_model())
+        return self._intro_chain
+
+    def chat_chain(self) -> Runnable:
+        """Chain generating the game master's reply to a player message"""
+        if self._chat_chain is None:
+            self._chat_chain = self._chat_prompt() | self._pool.bounded(self._pool.get_model())
+        return self._chat_chain
+
+    def chat_stream_chain(self) -> Runnable:
+        """Same as `chat_chain`, without the slot wrapper so that it can be streamed"""
+        if self._chat_stream_chain is None:
+            self._chat_stream_chain = self._chat_prompt() | self._pool.get_model()
+        return self._chat_stream_chain
+
+    def summary_chain(self) -> Runnable:
+        """Chain compacting chat turns or summaries into a session summary"""
+        if self._summary_chain is None:
+            summary_prompt = ChatPromptTemplate.from_messages([
+                ("system", SummaryPrompt.SYSTEM_PROMPT),
+                ("human", "{content}")
+            ])
+            self._summary_chain = summary_prompt | self._pool.bounded(self._pool.get_model())
+        return self._summary_chain
+
+    def _chat_prompt(self) -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
+            ("system", ChatPrompt.SYSTEM_PROMPT),
+            ("human",  "{user_msg}")
+        ])
+
+    def _build_world_pipeline(self, tag: str) -> Runnable:
+        model = self._pool.get_model()
+
+        # Get the target world setting schema
+        target_schema: Type[WorldSettingDTO] = get_target_world_schema(tag)
+
+        #Define output schema
+        world_llm = self._pool.bounded(model.with_structured_output(target_schema))
+
+        # Define intial prompt
+        initial_prompt = ChatPromptTemplate.from_messages([
+            ("system", WorldPrompt.SYSTEM_PROMPT),
+            ("human", WorldPrompt.HUMAN_PROMPT)
+        ])
+
+        # Define chain to generate world setting data
+        world_chain = initial_prompt | world_llm
+
+        # Get target location schema and prompt
+        output = get_target_location_schema(tag)
+        location_chain = None
+        if output:
+            # if locations should be generated
+            (location_prompt_template, target_location_schema) = output
+
+            # Define output schema
+            location_llm = self._pool.bounded(model.with_structured_output(target_location_schema))
+
+            # Define location prompt
+            location_prompt = ChatPromptTemplate.from_messages([
+                ('human', location_prompt_template)
+            ])
+
+            # Define chain to generate locations using world setting data
+            location_chain = location_prompt | location_llm
+
+        # Get target character schema and prompt
+        (character_prompt_template, target_character_schema) = get_target_character_schema(tag)
+
+        # Define output schema
+        character_llm = self._pool.bounded(model.with_structured_output(target_character_schema))
+
+        # Define character prompt
+        character_prompt = ChatPromptTemplate.from_messages([
+            ('human', character_prompt_template)
+        ])
+
+        # Define one chain per character batch, all sharing the world settings and locations.
+        # Batches run concurrently and are merged into a single consistent cast
+        character_batch_chains = {
+            f'batch_{i}': character_prompt.partial(batch_instructions=batch_instructions) | character_llm
+            for i, batch_instructions in enumerate(get_character_batches(tag))
+        }
+        character_chain = RunnableParallel(character_batch_chains) | RunnableLambda(
+            lambda batches: merge_character_batches([batches[key] for key in character_batch_chains])
+        )
+
+        # Generate world setting data
+        # This also makes world setting data available as input variable
+        world_data_chain = RunnablePassthrough.assign(
+            world_data=world_chain
+        )
+
+        async def generate_locations_if_applicable(input: dict):
+            if location_chain:
+                locations_data = await location_chain.ainvoke(input)
+                input['locations_data'] = locations_data
+                return input
+            return input
+
+        # Chain to optionally generate locations
+        optional_location_data_chain = RunnableBranch(
+            (lambda x: location_chain is not None,
+             RunnableLambda(generate_locations_if_applicable)
+            ),
+            RunnablePassthrough()
+        )
+
+        # Chain to generate characters
+        character_data_chain = RunnablePassthrough.assign(
+            characters_data=character_chain
+        )
+        # Final chain
+        return (
+            world_data_chain
+            | _report_stage(StoryJobStage.SETTING)
+            | optional_location_data_chain
+            | _report_stage(StoryJobStage.LOCATIONS)
+            | character_data_chain
+            | _report_stage(StoryJobStage.CHARACTERS)
+        )
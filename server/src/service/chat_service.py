@@ -1,28 +1,40 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import BackgroundTasks, HTTPException, status
 from server.db.models import ChatMessageDB
 from server.db.vector_store import VectorStore
-from server.src.models.chat import ChatMessage, ChatSession, LLMMessage
-from server.src.models.story import StorySettingsDTO, process_story
+from server.src.models.chat import ChatMessage, ChatSession, ChatStreamEvent, LLMMessage
+from server.src.models.story import EntityIndex, StorySettingsDTO, process_story
 from server.src.repository.chat_repository import IChatRespository
 from server.src.repository.story_repository import IStoryRepository
 from server.src.service.llm_service import LLMService
+from server.src.service.prompt_packer import PromptPacker, count_tokens
+from server.src.service.session_memory_service import SessionMemory
+from server.src.service.story_service import wait_for_intro_prefetch
 from server.src.models.enums import Config
 
 def _convert_chat_message_to_db_object(user_msg: ChatMessage) -> ChatMessageDB:
-    return ChatMessageDB(story_id=user_msg.story_id, user_id=user_msg.user_id, session_id=user_msg.session_id, role=user_msg.role, content=user_msg.content)
+    return ChatMessageDB(story_id=user_msg.story_id, user_id=user_msg.user_id, session_id=user_msg.session_id, role=user_msg.role, content=user_msg.content,
+                         token_count=count_tokens(user_msg.content))
 
 def _construct_chat_message(llm_response_content: str, story_id: int, user_id: int, session_id: int) -> ChatMessageDB:
-    return ChatMessageDB(story_id=story_id, user_id=user_id, session_id=session_id, role='ai', content=llm_response_content)
+    return ChatMessageDB(story_id=story_id, user_id=user_id, session_id=session_id, role='ai', content=llm_response_content,
+                         token_count=count_tokens(llm_response_content))
 def _convert_to_llm_messages(messages: List[ChatMessage]) -> List[LLMMessage]:
     return [LLMMessage.model_validate(message.model_dump()) for message in messages]
 
+# Entity indexes of recently played stories, worlds never change once created
+_entity_indexes: "OrderedDict[int, EntityIndex]" = OrderedDict()
+
 class ChatService:
     def __init__(self, story_repository: IStoryRepository, chat_repository: IChatRespository, llm_service: LLMService, vector_store: VectorStore) -> None:
         self._story_repository = story_repository
         self._chat_repository = chat_repository
         self._llm_service = llm_service
         self._vector_store = vector_store
+        self._session_memory = SessionMemory(chat_repository, llm_service)
+        self._prompt_packer = PromptPacker()
 
     def _create_session(self, story_id: int, user_id: int) -> ChatSession:
         try:
@@ -36,6 +48,15 @@ class ChatService:
         except Exception as e:
             raise e
         
+    async def delete_session(self, session_id: int, user_id: int) -> bool:
+        """Delete a session of user_id and its chat memory. Returns False if the user has no such session"""
+        session: Optional[ChatSession] = self._chat_repository.get_session(session_id=session_id)
+        if session is None or session.user_id != user_id:
+            return False
+        self._chat_repository.delete_session(session_id)
+        await asyncio.to_thread(self._vector_store.delete_session, str(session_id))
+        return True
+
     async def start_session(self, story_id: int, user_id: int) -> Optional[ChatMessage]:
         try:
             # Create session
@@ -45,10 +66,16 @@ class ChatService:
             story: Optional[StorySettingsDTO] = self._story_repository.get_story(chat_session.story_id)
 
             if story and chat_session.id:
-                world: dict[str, Any] = process_story(story)
-                
-                # Get llm response
-                llm_response_content : str = self._llm_service.start_chat(world)
+                # Serve the intro generated speculatively at story creation, generate it live on a miss
+                await wait_for_intro_prefetch(chat_session.story_id)
+                llm_response_content: str = self._story_repository.get_intro(chat_session.story_id) or ''
+                if len(llm_response_content) == 0:
+                    world: dict[str, Any] = process_story(story)
+                    
+                    # Get llm response
+                    llm_response_content = await self._llm_service.start_chat(world)
+                    if len(llm_response_content) > 0:
+                        self._story_repository.save_intro(chat_session.story_id, llm_response_content)
                 if len(llm_response_content) > 0:
                     llm_response = _construct_chat_message(llm_response_content, story_id=chat_session.story_id, user_id=chat_session.user_id, session_id=chat_session.id)
                     
@@ -64,37 +91,105 @@ class ChatService:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Story not found!")
         except Exception as e:
             raise e
-    async def _embed_messages(self, session_id: int, limit: int, skip: int):
-        messages: List[ChatMessage] = self._chat_repository.get_messages(session_id=session_id, limit=limit, skip=skip, order_desc=False)
-        if len(messages) > 0:
-            for message in messages:
-                self._vector_store.add_chat_message(message_id=str(message.id), story_id=str(message.story_id), content=message.content, role=message.role, session_id=str(message.session_id))
+
+    def _count_tokens(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Fill in token counts missing on messages saved before they were cached, and cache them"""
+        missing = {message.id: count_tokens(message.content) for message in messages if message.token_count is None and message.id is not None}
+        if missing:
+            self._chat_repository.save_token_counts(missing)
+        return [message.model_copy(update={"token_count": missing[message.id]}) if message.id in missing else message for message in messages]
+
+    def _get_entity_index(self, story_id: int) -> Optional[EntityIndex]:
+        index = _entity_indexes.get(story_id)
+        if index is not None:
+            _entity_indexes.move_to_end(story_id)
+            return index
+        story: Optional[StorySettingsDTO] = self._story_repository.get_story(story_id)
+        if story is None:
+            return None
+        index = EntityIndex(story.world)
+        _entity_indexes[story_id] = index
+        if len(_entity_indexes) > Config.ENTITY_INDEX_CACHE_SIZE:
+            _entity_indexes.popitem(last=False)
+        return index
+
+    async def _prepare_turn(self, user_msg: ChatMessage, background_tasks: BackgroundTasks) -> Tuple[Dict[str, Any], List[LLMMessage], str]:
+        """
+        Persist the player's message and gather RAG context and recent history for the LLM,
+        packed into the prompt's token budget. Returns the context, history and player message to send.
+        """
+        # Save user message to db, queued for the vector store by the embedding queue worker
+        self._chat_repository.save_message(_convert_chat_message_to_db_object(user_msg))
+        message_count: int = self._chat_repository.get_message_count(session_id=user_msg.session_id)
+
+        # Every few messages, compact turns older than the recent history into the session summary
+        if message_count % Config.SUMMARY_INTERVAL == 0:
+            background_tasks.add_task(self._session_memory.compact, user_msg.session_id)
+        
+        # Retrieve RAG context, off the event loop: embedding the query may wait behind queued batches
+        entity_index: Optional[EntityIndex] = self._get_entity_index(user_msg.story_id)
+        context: Dict[str, Any] = await asyncio.to_thread(self._vector_store.retrieve_context, story_id=str(user_msg.story_id), session_id=str(user_msg.session_id),
+                                                          query=user_msg.content, n_results=Config.RETRIEVAL_CANDIDATES)
+        context['summary'] = self._session_memory.render(user_msg.session_id)
+
+        # Get chat history for context
+        messages: List[ChatMessage] = self._count_tokens(self._chat_repository.get_messages(user_msg.session_id, limit=Config.CHAT_HISTORY_SIZE, skip=0, order_desc=True))
+
+        # World context: the characters and locations the action or recent turns mention,
+        # then the retrieved setting chunks (power systems, other entities...) by relevance
+        if entity_index is not None:
+            mentioned = entity_index.world_documents([user_msg.content, *(message.content for message in messages)])
+            retrieved = [document for document in (context['settings'][0] if context.get('settings') else []) if document not in mentioned]
+            context['settings'] = [mentioned + retrieved]
+
+        # Fit every section of the prompt in its token budget
+        context, messages, user_content = self._prompt_packer.pack(context, messages, user_msg.content)
+        llm_messages: List[LLMMessage] = _convert_to_llm_messages(messages)
+        llm_messages.reverse()
+        return (context, llm_messages, user_content)
 
     async def send_message(self, user_msg: ChatMessage, background_tasks: BackgroundTasks):
         """Chat loop with RAG context"""
         try:
-            # Save user message to db and vector store
-            self._chat_repository.save_message(_convert_chat_message_to_db_object(user_msg))
-            message_count: int = self._chat_repository.get_message_count(session_id=user_msg.session_id)
-
-            # For every 50 messages, embed older messages in vector_store asynchronously
-            if message_count % Config.MEMORY_THRESHOLD == 0:
-                background_tasks.add_task(self._embed_messages, session_id=user_msg.session_id, limit=Config.MEMORY_THRESHOLD, skip=message_count-Config.MEMORY_THRESHOLD)
-            
-            # Retrieve RAG context
-            context: Dict[str, Any] = self._vector_store.retrieve_context(story_id=str(user_msg.story_id), session_id=str(user_msg.session_id), query=user_msg.content)
-
-            # Get chat history for context
-            messages: List[ChatMessage] = self._chat_repository.get_messages(user_msg.session_id, limit=Config.CHAT_HISTORY_SIZE, skip=0, order_desc=True)
-            llm_messages: List[LLMMessage] = _convert_to_llm_messages(messages)
-            llm_messages.reverse()
+            context, llm_messages, user_content = await self._prepare_turn(user_msg, background_tasks)
             
             # Get response from LLM
-            llm_response_content = self._llm_service.send_message(context, llm_messages, user_msg.content)
+            llm_response_content = await self._llm_service.send_message(context, llm_messages, user_content)
             llm_response = _construct_chat_message(llm_response_content, story_id=user_msg.story_id, user_id=user_msg.user_id, session_id=user_msg.session_id)
             
             # Save llm chat message
             saved_llm_response = self._chat_repository.save_message(llm_response)
             return saved_llm_response
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    async def stream_message(self, user_msg: ChatMessage, background_tasks: BackgroundTasks) -> AsyncIterator[ChatStreamEvent]:
+        """
+        Streaming variant of `send_message`.
+
+        Yields a `token` event for every chunk produced by the LLM. Once the stream
+        completes, the full response is saved and a final `message` event carrying the
+        saved chat message is yielded. Failures are reported as an `error` event since
+        the response status has already been sent.
+        """
+        try:
+            context, llm_messages, user_content = await self._prepare_turn(user_msg, background_tasks)
+
+            # Stream response from LLM
+            chunks: List[str] = []
+            async for token in self._llm_service.stream_message(context, llm_messages, user_content):
+                chunks.append(token)
+                yield ChatStreamEvent(event='token', data=token)
+
+            llm_response_content = ''.join(chunks)
+            if len(llm_response_content) == 0:
+                yield ChatStreamEvent(event='error', data="LLM response in incorrect format!")
+                return
+            llm_response = _construct_chat_message(llm_response_content, story_id=user_msg.story_id, user_id=user_msg.user_id, session_id=user_msg.session_id)
+
+            # Save llm chat message once the stream has closed
+            saved_llm_response = self._chat_repository.save_message(llm_response)
+            if saved_llm_response:
+                yield ChatStreamEvent(event='message', data=saved_llm_response)
+        except Exception as e:
+            yield ChatStreamEvent(event='error', data=str(e))
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Callable, List, Optional
+from sqlalchemy.orm import Session
+
+from server.db.db import SessionLocal
+from server.db.vector_store import VectorStore
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import Config
+from server.src.models.metrics import EmbeddingQueueStats
+from server.src.repository.chat_repository_impl import ChatRepository
+
+
+class EmbeddingQueueWorker:
+    """
+    Drains the `embedding_queue` table into the vector store.
+
+    Every saved chat message is queued in the transaction that saves it. The worker
+    embeds the queue in small batches as messages arrive, so the whole history is
+    retrievable a moment after it is written. Failed messages stay queued and are
+    retried, up to `max_attempts` times, across restarts.
+    """
+    def __init__(self, vector_store: VectorStore, session_factory: Callable[[], Session] = SessionLocal,
+                 batch_size: int = Config.EMBEDDING_QUEUE_BATCH_SIZE, max_attempts: int = Config.EMBEDDING_QUEUE_MAX_ATTEMPTS) -> None:
+        self._vector_store = vector_store
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._task: Optional[asyncio.Task] = None
+        self._embedded = 0
+        self._failed = 0
+        self._drain_errors = 0
+        self._last_error: Optional[str] = None
+
+    async def drain_once(self) -> int:
+        """
+        Embed one batch of queued messages.
+
+        Returns:
+            int: Number of messages taken from the queue
+        """
+        db = self._session_factory()
+        try:
+            chat_repository = ChatRepository(db)
+            messages: List[ChatMessage] = chat_repository.get_pending_embeddings(self._batch_size, self._max_attempts)
+            if not messages:
+                return 0
+            ids: List[int] = [message.id for message in messages] # type: ignore
+            try:
+                # Waiting on the embeddings must not block the event loop serving chat turns
+                failed = {int(message_id) for message_id in await asyncio.to_thread(self._vector_store.add_chat_messages, messages)}
+                error = "Could not save to vector store!"
+            except Exception as e:
+                failed, error = set(ids), str(e)
+            chat_repository.complete_embeddings([message_id for message_id in ids if message_id not in failed])
+            chat_repository.fail_embeddings([message_id for message_id in ids if message_id in failed], error)
+            self._embedded += len(ids) - len(failed)
+            self._failed += len(failed)
+            if failed:
+                self._last_error = error
+            return len(ids)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Start the background drain"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Keep draining while batches come back full, then wait for new messages
+                if await self.drain_once() >= self._batch_size:
+                    continue
+            except Exception as e:
+                self._drain_errors += 1
+                self._last_error = str(e)
+            await asyncio.sleep(Config.EMBEDDING_QUEUE_POLL_INTERVAL_SECONDS)
+
+    def stats(self) -> EmbeddingQueueStats:
+        db = self._session_factory()
+        try:
+            pending, dead = ChatRepository(db).count_pending_embeddings(self._max_attempts)
+        finally:
+            db.close()
+        return EmbeddingQueueStats(
+            enabled=self._task is not None,
+            pending=pending,
+            dead=dead,
+            embedded=self._embedded,
+            failed=self._failed,
+            drain_errors=self._drain_errors,
+            last_error=self._last_error
+        )
@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Type, Union, get_args, get_origin
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from server.src.models.enums import Config
+
+_SYLLABLES = ["ka", "ri", "mo", "len", "dra", "sil", "or", "eth", "van", "ta", "mir", "quel", "bor", "nia", "zu", "cor"]
+_WORDS = ["ancient", "quiet", "storm", "lantern", "river", "ember", "hollow", "silver", "whisper", "iron", "garden",
+          "shadow", "tide", "crown", "ash", "velvet", "harbor", "thorn", "glass", "moon"]
+_SENTENCES = [
+    "The wind carries the smell of rain across the square.",
+    "A stranger watches you from the far end of the hall.",
+    "Somewhere below, a door slams and footsteps hurry away.",
+    "The lantern light flickers, throwing long shadows on the wall.",
+    "You notice a folded note tucked beneath the loose stone.",
+    "An old bell tolls twice, then falls silent.",
+    "The path ahead splits, one way climbing, the other sinking into fog.",
+    "Voices argue in hushed tones behind the curtain.",
+    "Your hand brushes against something cold and metallic.",
+    "What do you do next?",
+]
+_PROTAGONIST_HINT = "Set is_protagonist to True"
+_COUNT_HINT = re.compile(r"exactly (\d+)")
+_DEFAULT_LIST_SIZE = 3
+
+def _render(input: Any) -> str:
+    """Flatten a prompt value, message list or plain value into the text the model would see, each
+    message prefixed by its role. Also the prompt key of recorded cassettes"""
+    if hasattr(input, 'to_string'):
+        return input.to_string()
+    if isinstance(input, list):
+        return "\n".join(f"{getattr(message, 'type', '')}: {getattr(message, 'content', message)}" for message in input)
+    return str(input)
+
+def _proper_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{first} {last}"
+
+def _fake_value(annotation: Any, field_name: str, rng: random.Random, prompt: str, depth: int) -> Any:
+    origin = get_origin(annotation)
+    if origin is Union:
+        # Optional[X] / Union[X, Y]: generate the first non None member
+        members = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _fake_value(members[0], field_name, rng, prompt, depth) if members else None
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (str,)
+        size = _DEFAULT_LIST_SIZE
+        count = _COUNT_HINT.search(prompt)
+        if depth == 0 and count:
+            # Top level lists (characters/locations) honour "exactly N" in the prompt
+            size = int(count.group(1))
+        return [_fake_value(item_type, field_name, rng, prompt, depth + 1) for _ in range(size)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _fake_instance(annotation, rng, prompt, depth)
+    if annotation is bool:
+        return field_name == 'is_protagonist' and _PROTAGONIST_HINT in prompt
+    if annotation is int:
+        return rng.randint(1, 100)
+    if annotation is float:
+        return round(rng.uniform(0, 1), 3)
+    if field_name == 'name':
+        return _proper_name(rng)
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 8)))
+    return f"{field_name.replace('_', ' ').capitalize()}: {words}"
+
+def _fake_instance(schema: Type[BaseModel], rng: random.Random, prompt: str, depth: int = 0) -> BaseModel:
+    values = {
+        name: _fake_value(field.annotation, name, rng, prompt, depth)
+        for name, field in schema.model_fields.items()
+    }
+    return schema.model_validate(values)
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local stand-in for the Gemini chat model, used for load tests, CI
+    and benchmarks so that our own overhead can be measured without network calls.
+
+    Output is seeded by the rendered prompt, so the same input always yields the same
+    reply or structured object. Each call waits a latency drawn from a normal
+    distribution, then emits tokens at a rate drawn from another, mimicking the time
+    to first token and generation speed of a hosted model.
+    """
+    seed: int = Config.FAKE_LLM_SEED
+    latency_ms: float = Config.FAKE_LLM_LATENCY_MS
+    latency_jitter_ms: float = Config.FAKE_LLM_LATENCY_JITTER_MS
+    tokens_per_second: float = Config.FAKE_LLM_TOKENS_PER_SECOND
+    tokens_per_second_jitter: float = Config.FAKE_LLM_TOKENS_PER_SECOND_JITTER
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+    def _latency(self, rng: random.Random) -> float:
+        """Seconds to wait before the first token"""
+        return max(0.0, rng.gauss(self.latency_ms, self.latency_jitter_ms)) / 1000
+
+    def _token_delay(self, rng: random.Random) -> float:
+        """Seconds between two tokens"""
+        if self.tokens_per_second <= 0:
+            return 0.0
+        rate = max(1.0, rng.gauss(self.tokens_per_second, self.tokens_per_second_jitter))
+        return 1 / rate
+
+    def _reply(self, rng: random.Random) -> List[str]:
+        """Reply split into tokens, whitespace kept on the preceding token"""
+        text = " ".join(rng.choice(_SENTENCES) for _ in range(rng.randint(2, 5)))
+        return re.findall(r"\S+\s*", text)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        rng = self._rng(_render(messages))
+        tokens = self._reply(rng)
+        time.sleep(self._latency(rng) + self._token_delay(rng) * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        rng = self._rng(_render(messages))
+        tokens = self._reply(rng)
+        await asyncio.sleep(self._latency(rng) + self._token_delay(rng) * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        rng = self._rng(_render(messages))
+        tokens = self._reply(rng)
+        delay = self._token_delay(rng)
+        time.sleep(self._latency(rng))
+        for token in tokens:
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        rng = self._rng(_render(messages))
+        tokens = self._reply(rng)
+        delay = self._token_delay(rng)
+        await asyncio.sleep(self._latency(rng))
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable: # type: ignore[override]
+        """Return a runnable producing a schema-valid instance of `schema` for any prompt"""
+        def structured(input: Any) -> BaseModel:
+            prompt = _render(input)
+            rng = self._rng(prompt)
+            time.sleep(self._latency(rng))
+            return _fake_instance(schema, rng, prompt)
+
+        async def astructured(input: Any) -> BaseModel:
+            prompt = _render(input)
+            rng = self._rng(prompt)
+            await asyncio.sleep(self._latency(rng))
+            return _fake_instance(schema, rng, prompt)
+
+        return RunnableLambda(structured, afunc=astructured)
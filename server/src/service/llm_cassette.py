@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from server.src.models.enums import CassetteMode, CassetteTiming, Config
+from server.src.service.fake_llm import _render
+
+# (seconds since the call started, text) pairs; a plain call is recorded as one token
+Tokens = List[Tuple[float, str]]
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording matches a prompt"""
+
+def _last_human_message(input: Any) -> str:
+    """Content of the player's message, used to match turns whose surrounding prompt changed"""
+    messages = input.to_messages() if hasattr(input, 'to_messages') else input
+    if isinstance(messages, list):
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return str(message.content)
+    return _render(input)
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+class CassetteStore:
+    """
+    Compact on-disk store of recorded LLM calls: one sqlite file, zlib compressed JSON
+    payloads keyed by the hash of the rendered prompt.
+    """
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS cassette (
+                key TEXT PRIMARY KEY,
+                turn_key TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                recorded_at REAL NOT NULL
+            )""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_cassette_turn_key ON cassette (turn_key)")
+        self._connection.commit()
+
+    def put(self, key: str, turn_key: str, payload: Dict[str, Any]) -> None:
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO cassette VALUES (?, ?, ?, ?)", (key, turn_key, blob, time.time()))
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT payload FROM cassette WHERE key = ?", (key,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def get_by_turn(self, turn_key: str) -> Optional[Dict[str, Any]]:
+        """Most recent recording of the same turn"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM cassette WHERE turn_key = ? ORDER BY recorded_at DESC LIMIT 1", (turn_key,)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cassette").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model recording calls to, or replaying them from, a CassetteStore.
+
+    In record mode every call goes to `inner` and its output, with token timings, is
+    stored under the hash of the rendered prompt. In replay mode responses come from
+    the store only, waiting the recorded time (`timing='original'`) or not at all
+    (`timing='none'`). When the exact prompt is not found, the latest recording of the
+    same player message is used instead, so that production sessions can be replayed
+    after changes to retrieval or prompt assembly.
+    """
+    store: CassetteStore
+    mode: CassetteMode = CassetteMode.REPLAY
+    timing: CassetteTiming = CassetteTiming.ORIGINAL
+    inner: Optional[BaseChatModel] = None
+    model_name: str = Config.LLM_MODEL
+    exact_hits: int = 0
+    turn_hits: int = 0
+    misses: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def client(self) -> Any:
+        """Client of the recorded model, closed with the rest of the LLM pool"""
+        return getattr(self.inner, 'client', None)
+
+    def _keys(self, kind: str, input: Any) -> Tuple[str, str]:
+        return _hash(kind, self.model_name, _render(input)), _hash(kind, self.model_name, _last_human_message(input))
+
+    def _lookup(self, key: str, turn_key: str) -> Dict[str, Any]:
+        payload = self.store.get(key)
+        if payload is not None:
+            self.exact_hits += 1
+            return payload
+        payload = self.store.get_by_turn(turn_key)
+        if payload is not None:
+            self.turn_hits += 1
+            return payload
+        self.misses += 1
+        raise CassetteMissError(f"No recorded LLM response for prompt {key[:12]}")
+
+    def _require_inner(self) -> BaseChatModel:
+        if self.inner is None:
+            raise ValueError("Recording LLM calls requires an inner model")
+        return self.inner
+
+    def _delays(self, tokens: Tokens) -> Iterator[Tuple[float, str]]:
+        """Delay before each token relative to the previous one"""
+        previous = 0.0
+        for offset, text in tokens:
+            yield (offset - previous if self.timing == CassetteTiming.ORIGINAL else 0.0), text
+            previous = offset
+
+    def _result(self, tokens: Tokens) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(text for _, text in tokens)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        key, turn_key = self._keys('chat', messages)
+        if self.mode == CassetteMode.RECORD:
+            start = time.perf_counter()
+            result = self._require_inner().invoke(messages, stop=stop, **kwargs)
+            tokens = [(time.perf_counter() - start, str(result.content))]
+            self.store.put(key, turn_key, {'tokens': tokens})
+            return self._result(tokens)
+        tokens = self._lookup(key, turn_key)['tokens']
+        time.sleep(sum(delay for delay, _ in self._delays(tokens)))
+        return self._result(tokens)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        key, turn_key = self._keys('chat', messages)
+        if self.mode == CassetteMode.RECORD:
+            start = time.perf_counter()
+            result = await self._require_inner().ainvoke(messages, stop=stop, **kwargs)
+            tokens = [(time.perf_counter() - start, str(result.content))]
+            self.store.put(key, turn_key, {'tokens': tokens})
+            return self._result(tokens)
+        tokens = self._lookup(key, turn_key)['tokens']
+        await asyncio.sleep(sum(delay for delay, _ in self._delays(tokens)))
+        return self._result(tokens)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        key, turn_key = self._keys('chat', messages)
+        if self.mode == CassetteMode.RECORD:
+            start = time.perf_counter()
+            tokens: Tokens = []
+            async for chunk in self._require_inner().astream(messages, stop=stop, **kwargs):
+                tokens.append((time.perf_counter() - start, str(chunk.content)))
+                yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+            self.store.put(key, turn_key, {'tokens': tokens})
+            return
+        for delay, text in self._delays(self._lookup(key, turn_key)['tokens']):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable: # type: ignore[override]
+        """Record or replay structured output calls, keyed by prompt and target schema"""
+        schema_key = json.dumps(schema.model_json_schema(), sort_keys=True)
+        inner_runnable = self.inner.with_structured_output(schema, **kwargs) if self.inner is not None else None
+
+        def recorder() -> Runnable:
+            if inner_runnable is None:
+                self._require_inner()
+            return inner_runnable # type: ignore[return-value]
+
+        def replay(key: str, turn_key: str) -> Tuple[float, BaseModel]:
+            payload = self._lookup(key, turn_key)
+            delay = payload['elapsed'] if self.timing == CassetteTiming.ORIGINAL else 0.0
+            return delay, schema.model_validate(payload['output'])
+
+        def call(input: Any) -> BaseModel:
+            key, turn_key = self._keys(f'structured:{schema_key}', input)
+            if self.mode == CassetteMode.RECORD:
+                start = time.perf_counter()
+                output = recorder().invoke(input)
+                self.store.put(key, turn_key, {'elapsed': time.perf_counter() - start, 'output': output.model_dump()})
+                return output
+            delay, output = replay(key, turn_key)
+            time.sleep(delay)
+            return output
+
+        async def acall(input: Any) -> BaseModel:
+            key, turn_key = self._keys(f'structured:{schema_key}', input)
+            if self.mode == CassetteMode.RECORD:
+                start = time.perf_counter()
+                output = await recorder().ainvoke(input)
+                self.store.put(key, turn_key, {'elapsed': time.perf_counter() - start, 'output': output.model_dump()})
+                return output
+            delay, output = replay(key, turn_key)
+            await asyncio.sleep(delay)
+            return output
+
+        return RunnableLambda(call, afunc=acall)
@@ -0,0 +1,115 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from server.src.models.enums import CassetteMode, CassetteTiming, Config
+from server.src.models.metrics import LLMPoolStats
+from server.src.service.fake_llm import FakeChatModel
+from server.src.service.llm_cassette import CassetteChatModel, CassetteStore
+
+ModelFactory = Callable[[str, float], BaseChatModel]
+
+def _create_gemini_model(model_name: str, temperature: float) -> BaseChatModel:
+    return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, max_retries=Config.LLM_MAX_RETRIES)
+
+def _create_fake_model(model_name: str, temperature: float) -> BaseChatModel:
+    return FakeChatModel()
+
+_BACKENDS: Dict[str, ModelFactory] = {
+    'gemini': _create_gemini_model,
+    'fake': _create_fake_model,
+}
+
+def with_cassette(factory: ModelFactory, mode: CassetteMode, path: str, timing: CassetteTiming) -> ModelFactory:
+    """Wrap models from factory so that their calls are recorded to, or replayed from, a cassette"""
+    store = CassetteStore(path)
+
+    def create(model_name: str, temperature: float) -> BaseChatModel:
+        # Replay never reaches the backend, so it does not need credentials
+        inner = factory(model_name, temperature) if mode == CassetteMode.RECORD else None
+        return CassetteChatModel(store=store, mode=mode, timing=timing, inner=inner, model_name=f"{model_name}@{temperature}")
+    return create
+
+def get_model_factory(backend: str = Config.LLM_BACKEND, cassette_mode: str = Config.LLM_CASSETTE_MODE,
+                      cassette_path: str = Config.LLM_CASSETTE_PATH, cassette_timing: str = Config.LLM_CASSETTE_TIMING) -> ModelFactory:
+    """Return the model factory of the configured LLM backend, optionally behind a cassette"""
+    try:
+        factory = _BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {', '.join(_BACKENDS)}")
+    if CassetteMode(cassette_mode) == CassetteMode.OFF:
+        return factory
+    return with_cassette(factory, CassetteMode(cassette_mode), cassette_path, CassetteTiming(cassette_timing))
+
+class LLMClientPool:
+    """
+    Process-wide registry of long-lived chat model clients.
+
+    One client is created lazily per (model, temperature) pair and reused for the
+    lifetime of the app, so its HTTP connections stay alive between requests.
+    `slot()` bounds the number of LLM calls in flight across all requests.
+    """
+    def __init__(self, max_in_flight: int = Config.LLM_MAX_IN_FLIGHT, model_factory: Optional[ModelFactory] = None) -> None:
+        self._model_factory: ModelFactory = model_factory or get_model_factory()
+        self._clients: Dict[Tuple[str, float], BaseChatModel] = {}
+        self._max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self._total_calls = 0
+
+    def get_model(self, model_name: str = Config.LLM_MODEL, temperature: float = Config.LLM_TEMPERATURE) -> BaseChatModel:
+        """Return the shared client for model_name/temperature, creating it on first use"""
+        key = (model_name, temperature)
+        if key not in self._clients:
+            self._clients[key] = self._model_factory(model_name, temperature)
+        return self._clients[key]
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of an LLM call, queueing if all are taken"""
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        self._total_calls += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def bounded(self, runnable: Runnable) -> Runnable:
+        """Wrap a model call so that it holds one in-flight slot while running"""
+        async def call(input: Any, config: RunnableConfig) -> Any:
+            async with self.slot():
+                return await runnable.ainvoke(input, config)
+        return RunnableLambda(call)
+
+    def stats(self) -> LLMPoolStats:
+        creations = len(self._clients)
+        # Chains fetch their models once at startup, so reuse is measured over calls rather than get_model()
+        reuse_ratio = max(self._total_calls - creations, 0) / self._total_calls if self._total_calls else 0.0
+        return LLMPoolStats(
+            clients=creations,
+            max_in_flight=self._max_in_flight,
+            in_flight=self._in_flight,
+            queue_depth=self._waiting,
+            total_calls=self._total_calls,
+            client_creations=creations,
+            reuse_ratio=reuse_ratio
+        )
+
+    async def aclose(self) -> None:
+        """Close the HTTP clients held by the pooled models"""
+        for model in self._clients.values():
+            client = getattr(model, 'client', None)
+            if client is not None and hasattr(client, 'aio'):
+                await client.aio.aclose()
+                client.close()
+        self._clients.clear()
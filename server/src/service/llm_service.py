@@ -1,18 +1,35 @@
-from typing import  Any, Dict, List, Optional, Type
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableBranch, RunnableLambda
+from typing import  Any, AsyncIterator, Callable, Dict, List, Optional
 
 from server.src.models.chat import LLMMessage
-from server.src.models.enums import ChatPrompt
-from server.src.models.story import WorldDTO, WorldSettingDTO, convert_to_world_dto, get_target_character_schema, get_target_location_schema, get_target_world_schema
-
+from server.src.models.enums import StoryJobStage
+from server.src.models.story import WorldDTO, convert_to_world_dto
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.llm_client_pool import LLMClientPool
+
+
+def _content_to_text(content: Any) -> str:
+    """Extract plain text from a message chunk's content (str or list of content parts)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return ''.join(part if isinstance(part, str) else part.get('text', '') for part in content if isinstance(part, (str, dict)))
+    return ''
+
+def _chat_inputs(context: Dict[str, Any], messages: List[LLMMessage], user_msg: str) -> Dict[str, Any]:
+    return {
+        "settings": context['settings'],
+        "chat_history": context['chat_history'],
+        "summary": context.get('summary') or "Nothing yet, the story has just begun.",
+        "messages": messages,
+        "user_msg": user_msg
+    }
 
 class LLMService:
-    def __init__(self): 
-        self.model = ChatGoogleGenerativeAI(model='gemini-2.5-flash', temperature=0.7, max_retries=2)
+    def __init__(self, pool: LLMClientPool, registry: ChainRegistry): 
+        self._pool = pool
+        self._registry = registry
 
-    def create_world(self, tag: str, prompt: str) -> Optional[WorldDTO]:
+    async def create_world(self, tag: str, prompt: str, on_progress: Optional[Callable[[StoryJobStage], None]] = None) -> Optional[WorldDTO]:
         """
     Create a unique world setting with optional locations based on a given tag and prompt.
     
@@ -25,6 +42,7 @@ class LLMService:
              Used to determine the appropriate world and location schemas.
         prompt: A creative prompt describing the desired world characteristics.
                 Used as input for the LLM to generate the world description.
+        on_progress: Optional callback, called with each pipeline stage once it completes.
     
     Returns:
         Optional[WorldDTO]: A data transfer object containing the generated world data
@@ -33,131 +51,53 @@ class LLMService:
     Pipeline stages:
         1. Generate world setting data using the tag-specific schema
         2. Optionally generate locations if the tag supports location generation
-    """
-
-        system_prompt = f"""
-Your job is to help create interesting {tag} worlds that 
-players would love to play in.
-Instructions:
-- Only generate in plain text without formatting.
-- Use simple clear language without being flowery.
-- You must stay below 3-5 sentences for each description.
-"""
-        world_prompt = f"""
-Generate a creative description for a unique {tag} world based on this prompt: {prompt}"""
-        
-        # Get the target world setting schema
-        target_schema: Type[WorldSettingDTO] = get_target_world_schema(tag)
-        
-        #Define output schema
-        world_llm = self.model.with_structured_output(target_schema)
-
-        # Define intial prompt
-        initial_prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", world_prompt)
-        ])
-
-        # Define chain to generate world setting data
-        world_chain = initial_prompt | world_llm
-
-        # Get target location schema and prompt
-        output = get_target_location_schema(tag)
-        location_chain = None
-        if output:
-            # if locations should be generated
-            (location_prompt_template, target_location_schema) = output
-
-            # Define output schema
-            location_llm = self.model.with_structured_output(target_location_schema)
-
-            # Define location prompt
-            location_prompt = ChatPromptTemplate.from_messages([
-                ('human', location_prompt_template)
-            ])
-
-            # Define chain to generate locations using world setting data
-            location_chain = location_prompt | location_llm
-
-        # Get target character schema and prompt
-        (character_prompt_template, target_character_schema) = get_target_character_schema(tag)
-
-        # Define output schema
-        character_llm = self.model.with_structured_output(target_character_schema)
-
-        # Define character prompt
-        character_prompt = ChatPromptTemplate.from_messages([
-            ('human', character_prompt_template)
-        ])
-
-        # Define chain to generate characters from world settings and locations
-        character_chain = character_prompt | character_llm
-
-        # Generate world setting data
-        # This also makes world setting data available as input variable
-        world_data_chain = RunnablePassthrough.assign(
-            world_data=world_chain
-        )
+        3. Generate characters in concurrent batches (protagonist, allies, antagonists...)
+           and merge them into one cast with a single protagonist and unique names
 
-        def generate_locations_if_applicable(input: dict):
-            if location_chain:
-                locations_data = location_chain.invoke(input)
-                input['locations_data'] = locations_data
-                return input
-            return input
-        
-        # Chain to optionally generate locations
-        optional_location_data_chain = RunnableBranch(
-            (lambda x: location_chain is not None, 
-             RunnableLambda(generate_locations_if_applicable)
-            ),
-            RunnablePassthrough()
-        )
+    The pipeline for each tag is prebuilt once by the ChainRegistry.
+    """
 
-        # Chain to generate characters
-        character_data_chain = RunnablePassthrough.assign(
-            characters_data=character_chain
-        )
-        # Final chain
-        pipeline = (
-            world_data_chain
-            | optional_location_data_chain
-            | character_data_chain
-        )
-            
-        result_dict = pipeline.invoke({"topic": "fictional worlds"})
+        pipeline = self._registry.world_pipeline(tag)
+        result_dict = await pipeline.ainvoke({"tag": tag, "prompt": prompt}, config={"configurable": {"on_progress": on_progress}})
         return convert_to_world_dto(result_dict)
         
-    def start_chat(self, world: dict[str, Any]) -> str:
-        # Define intial prompt
-        initial_prompt = ChatPromptTemplate.from_messages([
-            ("system", ChatPrompt.INITIAL_SYSTEM_PROMPT),
-            ("human",  "Generate introduction")
-        ])
-
-         # Define chain to generate intro message
-        chat_intro_chain = initial_prompt | self.model
-
-        result = chat_intro_chain.invoke(world)
+    async def start_chat(self, world: dict[str, Any]) -> str:
+        result = await self._registry.intro_chain().ainvoke(world)
         if isinstance(result.content, str):
             return result.content
         return ''
     
-    def send_message(self, context: Dict[str, Any], messages: List[LLMMessage], user_msg: str ) -> str:
-        # Define intial prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", ChatPrompt.SYSTEM_PROMPT),
-            ("human",  user_msg)
-        ])
+    async def send_message(self, context: Dict[str, Any], messages: List[LLMMessage], user_msg: str ) -> str:
+        result = await self._registry.chat_chain().ainvoke(_chat_inputs(context, messages, user_msg))
+        if isinstance(result.content, str):
+            return result.content
+        return ''
 
-         # Define chain to generate llm message
-        chat_chain = prompt | self.model
+    async def stream_message(self, context: Dict[str, Any], messages: List[LLMMessage], user_msg: str) -> AsyncIterator[str]:
+        """
+        Stream the game master's reply token by token.
 
-        result = chat_chain.invoke({
-            "settings": context['settings'],
-            "chat_history": context['chat_history'],
-            "messages": messages
+        Uses the same prompt as `send_message`, but yields text chunks as the model
+        produces them instead of waiting for the full completion.
+        """
+        async with self._pool.slot():
+            async for chunk in self._registry.chat_stream_chain().astream(_chat_inputs(context, messages, user_msg)):
+                text = _content_to_text(chunk.content)
+                if text:
+                    yield text
+
+    async def summarize(self, material: str, material_type: str, max_words: int) -> str:
+        """
+        Compact chat turns or earlier summaries into one short summary.
+
+        Args:
+            material: Text to summarize, one turn or summary per line.
+            material_type: What the material is, `SummaryPrompt.TURNS` or `SummaryPrompt.SUMMARIES`.
+            max_words: Upper bound on the length of the summary.
+        """
+        result = await self._registry.summary_chain().ainvoke({
+            "material": material_type,
+            "max_words": max_words,
+            "content": material
         })
-        if isinstance(result.content, str):
-            return result.content
-        return ''
\ No newline at end of file
+        return _content_to_text(result.content).strip()
@@ -0,0 +1,120 @@
+from functools import lru_cache
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import ChatPrompt, Config
+
+# Latin words, then any other visible character alone: digits, punctuation and the characters of other scripts
+_TOKEN_PATTERN = re.compile(r"[A-Za-z\u00C0-\u024F\u1E00-\u1EFF]+|\S")
+_CHARS_PER_TOKEN = 5
+
+def _token_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of every estimated token in text"""
+    spans: List[Tuple[int, int]] = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        start, end = match.span()
+        # Long words are split into several subword tokens
+        for offset in range(start, end, _CHARS_PER_TOKEN):
+            spans.append((offset, min(offset + _CHARS_PER_TOKEN, end)))
+    return spans
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Local estimate of the number of model tokens in text.
+
+    Latin words count one token per 5 characters. Digits, punctuation marks and the
+    characters of other scripts (CJK, Cyrillic...) count one token each, as subword
+    tokenizers such as Gemini's spend about one token per digit or CJK character. Rare
+    words can still take more tokens than estimated, see `max_input_tokens`.
+    """
+    return len(_token_spans(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text down to max_tokens, keeping its beginning (or its end if keep_end)"""
+    spans = _token_spans(text)
+    if len(spans) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ''
+    if keep_end:
+        return "…" + text[spans[-max_tokens + 1][0]:] if max_tokens > 1 else ''
+    return text[:spans[max_tokens - 2][1]] + "…" if max_tokens > 1 else ''
+
+class PromptPacker:
+    """
+    Fits the chat prompt into a fixed token budget per section.
+
+    Each section (world context, retrieved memory, story summary, recent history and
+    the player's message) is filled greedily in priority order until its budget is
+    spent, so the estimated input tokens of a turn stay within the budgets whatever
+    the length of messages and documents.
+    """
+    def __init__(self, world_budget: int = Config.PROMPT_BUDGET_WORLD_TOKENS, memory_budget: int = Config.PROMPT_BUDGET_MEMORY_TOKENS,
+                 summary_budget: int = Config.PROMPT_BUDGET_SUMMARY_TOKENS, history_budget: int = Config.PROMPT_BUDGET_HISTORY_TOKENS,
+                 user_message_budget: int = Config.PROMPT_BUDGET_USER_MESSAGE_TOKENS) -> None:
+        self.world_budget = world_budget
+        self.memory_budget = memory_budget
+        self.summary_budget = summary_budget
+        self.history_budget = history_budget
+        self.user_message_budget = user_message_budget
+
+    def max_input_tokens(self) -> int:
+        """Input tokens to reserve for a chat turn: the estimated budgets plus a margin for estimation error"""
+        estimated = (count_tokens(ChatPrompt.SYSTEM_PROMPT) + self.world_budget + self.memory_budget
+                     + self.summary_budget + self.history_budget + self.user_message_budget)
+        return math.ceil(estimated * (1 + Config.PROMPT_TOKEN_ESTIMATE_MARGIN))
+
+    def pack_documents(self, documents: List[str], budget: int) -> List[str]:
+        """
+        Keep the documents, ordered by relevance, that fit in budget. Documents too
+        long for the remaining budget are skipped in favour of shorter, less relevant
+        ones, except the most relevant which is truncated instead.
+        """
+        packed: List[str] = []
+        remaining = budget
+        for document in documents:
+            tokens = count_tokens(document)
+            if tokens <= remaining:
+                packed.append(document)
+                remaining -= tokens
+            elif not packed and remaining > 0:
+                packed.append(truncate_to_tokens(document, remaining))
+                remaining = 0
+        return packed
+
+    def pack_history(self, messages: List[ChatMessage], budget: int) -> List[ChatMessage]:
+        """
+        Keep the most recent messages that fit in budget.
+
+        Args:
+            messages: Messages newest first, with their token count cached.
+
+        Returns:
+            List[ChatMessage]: A contiguous run of the newest messages, newest first.
+            The newest message is truncated if it alone exceeds the budget.
+        """
+        packed: List[ChatMessage] = []
+        remaining = budget
+        for message in messages:
+            tokens = message.token_count if message.token_count is not None else count_tokens(message.content)
+            if tokens > remaining:
+                if not packed and remaining > 0:
+                    packed.append(message.model_copy(update={"content": truncate_to_tokens(message.content, remaining, keep_end=True)}))
+                break
+            packed.append(message)
+            remaining -= tokens
+        return packed
+
+    def pack(self, context: Dict[str, Any], messages: List[ChatMessage], user_msg: str) -> Tuple[Dict[str, Any], List[ChatMessage], str]:
+        """Pack every section of a chat turn into its budget"""
+        packed_context = {
+            **context,
+            "settings": [self.pack_documents(context['settings'][0] if context.get('settings') else [], self.world_budget)],
+            "chat_history": [self.pack_documents(context['chat_history'][0] if context.get('chat_history') else [], self.memory_budget)],
+            # Recent episodes matter most, so the summary keeps its end
+            "summary": truncate_to_tokens(context.get('summary') or '', self.summary_budget, keep_end=True)
+        }
+        return (packed_context, self.pack_history(messages, self.history_budget), truncate_to_tokens(user_msg, self.user_message_budget))
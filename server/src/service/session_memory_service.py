@@ -0,0 +1,76 @@
+from typing import List, Set
+
+from server.db.models import SessionSummaryDB
+from server.src.models.chat import ChatMessage, SessionSummary
+from server.src.models.enums import Config, SummaryPrompt
+from server.src.repository.chat_repository import IChatRespository
+from server.src.service.llm_service import LLMService
+
+# Sessions with a compaction in progress, shared by every request of this process
+_compacting: Set[int] = set()
+
+class SessionMemory:
+    """
+    Hierarchical summary memory of a chat session.
+
+    Turns older than the recent history sent verbatim are compacted into level 0
+    summaries of `Config.SUMMARY_INTERVAL` messages. Once `Config.SUMMARY_FANOUT`
+    summaries pile up on a level, they are merged into one summary of the level above,
+    covering a whole episode. Summaries on the top level are merged in place. The
+    prompt therefore carries a bounded number of summaries however long the session.
+    """
+    def __init__(self, chat_repository: IChatRespository, llm_service: LLMService) -> None:
+        self._chat_repository = chat_repository
+        self._llm_service = llm_service
+
+    def render(self, session_id: int) -> str:
+        """Story so far, oldest episode first"""
+        summaries: List[SessionSummary] = self._chat_repository.get_summaries(session_id)
+        return "\n\n".join(summary.content for summary in summaries)
+
+    async def compact(self, session_id: int) -> None:
+        """Summarize turns that left the recent history and merge full levels of summaries"""
+        if session_id in _compacting:
+            # The running compaction picks up the new turns
+            return
+        _compacting.add(session_id)
+        try:
+            watermark = self._chat_repository.get_summary_watermark(session_id)
+            messages: List[ChatMessage] = self._chat_repository.get_messages_after(session_id, after_id=watermark)
+
+            # The most recent turns are still sent verbatim
+            turns = messages[:-Config.CHAT_HISTORY_SIZE] if Config.CHAT_HISTORY_SIZE else messages
+            for i in range(0, len(turns), Config.SUMMARY_INTERVAL):
+                if not await self._summarize_turns(session_id, turns[i:i + Config.SUMMARY_INTERVAL]):
+                    return
+                await self._merge_levels(session_id)
+        finally:
+            _compacting.discard(session_id)
+
+    async def _summarize_turns(self, session_id: int, turns: List[ChatMessage]) -> bool:
+        content = "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+        summary = await self._llm_service.summarize(content, SummaryPrompt.TURNS, Config.SUMMARY_MAX_WORDS[0])
+        if not summary:
+            return False
+        self._chat_repository.save_summary(
+            SessionSummaryDB(session_id=session_id, level=0, content=summary, start_message_id=turns[0].id, end_message_id=turns[-1].id),
+            compacted_ids=[]
+        )
+        return True
+
+    async def _merge_levels(self, session_id: int) -> None:
+        for level in range(Config.SUMMARY_MAX_LEVEL + 1):
+            summaries = [summary for summary in self._chat_repository.get_summaries(session_id) if summary.level == level]
+            if len(summaries) < Config.SUMMARY_FANOUT:
+                continue
+            group = summaries[:Config.SUMMARY_FANOUT]
+            target_level = min(level + 1, Config.SUMMARY_MAX_LEVEL)
+            content = "\n\n".join(summary.content for summary in group)
+            merged = await self._llm_service.summarize(content, SummaryPrompt.SUMMARIES, Config.SUMMARY_MAX_WORDS[target_level])
+            if not merged:
+                return
+            self._chat_repository.save_summary(
+                SessionSummaryDB(session_id=session_id, level=target_level, content=merged,
+                                 start_message_id=group[0].start_message_id, end_message_id=group[-1].end_message_id),
+                compacted_ids=[summary.id for summary in group if summary.id is not None]
+            )
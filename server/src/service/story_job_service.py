@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Dict, Optional, Set
+import uuid
+
+from server.src.models.enums import Config, StoryJobStage, StoryJobStatus
+from server.src.models.story import CreateStoryDTO, StoryJobDTO, StorySettingsDTO
+from server.src.service.story_service import StoryService
+
+StoryServiceFactory = Callable[[], AsyncContextManager[StoryService]]
+
+class StoryJobManager:
+    """
+    Runs story creation as background jobs so that API workers are not held for the
+    whole LLM pipeline.
+
+    Jobs are tracked in memory per process. At most `max_concurrency` stories are
+    generated at once, further jobs stay pending until a worker frees up. Each job
+    gets its own StoryService (and db session) from `service_factory` since it
+    outlives the request that submitted it.
+    """
+    def __init__(self, service_factory: StoryServiceFactory, max_concurrency: int = Config.STORY_JOB_MAX_CONCURRENCY) -> None:
+        self._service_factory = service_factory
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._jobs: Dict[str, StoryJobDTO] = {}
+        self._results: Dict[str, StorySettingsDTO] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, create_story: CreateStoryDTO, user_id: int) -> StoryJobDTO:
+        """Queue a story creation job and return it immediately"""
+        self._prune_finished_jobs()
+        now = datetime.now(timezone.utc)
+        job = StoryJobDTO(id=str(uuid.uuid4()), user_id=user_id, status=StoryJobStatus.PENDING, created_at=now, updated_at=now)
+        self._jobs[job.id] = job
+
+        task = asyncio.create_task(self._run(job.id, create_story))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job.model_copy()
+
+    def get_job(self, job_id: str) -> Optional[StoryJobDTO]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job else None
+
+    def get_result(self, job_id: str) -> Optional[StorySettingsDTO]:
+        return self._results.get(job_id)
+
+    async def aclose(self) -> None:
+        """Cancel jobs that are still running"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job_id: str, create_story: CreateStoryDTO) -> None:
+        job = self._jobs[job_id]
+
+        def on_progress(stage: StoryJobStage) -> None:
+            job.completed_stages.append(stage)
+            job.updated_at = datetime.now(timezone.utc)
+
+        async with self._semaphore:
+            self._update(job, status=StoryJobStatus.RUNNING)
+            try:
+                async with self._service_factory() as story_service:
+                    story = await story_service.create_story(create_story, job.user_id, on_progress=on_progress)
+                    self._results[job_id] = story
+                    self._update(job, status=StoryJobStatus.SUCCEEDED, story_id=story.id)
+            except Exception as e:
+                self._update(job, status=StoryJobStatus.FAILED, error=getattr(e, 'detail', None) or str(e))
+                return
+
+        # Generate the intro while the player looks at the new story, without holding a creation slot
+        async with self._service_factory() as story_service:
+            await story_service.prefetch_intro(story)
+
+    def _update(self, job: StoryJobDTO, **changes) -> None:
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.now(timezone.utc)
+
+    def _prune_finished_jobs(self) -> None:
+        expiry = datetime.now(timezone.utc) - timedelta(seconds=Config.STORY_JOB_RETENTION_SECONDS)
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in (StoryJobStatus.SUCCEEDED, StoryJobStatus.FAILED) and job.updated_at < expiry]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
@@ -1,16 +1,32 @@
+import asyncio
 from importlib import metadata
-from typing import Optional, Set
+import logging
+import re
+from typing import Callable, Dict, Optional, Set
 import uuid
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel
 from server.db.vector_store import VectorStore
-from server.src.models.story import CreateStoryDTO, StorySettingsDTO, TagDTO, TagsResponseDTO, WorldDTO
+from server.src.models.enums import Config, StoryJobStage
+from server.src.models.story import CreateStoryDTO, StorySettingsDTO, TagDTO, TagsResponseDTO, WorldDTO, chunk_story_settings, process_story
 from server.src.repository.story_repository import IStoryRepository
 from server.db.models import UserStoryDB, WorldDB
 from server.src.exceptions import LLMResponseException
 from server.src.repository.world_repository import IWorldRepository
 from server.src.service.llm_service import LLMService
+from server.src.service.world_pool_service import WorldPool
+
+logger = logging.getLogger(__name__)
+
+# Intro generations running in this process by story id, so a session started meanwhile waits for them
+_intro_prefetches: Dict[int, "asyncio.Future[None]"] = {}
+
+async def wait_for_intro_prefetch(story_id: int) -> None:
+    """Wait until the intro prefetch of a story running in this process, if any, is done"""
+    future = _intro_prefetches.get(story_id)
+    if future is not None:
+        await asyncio.shield(future)
 
 def convert_user_story_to_story_settings(user_story: UserStoryDB, world: WorldDTO) -> StorySettingsDTO:
     return StorySettingsDTO(id=user_story.id, user_id=user_story.user_id, title=user_story.title, tag_id=user_story.tag_id, world=world) # type: ignore
@@ -18,12 +34,18 @@ def convert_user_story_to_story_settings(user_story: UserStoryDB, world: WorldDT
 def convertToJson(obj: BaseModel, include_attributes: Optional[Set[str]] = None, exclude_attributes: Optional[Set[str]] = None):
         return obj.model_dump_json(include=include_attributes, exclude=exclude_attributes, indent=4)
 
+def is_generic_prompt(prompt: str) -> bool:
+    """True if the prompt does not ask for anything specific (empty or a stock phrase like 'surprise me')"""
+    normalized = re.sub(r"[^a-z' ]", "", prompt.lower()).strip()
+    return normalized in Config.GENERIC_PROMPTS
+
 class StoryService:
-    def __init__(self, repository: IStoryRepository, world_repository: IWorldRepository, llm_service: LLMService, vector_store: VectorStore) -> None:
+    def __init__(self, repository: IStoryRepository, world_repository: IWorldRepository, llm_service: LLMService, vector_store: VectorStore, world_pool: Optional[WorldPool] = None) -> None:
         self.story_repository = repository
         self.world_repository = world_repository
         self._llm_service = llm_service
         self._vector_store = vector_store
+        self._world_pool = world_pool
 
     async def get_tags(self) -> Optional[TagsResponseDTO]:
         """ Fetch all story tags
@@ -43,14 +65,16 @@ class StoryService:
         except Exception as e:
             raise e
     
-    async def create_story(self, create_story: CreateStoryDTO, user_id: int) -> StorySettingsDTO:
+    async def create_story(self, create_story: CreateStoryDTO, user_id: int, on_progress: Optional[Callable[[StoryJobStage], None]] = None) -> StorySettingsDTO:
         """
         Creates a new user story by generating a fictional world using an LLM,
         saving the world and story settings to the database, and returning the configuration.
+        Generic prompts claim a pre-generated world from the world pool when one is available.
 
         Args:
             create_story (CreateStoryDTO): Data transfer object containing tag_id and prompt.
             user_id (int): The ID of the user creating the story.
+            on_progress (Optional[Callable[[StoryJobStage], None]]): Called with each creation stage once it completes.
 
         Returns:
             StorySettingsDTO: The newly created story's settings, including world details.
@@ -63,8 +87,16 @@ class StoryService:
         try:
             tag = self.story_repository.get_tag_by_id(create_story.tag_id)
             if tag:
-                # Generate world data based on the tag and user prompt
-                world: Optional[WorldDTO] = self._llm_service.create_world(tag=tag.tag, prompt=create_story.prompt) # type: ignore
+                world: Optional[WorldDTO] = None
+                # Generic prompts are served from the pre-generated world pool when possible
+                if self._world_pool and is_generic_prompt(create_story.prompt):
+                    world = self._world_pool.claim(self.world_repository, tag.id) # type: ignore
+                    if world and on_progress:
+                        for stage in (StoryJobStage.SETTING, StoryJobStage.LOCATIONS, StoryJobStage.CHARACTERS):
+                            on_progress(stage)
+                if not world:
+                    # Generate world data based on the tag and user prompt
+                    world = await self._llm_service.create_world(tag=tag.tag, prompt=create_story.prompt, on_progress=on_progress) # type: ignore
                 if not world:
                     raise LLMResponseException("Could not generate world!")
                 world_to_save: WorldDB = WorldDB(world=convertToJson(world, exclude_attributes={"id"}))
@@ -77,13 +109,37 @@ class StoryService:
                 if user_story and saved_world:
                     world.id = saved_world.id # type: ignore
                     story_settings: StorySettingsDTO = convert_user_story_to_story_settings(user_story, world)
-                    story_settings_text = story_settings.model_dump_json(indent=2)
                     metadata = {"user_id": str(story_settings.user_id), "title": story_settings.title}
-                    self._vector_store.add_story_settings(story_id=str(story_settings.id), text=story_settings_text, metadata=metadata)
+                    # Embedding the world chunks runs off the event loop, like every vector store call
+                    await asyncio.to_thread(self._vector_store.add_story_settings, story_id=str(story_settings.id), chunks=chunk_story_settings(world), metadata=metadata)
+                    if on_progress:
+                        on_progress(StoryJobStage.INDEXED)
                     return story_settings
                 else:
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot create story")
             else:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No tag found")
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    async def prefetch_intro(self, story: StorySettingsDTO) -> None:
+        """
+        Speculatively generates the chat introduction of a newly created story and caches it,
+        so that starting a session does not wait on the LLM.
+
+        The intro only depends on the story's world. Failures are logged, `start_session`
+        generates the intro live on a cache miss. A session started while the prefetch runs
+        waits for it, unless it runs in another process or has not begun yet: the intro is
+        then generated twice.
+        """
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        _intro_prefetches[story.id] = future # type: ignore[index]
+        try:
+            intro: str = await self._llm_service.start_chat(process_story(story))
+            if len(intro) > 0:
+                self.story_repository.save_intro(story.id, intro)
+        except Exception:
+            logger.exception("Could not prefetch the intro of story %s", story.id)
+        finally:
+            _intro_prefetches.pop(story.id, None) # type: ignore[arg-type]
+            future.set_result(None)
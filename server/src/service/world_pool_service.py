@@ -0,0 +1,127 @@
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from server.db.db import SessionLocal
+from server.src.models.enums import Config
+from server.src.models.metrics import WorldPoolStats
+from server.src.models.story import WorldDTO
+from server.src.repository.story_repository_impl import StoryRepository
+from server.src.repository.world_repository import IWorldRepository
+from server.src.repository.world_repository_impl import WorldRepository
+from server.src.service.llm_client_pool import LLMClientPool
+from server.src.service.llm_service import LLMService
+
+
+class WorldPool:
+    """
+    Stock of pre-generated worlds per tag, used to start stories instantly.
+
+    A background filler keeps up to `size` worlds per tag in the `world_pool` table,
+    generating them only while the LLM pool is quiet (off-peak) so that it never
+    competes with player traffic. Stories created with a generic prompt claim a
+    pooled world instead of generating one inline.
+    """
+    def __init__(self, llm_pool: LLMClientPool, llm_service: LLMService, session_factory: Callable[[], Session] = SessionLocal,
+                 size: int = Config.WORLD_POOL_SIZE, tags: Optional[List[str]] = None) -> None:
+        self._llm_pool = llm_pool
+        self._llm_service = llm_service
+        self._session_factory = session_factory
+        self._size = size
+        self._tags: List[str] = tags if tags is not None else list(Config.WORLD_POOL_TAGS)
+        self._task: Optional[asyncio.Task] = None
+        self._hits = 0
+        self._misses = 0
+        self._generated = 0
+        self._refill_errors = 0
+        self._last_error: Optional[str] = None
+
+    def claim(self, world_repository: IWorldRepository, tag_id: int) -> Optional[WorldDTO]:
+        """Take a pooled world for tag_id, or None if the pool is empty"""
+        world = world_repository.claim_pooled_world(tag_id)
+        if world is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        properties = json.loads(world) if isinstance(world, str) else world
+        properties['id'] = -1
+        return WorldDTO.model_validate(properties)
+
+    def _is_off_peak(self) -> bool:
+        return self._llm_pool.stats().in_flight <= Config.WORLD_POOL_OFF_PEAK_MAX_IN_FLIGHT
+
+    async def refill_once(self) -> int:
+        """
+        Top up the stock of every pooled tag, one world at a time, stopping as soon as
+        the LLM pool is busy.
+
+        Returns:
+            int: Number of worlds generated
+        """
+        generated = 0
+        db = self._session_factory()
+        try:
+            story_repository = StoryRepository(db)
+            world_repository = WorldRepository(db)
+            tag_ids: Dict[str, int] = {str(tag.tag): int(tag.id) for tag in story_repository.get_tags() or []} # type: ignore
+            for tag in self._tags:
+                tag_id = tag_ids.get(tag)
+                if tag_id is None:
+                    continue
+                while world_repository.count_pooled_worlds(tag_id) < self._size:
+                    if not self._is_off_peak():
+                        return generated
+                    world = await self._llm_service.create_world(tag=tag, prompt=Config.WORLD_POOL_PROMPT)
+                    if world is None:
+                        break
+                    world_repository.add_pooled_world(tag_id, world.model_dump_json(exclude={"id"}, indent=4))
+                    generated += 1
+                    self._generated += 1
+            return generated
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Start the background filler"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refill_once()
+            except Exception as e:
+                self._refill_errors += 1
+                self._last_error = str(e)
+            await asyncio.sleep(Config.WORLD_POOL_REFILL_INTERVAL_SECONDS)
+
+    def stats(self) -> WorldPoolStats:
+        stock: Dict[str, int] = {}
+        db = self._session_factory()
+        try:
+            story_repository = StoryRepository(db)
+            world_repository = WorldRepository(db)
+            for tag in story_repository.get_tags() or []:
+                if tag.tag in self._tags:
+                    stock[str(tag.tag)] = world_repository.count_pooled_worlds(tag.id) # type: ignore
+        finally:
+            db.close()
+        requests = self._hits + self._misses
+        return WorldPoolStats(
+            enabled=self._task is not None,
+            target_size=self._size,
+            stock=stock,
+            hits=self._hits,
+            misses=self._misses,
+            hit_rate=self._hits / requests if requests else 0.0,
+            generated=self._generated,
+            refill_errors=self._refill_errors,
+            last_error=self._last_error
+        )
@@ -1,8 +1,19 @@
+import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+
+# Chat models are built at app startup, tests run against the local fake backend
+os.environ.setdefault("LLM_BACKEND", "fake")
+# The vector store is opened at app startup, in a scratch directory and without loading the embedding model
+os.environ.setdefault("VECTOR_STORE_URL", tempfile.mkdtemp(prefix="vector_store_"))
+os.environ.setdefault("VECTOR_STORE_WARMUP", "false")
+os.environ.setdefault("EMBEDDING_WORKERS", "0")
+os.environ.setdefault("EMBEDDING_QUEUE_ENABLED", "false")
+
 from server.src.app import app
 from server.db.db import get_db
 from server.db.models import UserDB, Base
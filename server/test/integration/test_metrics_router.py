@@ -0,0 +1,15 @@
+import pytest
+from fastapi import status
+
+
+class TestMetricsRouter:
+    """Integration tests for Metrics router"""
+
+    @pytest.mark.parametrize("path", ["/metrics/llm_pool", "/metrics/world_pool", "/metrics/embedding_cache", "/metrics/embedding_queue", "/metrics/lexical_index"])
+    def test_metrics_require_authentication(self, client, path):
+        """Test metrics endpoints reject requests without a token"""
+        # Act
+        response = client.get(path)
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,226 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from server.src.models.chat import ChatMessage, ChatSession
+from server.src.service import ChatService
+
+
+class TestChatService:
+    """Unit tests for ChatService"""
+
+    @pytest.fixture
+    def mock_story_repository(self):
+        repository = Mock()
+        repository.get_story.return_value = None
+        return repository
+
+    @pytest.fixture
+    def mock_chat_repository(self):
+        repository = Mock()
+        repository.get_message_count.return_value = 1
+        repository.get_messages.return_value = []
+        repository.get_summaries.return_value = []
+        return repository
+
+    @pytest.fixture
+    def mock_llm_service(self):
+        return Mock()
+
+    @pytest.fixture
+    def mock_vector_store(self):
+        vector_store = Mock()
+        vector_store.retrieve_context.return_value = {"settings": [[]], "chat_history": [[]]}
+        return vector_store
+
+    @pytest.fixture
+    def chat_service(self, mock_story_repository, mock_chat_repository, mock_llm_service, mock_vector_store):
+        return ChatService(mock_story_repository, mock_chat_repository, mock_llm_service, mock_vector_store)
+
+    @pytest.fixture
+    def user_msg(self):
+        return ChatMessage(story_id=1, user_id=1, session_id=1, role='human', content="I open the door")
+
+    @pytest.mark.asyncio
+    async def test_stream_message_yields_tokens_then_saved_message(self, chat_service, mock_chat_repository, mock_llm_service, user_msg):
+        """Test tokens are streamed as they arrive and the full reply is saved at the end"""
+        # Arrange
+        async def fake_stream(context, messages, content):
+            for token in ["You ", "see ", "a dragon."]:
+                yield token
+
+        mock_llm_service.stream_message = fake_stream
+        saved = ChatMessage(id=2, story_id=1, user_id=1, session_id=1, role='ai', content="You see a dragon.")
+        mock_chat_repository.save_message.side_effect = [user_msg, saved]
+
+        # Act
+        events = [event async for event in chat_service.stream_message(user_msg, MagicMock())]
+
+        # Assert
+        assert [event.event for event in events] == ['token', 'token', 'token', 'message']
+        assert events[-1].data == saved
+        llm_row = mock_chat_repository.save_message.call_args_list[-1].args[0]
+        assert llm_row.content == "You see a dragon."
+        assert llm_row.role == 'ai'
+
+    @pytest.mark.asyncio
+    async def test_retrieval_does_not_block_event_loop(self, chat_service, mock_vector_store, user_msg):
+        """Test a slow query embedding leaves the event loop free for other streams"""
+        # Arrange
+        def slow_retrieval(**kwargs):
+            time.sleep(0.3)
+            return {"settings": [[]], "chat_history": [[]]}
+
+        mock_vector_store.retrieve_context.side_effect = slow_retrieval
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        # Act
+        await asyncio.gather(ticker(), chat_service._prepare_turn(user_msg, MagicMock()))
+
+        # Assert
+        assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.25
+
+    @pytest.mark.asyncio
+    async def test_stream_message_reports_error_event(self, chat_service, mock_chat_repository, mock_llm_service, user_msg):
+        """Test failures during streaming surface as an error event and nothing is saved for the llm"""
+        # Arrange
+        async def failing_stream(context, messages, content):
+            yield "You "
+            raise RuntimeError("model unavailable")
+
+        mock_llm_service.stream_message = failing_stream
+
+        # Act
+        events = [event async for event in chat_service.stream_message(user_msg, MagicMock())]
+
+        # Assert
+        assert events[-1].event == 'error'
+        assert "model unavailable" in events[-1].data
+        mock_chat_repository.save_message.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_start_session_serves_cached_intro(self, chat_service, mock_story_repository, mock_chat_repository, mock_llm_service):
+        """Test starting a session uses the intro prefetched at story creation"""
+        # Arrange
+        mock_chat_repository.create_session.return_value = ChatSession(id=3, story_id=1, user_id=1)
+        mock_story_repository.get_story.return_value = Mock()
+        mock_story_repository.get_intro.return_value = "You wake up on a ship."
+        mock_chat_repository.save_message.side_effect = lambda message: ChatMessage.model_validate(message)
+
+        # Act
+        result = await chat_service.start_session(story_id=1, user_id=1)
+
+        # Assert
+        assert result.content == "You wake up on a ship."
+        mock_llm_service.start_chat.assert_not_called()
+        mock_chat_repository.update_has_started_for_chat_session.assert_called_once_with(3)
+
+    @pytest.mark.asyncio
+    async def test_start_session_generates_intro_on_cache_miss(self, chat_service, mock_story_repository, mock_chat_repository, mock_llm_service):
+        """Test the intro is generated live and cached when it was not prefetched"""
+        # Arrange
+        mock_chat_repository.create_session.return_value = ChatSession(id=3, story_id=1, user_id=1)
+        mock_story_repository.get_story.return_value = Mock()
+        mock_story_repository.get_intro.return_value = None
+        mock_llm_service.start_chat = AsyncMock(return_value="You stand at the gates.")
+        mock_chat_repository.save_message.side_effect = lambda message: ChatMessage.model_validate(message)
+
+        with patch('server.src.service.chat_service.process_story', return_value={}):
+            # Act
+            result = await chat_service.start_session(story_id=1, user_id=1)
+
+        # Assert
+        assert result.content == "You stand at the gates."
+        mock_story_repository.save_intro.assert_called_once_with(1, "You stand at the gates.")
+
+    @pytest.mark.asyncio
+    async def test_start_session_waits_for_running_prefetch(self, chat_service, mock_story_repository, mock_chat_repository, mock_llm_service):
+        """Test a session started while the intro is prefetched waits for it instead of generating it again"""
+        # Arrange
+        from server.src.service import StoryService
+
+        intros = {}
+        mock_chat_repository.create_session.return_value = ChatSession(id=3, story_id=1, user_id=1)
+        mock_story_repository.get_story.return_value = Mock()
+        mock_story_repository.get_intro.side_effect = lambda story_id: intros.get(story_id)
+        mock_story_repository.save_intro.side_effect = lambda story_id, intro: intros.update({story_id: intro})
+        mock_chat_repository.save_message.side_effect = lambda message: ChatMessage.model_validate(message)
+
+        async def slow_intro(world):
+            await asyncio.sleep(0.05)
+            return "You wake up on a ship."
+
+        mock_llm_service.start_chat = AsyncMock(side_effect=slow_intro)
+        story_service = StoryService(mock_story_repository, Mock(), mock_llm_service, Mock())
+
+        with patch('server.src.service.story_service.process_story', return_value={}):
+            # Act
+            prefetch = asyncio.create_task(story_service.prefetch_intro(Mock(id=1)))
+            await asyncio.sleep(0)
+            result = await chat_service.start_session(story_id=1, user_id=1)
+            await prefetch
+
+        # Assert
+        assert result.content == "You wake up on a ship."
+        mock_llm_service.start_chat.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_prefetch_is_logged(self, mock_story_repository, mock_llm_service, caplog):
+        """Test an intro prefetch failure is logged rather than raised"""
+        from server.src.service import StoryService
+
+        mock_llm_service.start_chat = AsyncMock(side_effect=RuntimeError("model unavailable"))
+        story_service = StoryService(mock_story_repository, Mock(), mock_llm_service, Mock())
+
+        with patch('server.src.service.story_service.process_story', return_value={}):
+            await story_service.prefetch_intro(Mock(id=1))
+
+        assert "Could not prefetch the intro of story 1" in caplog.text
+        mock_story_repository.save_intro.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_message_schedules_summary_and_uses_it(self, chat_service, mock_chat_repository, mock_llm_service, user_msg):
+        """Test the session summary is sent with the prompt and compacted every SUMMARY_INTERVAL messages"""
+        # Arrange
+        from server.src.models.chat import SessionSummary
+        from server.src.models.enums import Config
+        mock_chat_repository.get_message_count.return_value = Config.SUMMARY_INTERVAL
+        mock_chat_repository.get_summaries.return_value = [
+            SessionSummary(id=1, session_id=1, level=1, content="You left the village.", start_message_id=1, end_message_id=80),
+            SessionSummary(id=5, session_id=1, level=0, content="You met the ferryman.", start_message_id=81, end_message_id=100)
+        ]
+        mock_llm_service.send_message = AsyncMock(return_value="The ferryman nods.")
+        background_tasks = MagicMock()
+
+        # Act
+        await chat_service.send_message(user_msg, background_tasks)
+
+        # Assert
+        context = mock_llm_service.send_message.call_args.args[0]
+        assert context['summary'] == "You left the village.\n\nYou met the ferryman."
+        background_tasks.add_task.assert_any_call(chat_service._session_memory.compact, user_msg.session_id)
+
+    @pytest.mark.asyncio
+    async def test_delete_session_drops_memory_of_owner_only(self, chat_service, mock_chat_repository, mock_vector_store):
+        """Test a session is deleted with its vector partition only by the user who owns it"""
+        mock_chat_repository.get_session.return_value = ChatSession(id=3, story_id=1, user_id=1)
+
+        assert await chat_service.delete_session(3, user_id=2) is False
+        mock_chat_repository.delete_session.assert_not_called()
+
+        assert await chat_service.delete_session(3, user_id=1) is True
+        mock_chat_repository.delete_session.assert_called_once_with(3)
+        mock_vector_store.delete_session.assert_called_once_with("3")
+
+    def test_stream_event_sse_format(self, user_msg):
+        """Test stream events serialize to the SSE wire format"""
+        from server.src.models.chat import ChatStreamEvent
+
+        assert ChatStreamEvent(event='token', data="line\nbreak").to_sse() == 'event: token\ndata: "line\\nbreak"\n\n'
+        assert ChatStreamEvent(event='message', data=user_msg).to_sse().startswith('event: message\ndata: {')
@@ -0,0 +1,114 @@
+import hashlib
+from typing import List
+
+import numpy as np
+import pytest
+
+from server.db.embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    """Deterministic embedder counting the texts it embeds"""
+    def __init__(self, model: str = "counting") -> None:
+        self.model = model
+        self.calls: List[List[str]] = []
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        self.calls.append(list(input))
+        return [[byte / 255 for byte in hashlib.sha256(f"{self.model}{text}".encode()).digest()[:8]] for text in input]
+
+    def name(self) -> str:
+        return self.model
+
+
+class TestEmbeddingCache:
+    """Unit tests for EmbeddingCache"""
+
+    @pytest.fixture
+    def embedder(self):
+        return CountingEmbedder()
+
+    def test_only_missing_texts_are_embedded(self, embedder):
+        """Test cached texts are served from memory and repeated misses are embedded once"""
+        # Arrange
+        cache = EmbeddingCache()
+        first = cache.embed(["a door", "a key"], embedder)
+
+        # Act
+        second = cache.embed(["a key", "a lamp", "a lamp"], embedder)
+
+        # Assert
+        assert embedder.calls == [["a door", "a key"], ["a lamp"]]
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[1], second[2])
+        stats = cache.stats()
+        assert (stats.memory_hits, stats.disk_hits, stats.misses) == (1, 0, 4)
+        assert stats.memory_entries == 3
+
+    def test_keys_include_model(self, embedder):
+        """Test the same text embedded by another model is not served from the cache"""
+        cache = EmbeddingCache()
+        other = CountingEmbedder("other")
+
+        cache.embed(["a door"], embedder)
+        cache.embed(["a door"], other)
+
+        assert other.calls == [["a door"]]
+
+    def test_memory_tier_evicts_least_recently_used(self, embedder):
+        """Test the memory tier stays within its size"""
+        cache = EmbeddingCache(memory_size=2)
+
+        cache.embed(["a", "b"], embedder)
+        cache.embed(["a"], embedder)
+        cache.embed(["c"], embedder)
+        cache.embed(["a", "b"], embedder)
+
+        assert embedder.calls == [["a", "b"], ["c"], ["b"]]
+        assert cache.stats().memory_entries == 2
+
+    def test_disk_tier_survives_restart(self, tmp_path, embedder):
+        """Test embeddings written by one cache are read back by a new one on the same path"""
+        # Arrange
+        path = str(tmp_path / "embedding_cache")
+        expected = EmbeddingCache(path).embed(["a door", "a key"], embedder)
+
+        # Act
+        restarted = EmbeddingCache(path)
+        vectors = restarted.embed(["a key", "a door"], embedder)
+
+        # Assert
+        assert embedder.calls == [["a door", "a key"]]
+        np.testing.assert_allclose(vectors[0], expected[1])
+        np.testing.assert_allclose(vectors[1], expected[0])
+        stats = restarted.stats()
+        assert (stats.disk_hits, stats.misses, stats.disk_entries) == (2, 0, 2)
+
+    def test_disk_tier_overwrites_oldest_when_full(self, tmp_path, embedder):
+        """Test the disk tier is a ring keeping the most recent embeddings"""
+        path = str(tmp_path / "embedding_cache")
+        EmbeddingCache(path, disk_capacity=2).embed(["a", "b", "c"], embedder)
+
+        restarted = EmbeddingCache(path, memory_size=0, disk_capacity=2)
+        restarted.embed(["b", "c", "a"], embedder)
+
+        assert embedder.calls[-1] == ["a"]
+        assert restarted.stats().disk_entries == 2
+
+    def test_disk_tier_is_shared_between_processes(self, tmp_path, embedder):
+        """Test caches sharing a path see each other's writes and never serve a row overwritten by the other"""
+        # Arrange: two caches on one path, as two worker processes would open it
+        path = str(tmp_path / "embedding_cache")
+        first = EmbeddingCache(path, memory_size=0, disk_capacity=2)
+        first.embed(["a", "b"], embedder)
+        second = EmbeddingCache(path, memory_size=0, disk_capacity=2)
+
+        # Act: the second cache overwrites the row holding "a"
+        expected = second.embed(["c"], embedder)[0]
+        calls = len(embedder.calls)
+        vectors = first.embed(["c", "a"], embedder)
+
+        # Assert
+        np.testing.assert_allclose(vectors[0], expected)
+        assert embedder.calls[calls:] == [["a"]]
+        np.testing.assert_allclose(vectors[1], np.asarray(embedder(["a"])[0], dtype=np.float32))
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.orm import sessionmaker
+
+from server.db.models import ChatMessageDB, ChatSessionDB
+from server.src.repository.chat_repository_impl import ChatRepository
+from server.src.service.embedding_queue_service import EmbeddingQueueWorker
+
+
+class TestEmbeddingQueueWorker:
+    """Unit tests for EmbeddingQueueWorker"""
+
+    @pytest.fixture
+    def session_factory(self, test_db_engine):
+        return sessionmaker(autocommit=False, bind=test_db_engine)
+
+    @pytest.fixture
+    def chat_repository(self, test_db):
+        return ChatRepository(test_db)
+
+    @pytest.fixture
+    def messages(self, test_db, chat_repository):
+        test_db.add(ChatSessionDB(id=1, story_id=1, user_id=1))
+        test_db.commit()
+        return [chat_repository.save_message(ChatMessageDB(story_id=1, user_id=1, session_id=1, role='human', content=f"Turn {i}",
+                                                      created_at=datetime(2026, 10, 18, 10, i, tzinfo=timezone.utc))) for i in range(3)]
+
+    @pytest.fixture
+    def vector_store(self):
+        vector_store = Mock()
+        vector_store.add_chat_messages.return_value = []
+        return vector_store
+
+    @pytest.mark.asyncio
+    async def test_drain_embeds_every_saved_message(self, session_factory, chat_repository, messages, vector_store):
+        """Test saved messages are queued, embedded in one batch and the session watermark advances"""
+        worker = EmbeddingQueueWorker(vector_store, session_factory=session_factory, batch_size=10)
+
+        assert chat_repository.count_pending_embeddings(max_attempts=5) == (3, 0)
+        drained = await worker.drain_once()
+
+        assert drained == 3
+        assert [message.id for message in vector_store.add_chat_messages.call_args.args[0]] == [message.id for message in messages]
+        assert chat_repository.count_pending_embeddings(max_attempts=5) == (0, 0)
+        assert chat_repository.get_session(1).embedded_at == messages[-1].created_at
+        assert await worker.drain_once() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_messages_stay_queued(self, session_factory, chat_repository, messages, vector_store):
+        """Test messages the vector store rejects are retried, then given up after max attempts"""
+        # Arrange
+        vector_store.add_chat_messages.return_value = [str(messages[1].id)]
+        worker = EmbeddingQueueWorker(vector_store, session_factory=session_factory, batch_size=10, max_attempts=2)
+
+        # Act
+        await worker.drain_once()
+
+        # Assert: only the message before the failed one is covered by the watermark
+        assert chat_repository.count_pending_embeddings(max_attempts=2) == (1, 0)
+        assert chat_repository.get_session(1).embedded_at == messages[0].created_at < messages[1].created_at
+        assert [message.id for message in chat_repository.get_pending_embeddings(limit=10, max_attempts=2)] == [messages[1].id]
+
+        await worker.drain_once()
+
+        assert chat_repository.count_pending_embeddings(max_attempts=2) == (0, 1)
+        assert await worker.drain_once() == 0
+        stats = worker.stats()
+        assert (stats.embedded, stats.failed, stats.dead) == (2, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_vector_store_error_keeps_whole_batch(self, session_factory, chat_repository, messages, vector_store):
+        """Test a vector store error leaves the batch queued with the error recorded"""
+        vector_store.add_chat_messages.side_effect = RuntimeError("chroma is down")
+        worker = EmbeddingQueueWorker(vector_store, session_factory=session_factory, batch_size=10)
+
+        await worker.drain_once()
+
+        assert chat_repository.count_pending_embeddings(max_attempts=5) == (3, 0)
+        assert chat_repository.get_session(1).embedded_at is None
+        assert worker.stats().last_error == "chroma is down"
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+import time
+from typing import List
+
+import pytest
+
+from server.db.embedding_worker import EmbeddingWorkerPool
+from server.src.exceptions import DatabaseError
+
+
+class BatchSizeEmbedder:
+    """Embeds each text as [batch size, text length], sleeping `delay_s` per batch"""
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        if input == ["warm up"]:
+            return [[1.0, 7.0]]
+        if "boom" in input:
+            raise ValueError("model failed")
+        if "crash" in input:
+            os._exit(1)
+        time.sleep(self.delay_s)
+        return [[float(len(input)), float(len(text))] for text in input]
+
+    def name(self) -> str:
+        return "batch-size"
+
+
+class TestEmbeddingWorkerPool:
+    """Unit tests for EmbeddingWorkerPool"""
+
+    def test_concurrent_calls_are_batched(self):
+        """Test calls waiting together are embedded as one batch and each gets its own vectors"""
+        pool = EmbeddingWorkerPool(BatchSizeEmbedder(), workers=1, max_batch_size=64, max_wait_ms=500)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as threads:
+                results = list(threads.map(pool, [["a"], ["bb", "ccc"], ["dddd"], ["eeeee"]]))
+
+            assert [[vector[1] for vector in result] for result in results] == [[1.0], [2.0, 3.0], [4.0], [5.0]]
+            assert max(vector[0] for result in results for vector in result) > 1
+            assert pool.name() == "batch-size"
+        finally:
+            pool.close()
+
+    def test_errors_reach_callers(self):
+        """Test a failing batch raises in every caller of that batch"""
+        pool = EmbeddingWorkerPool(BatchSizeEmbedder(), workers=1, max_wait_ms=0)
+        try:
+            with pytest.raises(ValueError):
+                pool(["boom"])
+            assert pool(["ok"])[0][1] == 2.0
+        finally:
+            pool.close()
+
+    def test_full_queue_applies_backpressure(self):
+        """Test callers are rejected once the workers are saturated and the queue is full"""
+        # Arrange: one worker, so two batches in flight, one held by the dispatcher and one queued
+        pool = EmbeddingWorkerPool(BatchSizeEmbedder(delay_s=1.0), workers=1, max_batch_size=1, max_wait_ms=0, queue_size=1, submit_timeout_s=0.05)
+        threads = ThreadPoolExecutor(max_workers=4)
+        try:
+            pending = [threads.submit(pool, [f"text {i}"]) for i in range(4)]
+            time.sleep(0.3)
+
+            # Act / Assert
+            with pytest.raises(DatabaseError):
+                pool(["one too many"])
+            assert all(len(future.result()) == 1 for future in pending)
+        finally:
+            threads.shutdown()
+            pool.close()
+
+    def test_workers_restart_after_a_crash(self):
+        """Test a worker process dying fails its batch only, later calls are embedded by new workers"""
+        pool = EmbeddingWorkerPool(BatchSizeEmbedder(), workers=1, max_wait_ms=0)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                pool(["crash"])
+            assert pool(["ok"])[0][1] == 2.0
+        finally:
+            pool.close()
@@ -0,0 +1,112 @@
+import pytest
+from unittest.mock import MagicMock, Mock
+
+from server.src.models.chat import ChatMessage
+from server.src.models.story import (CharactersDTO, EntityIndex, FantasyCharacterDTO, FantasyLocationDTO, FantasyWorldSettingDTO,
+                                     LocationsDTO, PowerSystem, StorySettingsDTO, WorldDTO, chunk_story_settings, process_story)
+
+
+def _character(name: str, backstory: str = "none", is_protagonist: bool = False) -> FantasyCharacterDTO:
+    return FantasyCharacterDTO(name=name, personality="calm", backstory=backstory, age="30", appearance="tall", occupation="smith",
+                               race="human", gender="female", is_protagonist=is_protagonist, role="friend", abilities=[])
+
+def _location(name: str) -> FantasyLocationDTO:
+    return FantasyLocationDTO(name=name, description="A place", type="town", government_type="monarchy")
+
+
+class TestEntityIndex:
+    """Unit tests for EntityIndex"""
+
+    @pytest.fixture
+    def world(self):
+        return WorldDTO(
+            id=1,
+            setting=FantasyWorldSettingDTO(name="Eldoria", description="Islands above the clouds", power_systems=[]),
+            locations=LocationsDTO(locations=[_location("The Whispering Woods"), _location("Silver Harbor"), _location("Silver")]),
+            characters=CharactersDTO(characters=[
+                _character("Kael Stormborn", backstory="Raised by Mira Voss in Silver Harbor", is_protagonist=True),
+                _character("Mira Voss"),
+                _character("Lady Arianna Dusk"),
+                _character("Tobin Reed"),
+            ])
+        )
+
+    @pytest.fixture
+    def index(self, world):
+        return EntityIndex(world)
+
+    def test_match_names_and_aliases(self, index):
+        """Test entities are found by full name, first or last name, and without leading article"""
+        characters, locations = index.match(["You follow tobin into whispering woods.", "Voss waves."])
+
+        assert [character.name for character in characters] == ["Tobin Reed", "Mira Voss"]
+        assert [location.name for location in locations] == ["The Whispering Woods"]
+
+    def test_match_whole_words_longest_alias_first(self, index):
+        """Test aliases only match whole words and longer names win"""
+        characters, locations = index.match(["Ariadne sails to Silver Harbor"])
+
+        assert characters == []
+        assert [location.name for location in locations] == ["Silver Harbor"]
+
+    def test_world_documents_only_include_mentioned_entities(self, index):
+        """Test the world context holds the setting, the protagonist and mentioned entities only"""
+        documents = index.world_documents(["Ask Arianna about the storm"])
+
+        assert len(documents) == 3
+        assert documents[0].startswith("World: ") and "Eldoria" in documents[0]
+        assert documents[1].startswith("Protagonist: ") and "Kael Stormborn" in documents[1]
+        assert documents[2].startswith("Character: ") and "Lady Arianna Dusk" in documents[2]
+
+    def test_process_story_keeps_entities_related_to_protagonist(self, world):
+        """Test the intro only receives the characters and locations tied to the protagonist"""
+        story = StorySettingsDTO(id=1, user_id=1, title="Eldoria", tag_id=1, world=world)
+
+        result = process_story(story)
+
+        assert result["protagonist"].name == "Kael Stormborn"
+        assert [character.name for character in result["characters"]] == ["Mira Voss"]
+        assert [location.name for location in result["locations"]] == ["Silver Harbor"]
+
+    def test_chunk_story_settings(self, world):
+        """Test a world is split into one typed chunk per section, power system, location and character"""
+        world.setting.power_systems = [PowerSystem(name="Skyweaving", description="Wind magic", rules=[], limitations=[], abilities=[])]
+
+        chunks = chunk_story_settings(world)
+
+        assert [(chunk_type, name) for chunk_type, name, _ in chunks] == [
+            ('setting', "Eldoria"), ('power_system', "Skyweaving"),
+            ('location', "The Whispering Woods"), ('location', "Silver Harbor"), ('location', "Silver"),
+            ('protagonist', "Kael Stormborn"), ('character', "Mira Voss"), ('character', "Lady Arianna Dusk"), ('character', "Tobin Reed")
+        ]
+        assert "Skyweaving" not in chunks[0][2]
+        assert chunks[1][2].startswith("Power system: ")
+
+    @pytest.mark.asyncio
+    async def test_chat_turn_uses_entity_context(self, world):
+        """Test a chat turn sends the mentioned entities first, then the retrieved setting chunks"""
+        from server.src.service import ChatService
+        from server.src.service import chat_service as chat_service_module
+
+        # Arrange
+        chat_service_module._entity_indexes.clear()
+        story_repository = Mock()
+        story_repository.get_story.return_value = StorySettingsDTO(id=1, user_id=1, title="Eldoria", tag_id=1, world=world)
+        chat_repository = Mock()
+        chat_repository.get_message_count.return_value = 1
+        chat_repository.get_summaries.return_value = []
+        chat_repository.get_messages.return_value = [ChatMessage(id=1, story_id=1, user_id=1, session_id=1, role='ai', content="Tobin waits.", token_count=3)]
+        vector_store = Mock()
+        vector_store.retrieve_context.return_value = {"settings": [["Power system: {}", 'Character: {"name": "Tobin Reed"}']], "chat_history": [[]]}
+        chat_service = ChatService(story_repository, chat_repository, Mock(), vector_store)
+        user_msg = ChatMessage(story_id=1, user_id=1, session_id=1, role='human', content="I greet Mira")
+
+        # Act
+        context, _, _ = await chat_service._prepare_turn(user_msg, MagicMock())
+        await chat_service._prepare_turn(user_msg, MagicMock())
+
+        # Assert
+        assert [document.split(":")[0] for document in context['settings'][0]] == ["World", "Protagonist", "Character", "Character", "Power system", "Character"]
+        assert "Mira Voss" in context['settings'][0][2] and "Tobin Reed" in context['settings'][0][3]
+        story_repository.get_story.assert_called_once_with(1)
+        chat_service_module._entity_indexes.clear()
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from server.src.models.enums import StoryJobStage, Tags
+from server.src.models.story import StorySettingsDTO, process_story
+from server.src.service import LLMService
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.fake_llm import FakeChatModel
+from server.src.service.llm_client_pool import LLMClientPool, get_model_factory
+
+
+def _llm_service(**settings) -> LLMService:
+    pool = LLMClientPool(model_factory=lambda model_name, temperature: FakeChatModel(**settings))
+    registry = ChainRegistry(pool)
+    registry.build()
+    return LLMService(pool, registry)
+
+
+class TestFakeChatModel:
+    """Unit tests for the fake LLM backend"""
+
+    @pytest.fixture
+    def llm_service(self):
+        return _llm_service(latency_ms=0, latency_jitter_ms=0, tokens_per_second=0)
+
+    @pytest.fixture
+    def context(self):
+        return {"settings": [[]], "chat_history": [[]]}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tag", list(Tags))
+    async def test_create_world_returns_valid_world(self, llm_service, tag):
+        """Test every tag produces a schema-valid world with exactly one protagonist"""
+        # Arrange
+        stages = []
+
+        # Act
+        world = await llm_service.create_world(tag=tag, prompt="a city under the sea", on_progress=stages.append)
+
+        # Assert
+        assert world is not None
+        assert [character.is_protagonist for character in world.characters.characters].count(True) == 1
+        assert stages == [StoryJobStage.SETTING, StoryJobStage.LOCATIONS, StoryJobStage.CHARACTERS]
+
+    @pytest.mark.asyncio
+    async def test_output_is_deterministic(self, llm_service, context):
+        """Test the same input always yields the same output"""
+        first_world = await llm_service.create_world(tag=Tags.MYSTERY, prompt="a manor at night")
+        second_world = await llm_service.create_world(tag=Tags.MYSTERY, prompt="a manor at night")
+        first_reply = await llm_service.send_message(context, [], "open the door")
+        second_reply = await llm_service.send_message(context, [], "open the door")
+
+        assert first_world == second_world
+        assert first_reply == second_reply
+        assert first_reply != await llm_service.send_message(context, [], "close the door")
+
+    @pytest.mark.asyncio
+    async def test_start_chat_and_stream_message(self, llm_service, context):
+        """Test the intro and chat replies are generated and streamed token by token"""
+        # Arrange
+        world = await llm_service.create_world(tag=Tags.FANTASY, prompt="floating islands")
+        assert world is not None
+        story = StorySettingsDTO(id=1, user_id=1, title=world.setting.name, tag_id=1, world=world)
+
+        # Act
+        intro = await llm_service.start_chat(process_story(story))
+        tokens = [token async for token in llm_service.stream_message(context, [], "look around")]
+
+        # Assert
+        assert intro
+        assert len(tokens) > 1
+        assert "".join(tokens) == await llm_service.send_message(context, [], "look around")
+
+    @pytest.mark.asyncio
+    async def test_latency_and_token_rate(self, context):
+        """Test replies take the configured time to first token plus generation time"""
+        llm_service = _llm_service(latency_ms=100, latency_jitter_ms=0, tokens_per_second=200, tokens_per_second_jitter=0)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[llm_service.send_message(context, [], f"action {i}") for i in range(4)])
+        elapsed = time.perf_counter() - start
+
+        longest = max(len(result.split()) for result in results)
+        assert 0.1 + longest / 200 <= elapsed < 0.1 + longest / 200 + 0.3
+
+    def test_backend_is_selected_by_config(self):
+        """Test the model factory follows the configured backend"""
+        assert isinstance(get_model_factory('fake')("any-model", 0.5), FakeChatModel)
+        with pytest.raises(ValueError):
+            get_model_factory('unknown')
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from server.db.hot_tier import HotTier
+from server.src.models.enums import VectorQuantization
+
+
+def _metadatas(ids):
+    return [{"session_id": "1", "id": id} for id in ids]
+
+
+class TestHotTier:
+    """Unit tests for HotTier"""
+
+    @pytest.fixture
+    def vectors(self):
+        return np.random.default_rng(0).normal(size=(300, 16)).astype(np.float32)
+
+    @pytest.fixture
+    def hot_tier(self, vectors):
+        hot_tier = HotTier(max_sessions=2, max_vectors=400)
+        ids = [str(i) for i in range(len(vectors))]
+        hot_tier.load("1", ids, [f"doc {i}" for i in ids], _metadatas(ids), vectors)
+        return hot_tier
+
+    def test_query_is_exact_top_k(self, hot_tier, vectors):
+        """Test results are the nearest vectors by L2 distance, nearest first"""
+        query = vectors[7] + 0.01
+
+        results = hot_tier.query("1", query, n_results=5)
+
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:5]
+        assert results["ids"] == [[str(i) for i in expected]]
+        assert results["documents"][0][0] == "doc 7"
+        assert results["distances"][0] == sorted(results["distances"][0])
+
+    def test_upsert_writes_through_and_grows(self, hot_tier):
+        """Test new and replaced documents are searchable right after they are written"""
+        new_ids = [str(i) for i in range(300, 380)]
+        new_vectors = np.full((80, 16), 50.0, dtype=np.float32)
+        new_vectors[-1] = 100.0
+
+        hot_tier.upsert("1", new_ids + ["3"], [f"new {id}" for id in new_ids] + ["replaced"], _metadatas(new_ids + ["3"]),
+                        np.vstack([new_vectors, np.full((1, 16), -100.0, dtype=np.float32)]))
+
+        assert hot_tier.query("1", np.full(16, 100.0), n_results=1)["ids"] == [["379"]]
+        assert hot_tier.query("1", np.full(16, -100.0), n_results=1)["documents"] == [["replaced"]]
+        assert len(hot_tier.query("1", np.zeros(16), n_results=1000)["ids"][0]) == 380
+
+    def test_sessions_too_large_are_left_out(self, hot_tier, vectors):
+        """Test sessions over max_vectors are not loaded, or dropped once they grow past it"""
+        ids = [str(i) for i in range(500)]
+        assert hot_tier.load("2", ids, ids, _metadatas(ids), np.zeros((500, 16))) is False
+
+        more = [str(i) for i in range(1000, 1200)]
+        hot_tier.upsert("1", more, more, _metadatas(more), np.zeros((200, 16)))
+
+        assert hot_tier.query("1", vectors[0], 1) is None
+
+    def test_least_recently_queried_session_is_evicted(self, hot_tier, vectors):
+        """Test the hot tier keeps at most max_sessions sessions"""
+        hot_tier.load("2", ["a"], ["a"], _metadatas(["a"]), vectors[:1])
+        hot_tier.query("1", vectors[0], 1)
+
+        hot_tier.load("3", ["b"], ["b"], _metadatas(["b"]), vectors[:1])
+
+        assert "1" in hot_tier and "3" in hot_tier and "2" not in hot_tier
+
+    def test_int8_quantization_keeps_neighbours_in_candidates(self, vectors):
+        """Test int8 storage is smaller and its candidates contain the exact nearest vectors"""
+        ids = [str(i) for i in range(len(vectors))]
+        full = HotTier(quantization=VectorQuantization.NONE)
+        int8 = HotTier(quantization=VectorQuantization.INT8, rerank_factor=4)
+        for hot_tier in (full, int8):
+            hot_tier.load("1", ids, ids, _metadatas(ids), vectors)
+
+        for query in vectors[:20] + 0.1:
+            expected = full.query("1", query, n_results=3)["ids"][0]
+            candidates = int8.query("1", query, n_results=3)["ids"][0]
+            assert len(candidates) == 12
+            assert set(expected) <= set(candidates)
+        assert int8.nbytes() * 2 < full.nbytes()
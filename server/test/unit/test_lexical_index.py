@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from server.db.lexical_index import LexicalIndex
+
+
+def _metadata(session_id: str = "1") -> dict:
+    return {"story_id": "1", "session_id": session_id, "role": 'ai', "created_at": "2026-10-18T10:00:00"}
+
+
+class TestLexicalIndex:
+    """Unit tests for LexicalIndex"""
+
+    @pytest.fixture
+    def index(self):
+        index = LexicalIndex()
+        index.add(["1", "2", "3", "4"],
+                  ["Thalric hands you the Ember Key.", "The tavern is quiet tonight.", "Mira asks about Thalric's key.", "Thalric sleeps."],
+                  [_metadata(), _metadata(), _metadata(), _metadata(session_id="2")])
+        yield index
+        index.close()
+
+    def test_search_finds_exact_names_in_session(self, index):
+        """Test messages are ranked by the query words they contain, within the session only"""
+        results = index.search(story_id="1", session_id="1", query="Where is the Ember key, Thalric?", n_results=5)
+
+        assert [id for id, _, _ in results] == ["1", "3"]
+        assert results[0][2]["role"] == 'ai'
+
+    def test_add_replaces_same_id(self, index):
+        """Test indexing a message again replaces it instead of duplicating it"""
+        index.add(["2"], ["The tavern burns."], [_metadata()])
+
+        assert index.search("1", "1", "tavern", 5) == [("2", "The tavern burns.", _metadata())]
+
+    def test_query_syntax_is_escaped(self, index):
+        """Test FTS5 operators in player text are searched as words"""
+        assert index.search("1", "1", 'tavern" OR NEAR(* AND', 5)[0][0] == "2"
+        assert index.search("1", "1", "...", 5) == []
+
+    def test_search_past_budget_returns_nothing(self, index):
+        """Test a search that overruns its latency budget is dropped and counted"""
+        assert index.search("1", "1", "Thalric", 5, budget_ms=0) == []
+        index.search("1", "1", "Thalric", 5)
+
+        stats = index.stats()
+        assert (stats.searches, stats.budget_overruns, stats.overrun_rate) == (2, 1, 0.5)
+
+    def test_sessions_are_partitioned_on_disk(self, tmp_path):
+        """Test each session is indexed in its own database, reopened after eviction and removed on delete"""
+        # Arrange
+        index = LexicalIndex(str(tmp_path / "fts"), max_open=1)
+        index.add(["1", "2"], ["Thalric waits.", "Thalric leaves."], [_metadata(), _metadata(session_id="2")])
+
+        # Act / Assert
+        assert index.stats().open_partitions == 1
+        assert [id for id, _, _ in index.search("1", "1", "Thalric", 5)] == ["1"]
+        assert index.search("1", "3", "Thalric", 5) == []
+        assert not os.path.exists(tmp_path / "fts" / "chat_session_3.db")
+
+        index.delete_session("1")
+
+        assert index.search("1", "1", "Thalric", 5) == []
+        assert sorted(os.listdir(tmp_path / "fts")) == ["chat_session_2.db"]
+        index.close()
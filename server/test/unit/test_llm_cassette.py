@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from server.src.models.enums import CassetteMode, CassetteTiming, Tags
+from server.src.service import LLMService
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.fake_llm import FakeChatModel
+from server.src.service.llm_cassette import CassetteMissError, CassetteStore
+from server.src.service.llm_client_pool import LLMClientPool, with_cassette
+
+LLM_LATENCY_MS = 200
+
+
+def _llm_service(cassette_path: str, mode: CassetteMode, timing: CassetteTiming = CassetteTiming.ORIGINAL) -> LLMService:
+    fake_factory = lambda model_name, temperature: FakeChatModel(latency_ms=LLM_LATENCY_MS, latency_jitter_ms=0, tokens_per_second=0)
+    pool = LLMClientPool(model_factory=with_cassette(fake_factory, mode, cassette_path, timing))
+    registry = ChainRegistry(pool)
+    registry.build()
+    return LLMService(pool, registry)
+
+
+class TestLLMCassette:
+    """Unit tests for recording and replaying LLM calls"""
+
+    @pytest.fixture
+    def cassette_path(self, tmp_path):
+        return str(tmp_path / "cassette.db")
+
+    @pytest.fixture
+    def context(self):
+        return {"settings": [["The city floats"]], "chat_history": [[]]}
+
+    @pytest.mark.asyncio
+    async def test_replay_returns_recorded_responses(self, cassette_path, context):
+        """Test replay serves exactly what was recorded, without any model"""
+        # Arrange
+        recorder = _llm_service(cassette_path, CassetteMode.RECORD)
+        world = await recorder.create_world(tag=Tags.MYSTERY, prompt="a manor at night")
+        reply = await recorder.send_message(context, [], "open the door")
+        tokens = [token async for token in recorder.stream_message(context, [], "look around")]
+
+        # Act
+        player = _llm_service(cassette_path, CassetteMode.REPLAY, CassetteTiming.NONE)
+        start = time.perf_counter()
+        replayed_world = await player.create_world(tag=Tags.MYSTERY, prompt="a manor at night")
+        replayed_reply = await player.send_message(context, [], "open the door")
+        replayed_tokens = [token async for token in player.stream_message(context, [], "look around")]
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert replayed_world == world
+        assert replayed_reply == reply
+        assert replayed_tokens == tokens
+        assert elapsed < LLM_LATENCY_MS / 1000
+
+    @pytest.mark.asyncio
+    async def test_replay_keeps_original_timing(self, cassette_path, context):
+        """Test replay waits as long as the recorded call took"""
+        recorder = _llm_service(cassette_path, CassetteMode.RECORD)
+        await recorder.send_message(context, [], "open the door")
+        player = _llm_service(cassette_path, CassetteMode.REPLAY, CassetteTiming.ORIGINAL)
+
+        start = time.perf_counter()
+        await player.send_message(context, [], "open the door")
+        elapsed = time.perf_counter() - start
+
+        assert elapsed >= LLM_LATENCY_MS / 1000
+
+    @pytest.mark.asyncio
+    async def test_replay_matches_turn_when_prompt_changed(self, cassette_path, context):
+        """Test a turn still replays after retrieval changed the rest of the prompt"""
+        # Arrange
+        recorder = _llm_service(cassette_path, CassetteMode.RECORD)
+        reply = await recorder.send_message(context, [], "open the door")
+        player = _llm_service(cassette_path, CassetteMode.REPLAY, CassetteTiming.NONE)
+
+        # Act
+        replayed = await player.send_message({"settings": [["Other context"]], "chat_history": [[]]}, [], "open the door")
+
+        # Assert
+        assert replayed == reply
+        with pytest.raises(CassetteMissError):
+            await player.send_message(context, [], "never recorded")
+
+    def test_store_is_compressed(self, cassette_path):
+        """Test payloads are stored compressed and survive a round trip"""
+        store = CassetteStore(cassette_path)
+        payload = {'tokens': [[0.5, "word " * 200]]}
+
+        store.put("key", "turn", payload)
+
+        assert store.get("key") == payload
+        assert store.get_by_turn("turn") == payload
+        assert store.count() == 1
+        raw = store._connection.execute("SELECT length(payload) FROM cassette").fetchone()[0]
+        assert raw < len("word " * 200) / 10
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import pytest
+from unittest.mock import MagicMock, Mock
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import StoryJobStage, Tags
+from server.src.models.story import FantasyCharacterDTO, FantasyLocationDTO, FantasyWorldSettingDTO
+from server.src.service import ChatService, LLMService
+from server.src.service.chain_registry import ChainRegistry
+from server.src.service.llm_client_pool import LLMClientPool
+
+LLM_LATENCY = 0.5
+
+
+def _fantasy_character(name: str, is_protagonist: bool) -> FantasyCharacterDTO:
+    return FantasyCharacterDTO(name=name, personality="calm", backstory="none", age="30", appearance="tall", occupation="smith",
+                               race="human", gender="female", is_protagonist=is_protagonist, role="friend", abilities=[])
+
+
+class SlowFakeChatModel(BaseChatModel):
+    """Chat model that answers after a fixed delay without calling any API.
+    Structured output calls return canned fantasy world data."""
+    latency: float = LLM_LATENCY
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="You see a door."))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="You see a door."))])
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Any:
+        async def respond(prompt_value: Any) -> Any:
+            await asyncio.sleep(self.latency)
+            text = prompt_value.to_string()
+            if 'power_systems' in schema.model_fields:
+                return FantasyWorldSettingDTO(name="Eldoria", description="A world", power_systems=[])
+            if 'locations' in schema.model_fields:
+                return schema(locations=[FantasyLocationDTO(name="Vale", description="A valley", type="town", government_type="monarchy")])
+            if 'the protagonist. Set is_protagonist to True' in text:
+                return schema(characters=[_fantasy_character("Aria", True)])
+            # Allies and antagonists batches both return a shared name to exercise de-duplication
+            batch = 'ally' if 'allies' in text else 'foe'
+            return schema(characters=[_fantasy_character(f"{batch} one", True), _fantasy_character("Aria", False), _fantasy_character("Shared", False)])
+        return RunnableLambda(respond)
+
+
+def _llm_service(pool: LLMClientPool) -> LLMService:
+    registry = ChainRegistry(pool)
+    registry.build()
+    return LLMService(pool, registry)
+
+
+class TestLLMService:
+    """Unit tests for LLMService"""
+
+    @pytest.fixture
+    def llm_service(self):
+        return _llm_service(LLMClientPool(model_factory=lambda model_name, temperature: SlowFakeChatModel()))
+
+    @pytest.fixture
+    def context(self):
+        return {"settings": [[]], "chat_history": [[]]}
+
+    @pytest.mark.asyncio
+    async def test_send_message(self, llm_service, context):
+        """Test send_message returns the model's reply"""
+        result = await llm_service.send_message(context, [], "look around")
+
+        assert result == "You see a door."
+
+    @pytest.mark.asyncio
+    async def test_parallel_send_message_does_not_block_event_loop(self, llm_service, context):
+        """Test N concurrent LLM calls finish in about one LLM latency, not N"""
+        n = 8
+        await llm_service.send_message(context, [], "warm up")
+        start = time.perf_counter()
+        results = await asyncio.gather(*[llm_service.send_message(context, [], f"action {i}") for i in range(n)])
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == n
+        assert elapsed < 2 * LLM_LATENCY
+
+    @pytest.mark.asyncio
+    async def test_parallel_chat_sessions(self, llm_service):
+        """Test N chat sessions sending messages in parallel finish in about one LLM latency"""
+        # Arrange
+        chat_repository = Mock()
+        chat_repository.get_message_count.return_value = 1
+        chat_repository.get_messages.return_value = []
+        chat_repository.get_summaries.return_value = []
+        chat_repository.save_message.side_effect = lambda message: ChatMessage.model_validate(message)
+        vector_store = Mock()
+        vector_store.retrieve_context.return_value = {"settings": [[]], "chat_history": [[]]}
+        chat_service = ChatService(Mock(get_story=Mock(return_value=None)), chat_repository, llm_service, vector_store)
+        n = 8
+        messages = [ChatMessage(story_id=1, user_id=1, session_id=i, role='human', content="look around") for i in range(n)]
+
+        await chat_service.send_message(messages[0], MagicMock())  # warm up
+
+        # Act
+        start = time.perf_counter()
+        results = await asyncio.gather(*[chat_service.send_message(message, MagicMock()) for message in messages])
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert [result.session_id for result in results] == list(range(n))
+        assert elapsed < 2 * LLM_LATENCY
+
+    @pytest.mark.asyncio
+    async def test_create_world_generates_character_batches_concurrently(self):
+        """Test character batches run in parallel and merge into one consistent cast"""
+        llm_service = _llm_service(LLMClientPool(model_factory=lambda model_name, temperature: SlowFakeChatModel()))
+
+        stages = []
+
+        start = time.perf_counter()
+        world = await llm_service.create_world(tag=Tags.FANTASY, prompt="floating islands", on_progress=stages.append)
+        elapsed = time.perf_counter() - start
+
+        assert world is not None
+        names = [character.name for character in world.characters.characters]
+        assert sorted(names) == sorted(["Aria", "ally one", "foe one", "Shared"])
+        assert [character.name for character in world.characters.characters if character.is_protagonist] == ["Aria"]
+        assert stages == [StoryJobStage.SETTING, StoryJobStage.LOCATIONS, StoryJobStage.CHARACTERS]
+        # world -> locations -> characters (3 batches in parallel) is three LLM latencies, not five
+        assert elapsed < 4 * LLM_LATENCY
+
+
+class TestLLMClientPool:
+    """Unit tests for LLMClientPool"""
+
+    @pytest.fixture
+    def pool(self):
+        return LLMClientPool(max_in_flight=2, model_factory=lambda model_name, temperature: SlowFakeChatModel())
+
+    def test_model_is_reused(self, pool):
+        """Test the same client is handed out for the same model settings"""
+        first = pool.get_model()
+        second = pool.get_model()
+
+        assert first is second
+        assert pool.stats().client_creations == 1
+
+    @pytest.mark.asyncio
+    async def test_in_flight_calls_are_bounded(self, pool):
+        """Test calls beyond max_in_flight queue until a slot frees up"""
+        llm_service = _llm_service(pool)
+        context = {"settings": [[]], "chat_history": [[]]}
+
+        tasks = [asyncio.create_task(llm_service.send_message(context, [], "look around")) for _ in range(5)]
+        await asyncio.sleep(LLM_LATENCY / 2)
+        stats = pool.stats()
+        await asyncio.gather(*tasks)
+
+        assert stats.in_flight == 2
+        assert stats.queue_depth == 3
+        assert pool.stats().total_calls == 5
+        assert pool.stats().in_flight == 0
+        # Every call after the one creating the client reused it
+        assert pool.stats().reuse_ratio == 4 / 5
@@ -0,0 +1,101 @@
+import math
+
+import pytest
+from unittest.mock import MagicMock, Mock
+
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import ChatPrompt, Config
+from server.src.service.prompt_packer import PromptPacker, count_tokens, truncate_to_tokens
+
+
+def _message(id: int, content: str, token_count=None) -> ChatMessage:
+    return ChatMessage(id=id, story_id=1, user_id=1, session_id=1, role='human', content=content, token_count=token_count)
+
+
+class TestPromptPacker:
+    """Unit tests for PromptPacker"""
+
+    @pytest.fixture
+    def packer(self):
+        return PromptPacker(world_budget=20, memory_budget=10, summary_budget=10, history_budget=12, user_message_budget=5)
+
+    def test_count_tokens(self):
+        """Test words, subwords and punctuation are counted, digits and non-Latin characters one by one"""
+        assert count_tokens("") == 0
+        assert count_tokens("You open the door.") == 5
+        assert count_tokens("extraordinarily") == 3
+        assert count_tokens("1234567890 4242 9001") == 18
+        assert count_tokens("東京都に行きました。彼は剣を抜いた") == 17
+        assert count_tokens("Café déjà vu") == 3
+
+    @pytest.mark.parametrize("keep_end", [False, True])
+    def test_truncate_to_tokens_respects_budget(self, keep_end):
+        """Test truncated text never exceeds the budget"""
+        text = "The old bell tolls twice, then falls silent across the misty valley."
+
+        for budget in range(0, count_tokens(text) + 2):
+            assert count_tokens(truncate_to_tokens(text, budget, keep_end)) <= budget
+
+        assert truncate_to_tokens(text, 4).startswith("The old bell")
+        assert truncate_to_tokens(text, 4, keep_end=True).endswith("valley.")
+
+    def test_pack_history_keeps_newest_contiguous_messages(self, packer):
+        """Test history keeps the newest messages and stops at the first that does not fit"""
+        messages = [_message(4, "a b c"), _message(3, "d e f g h"), _message(2, "i j k l m n o"), _message(1, "p")]
+
+        packed = packer.pack_history(messages, 12)
+
+        assert [message.id for message in packed] == [4, 3]
+
+    def test_pack_history_truncates_long_newest_message(self, packer):
+        """Test a single message longer than the budget is cut rather than dropped"""
+        messages = [_message(2, "word " * 50), _message(1, "short")]
+
+        packed = packer.pack_history(messages, 12)
+
+        assert [message.id for message in packed] == [2]
+        assert count_tokens(packed[0].content) <= 12
+
+    def test_pack_history_uses_cached_token_counts(self, packer):
+        """Test cached token counts are used instead of recounting"""
+        packed = packer.pack_history([_message(2, "short", token_count=12), _message(1, "short")], 12)
+
+        assert [message.id for message in packed] == [2]
+
+    def test_pack_documents_prefers_fitting_documents(self, packer):
+        """Test documents too long for the remaining budget are skipped"""
+        documents = ["one two three four", "word " * 30, "five six"]
+
+        assert packer.pack_documents(documents, 10) == ["one two three four", "five six"]
+
+    def test_pack_bounds_every_section(self, packer):
+        """Test a turn with huge inputs stays within the budget of each section"""
+        context = {"settings": [["lore " * 500, "more lore"]], "chat_history": [["memory " * 500]], "summary": "episode " * 500}
+        messages = [_message(i, "turn " * 100) for i in range(10, 0, -1)]
+
+        packed_context, packed_messages, user_msg = packer.pack(context, messages, "action " * 100)
+
+        assert sum(count_tokens(document) for document in packed_context['settings'][0]) <= 20
+        assert sum(count_tokens(document) for document in packed_context['chat_history'][0]) <= 10
+        assert count_tokens(packed_context['summary']) <= 10
+        assert sum(count_tokens(message.content) for message in packed_messages) <= 12
+        assert count_tokens(user_msg) <= 5
+        assert packer.max_input_tokens() == math.ceil((count_tokens(ChatPrompt.SYSTEM_PROMPT) + 57) * (1 + Config.PROMPT_TOKEN_ESTIMATE_MARGIN))
+
+    @pytest.mark.asyncio
+    async def test_chat_service_caches_missing_token_counts(self):
+        """Test token counts of old messages are computed once and saved"""
+        from server.src.service import ChatService
+
+        chat_repository = Mock()
+        chat_repository.get_message_count.return_value = 1
+        chat_repository.get_summaries.return_value = []
+        chat_repository.get_messages.return_value = [_message(2, "You see a door."), _message(1, "look", token_count=1)]
+        vector_store = Mock()
+        vector_store.retrieve_context.return_value = {"settings": [[]], "chat_history": [[]]}
+        chat_service = ChatService(Mock(get_story=Mock(return_value=None)), chat_repository, Mock(), vector_store)
+
+        await chat_service._prepare_turn(_message(3, "open it"), MagicMock())
+
+        chat_repository.save_token_counts.assert_called_once_with({2: 5})
+        assert chat_repository.save_message.call_args.args[0].token_count == 2
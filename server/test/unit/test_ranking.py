@@ -0,0 +1,36 @@
+import numpy as np
+
+from server.db.ranking import maximal_marginal_relevance, reciprocal_rank_fusion_scores
+
+
+class TestRanking:
+    """Unit tests for the rank fusion and diversity re-ranking helpers"""
+
+    def test_reciprocal_rank_fusion_scores(self):
+        """Test each id scores the weighted sum of 1 / (k + rank) over the lists it appears in"""
+        scores = reciprocal_rank_fusion_scores([["a", "b"], ["b"]], [1.0, 0.5], k=1)
+
+        assert scores == {"a": 1 / 2, "b": 1 / 3 + 0.5 / 2}
+        assert reciprocal_rank_fusion_scores([["a", "b"], ["b"]], [1.0, 0.0], k=1) == {"a": 1 / 2, "b": 1 / 3}
+
+    def test_mmr_skips_near_duplicates(self):
+        """Test a near-duplicate of a picked candidate loses to a less relevant, different one"""
+        relevance = np.array([1.0, 0.98, 0.9])
+        vectors = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+
+        assert maximal_marginal_relevance(relevance, vectors, n=2, diversity=0.3) == [0, 2]
+
+    def test_mmr_without_diversity_keeps_relevance_order(self):
+        """Test diversity 0, or too few candidates, returns the most relevant in order"""
+        relevance = np.array([0.5, 1.0, 0.98])
+        vectors = np.array([[0.0, 1.0], [1.0, 0.0], [1.0, 0.0]])
+
+        assert maximal_marginal_relevance(relevance, vectors, n=2, diversity=0.0) == [1, 2]
+        assert maximal_marginal_relevance(relevance, vectors, n=3, diversity=0.3) == [1, 2, 0]
+
+    def test_mmr_keeps_relevance_order_of_unrelated_candidates(self):
+        """Test similarity noise between unrelated candidates does not reorder them"""
+        relevance = np.linspace(1.0, 0.0, 18)
+        vectors = np.random.default_rng(0).normal(size=(18, 384))
+
+        assert maximal_marginal_relevance(relevance, vectors, n=6, diversity=0.3) == [0, 1, 2, 3, 4, 5]
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from server.db.models import ChatMessageDB
+from server.src.models.enums import Config, SummaryPrompt
+from server.src.repository.chat_repository_impl import ChatRepository
+from server.src.service.session_memory_service import SessionMemory
+
+
+class TestSessionMemory:
+    """Unit tests for SessionMemory"""
+
+    @pytest.fixture
+    def chat_repository(self, test_db):
+        return ChatRepository(test_db)
+
+    @pytest.fixture
+    def llm_service(self):
+        llm_service = Mock()
+        calls = []
+
+        async def summarize(material, material_type, max_words):
+            calls.append(material_type)
+            return f"summary {len(calls)}"
+
+        llm_service.summarize = AsyncMock(side_effect=summarize)
+        return llm_service
+
+    @pytest.fixture
+    def session_memory(self, chat_repository, llm_service):
+        return SessionMemory(chat_repository, llm_service)
+
+    def _add_messages(self, chat_repository, count):
+        for i in range(count):
+            chat_repository.save_message(ChatMessageDB(story_id=1, user_id=1, session_id=1, role='human' if i % 2 == 0 else 'ai', content=f"turn {i}"))
+
+    @pytest.mark.asyncio
+    async def test_compact_summarizes_turns_outside_recent_history(self, session_memory, chat_repository, llm_service):
+        """Test only turns older than the recent history are summarized"""
+        # Arrange
+        self._add_messages(chat_repository, Config.SUMMARY_INTERVAL + Config.CHAT_HISTORY_SIZE)
+
+        # Act
+        await session_memory.compact(1)
+
+        # Assert
+        summaries = chat_repository.get_summaries(1)
+        assert len(summaries) == 1
+        assert (summaries[0].level, summaries[0].start_message_id, summaries[0].end_message_id) == (0, 1, Config.SUMMARY_INTERVAL)
+        assert "turn 0" in llm_service.summarize.call_args.args[0]
+        assert f"turn {Config.SUMMARY_INTERVAL}" not in llm_service.summarize.call_args.args[0]
+        assert session_memory.render(1) == "summary 1"
+
+        # Nothing new to summarize
+        await session_memory.compact(1)
+        assert llm_service.summarize.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_compact_merges_summaries_into_episodes(self, session_memory, chat_repository, llm_service, monkeypatch):
+        """Test full levels are merged upwards so the number of summaries stays bounded"""
+        # Arrange
+        monkeypatch.setattr(Config, 'CHAT_HISTORY_SIZE', 0)
+        monkeypatch.setattr(Config, 'SUMMARY_INTERVAL', 2)
+        monkeypatch.setattr(Config, 'SUMMARY_FANOUT', 2)
+        monkeypatch.setattr(Config, 'SUMMARY_MAX_LEVEL', 1)
+        self._add_messages(chat_repository, 8)
+
+        # Act
+        await session_memory.compact(1)
+
+        # Assert
+        summaries = chat_repository.get_summaries(1)
+        assert [(summary.level, summary.start_message_id, summary.end_message_id) for summary in summaries] == [(1, 1, 8)]
+        assert len(chat_repository.get_summaries(1, include_compacted=True)) == 7
+        material_types = [call.args[1] for call in llm_service.summarize.call_args_list]
+        assert material_types.count(SummaryPrompt.TURNS) == 4
+        assert material_types.count(SummaryPrompt.SUMMARIES) == 3
@@ -0,0 +1,114 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from unittest.mock import Mock
+from server.src.models.enums import StoryJobStage, StoryJobStatus
+from server.src.models.story import CreateStoryDTO
+from server.src.service import StoryJobManager
+
+
+class FakeStoryService:
+    """Story service that walks through the creation stages without calling the LLM"""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.running = 0
+        self.max_running = 0
+
+    async def create_story(self, create_story, user_id, on_progress=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            for stage in [StoryJobStage.SETTING, StoryJobStage.LOCATIONS, StoryJobStage.CHARACTERS]:
+                await asyncio.sleep(0.01)
+                on_progress(stage)
+            if self.fail:
+                raise Exception("Could not generate world!")
+            on_progress(StoryJobStage.INDEXED)
+            return Mock(id=7)
+        finally:
+            self.running -= 1
+
+    async def prefetch_intro(self, story):
+        self.prefetched = story
+
+
+def _factory(service: FakeStoryService):
+    @asynccontextmanager
+    async def create_service():
+        yield service
+    return create_service
+
+
+async def _wait_for(job_manager: StoryJobManager, job_id: str):
+    while job_manager.get_job(job_id).status in (StoryJobStatus.PENDING, StoryJobStatus.RUNNING):
+        await asyncio.sleep(0.01)
+    return job_manager.get_job(job_id)
+
+
+class TestStoryJobManager:
+    """Unit tests for StoryJobManager"""
+
+    @pytest.fixture
+    def create_story(self):
+        return CreateStoryDTO(tag_id=1, prompt="a kingdom in the clouds")
+
+    @pytest.mark.asyncio
+    async def test_job_reports_stages_and_result(self, create_story):
+        """Test a job returns immediately, then reports every stage and its result"""
+        job_manager = StoryJobManager(_factory(FakeStoryService()))
+
+        job = job_manager.submit(create_story, user_id=1)
+        assert job.status == StoryJobStatus.PENDING
+
+        finished = await _wait_for(job_manager, job.id)
+        assert finished.status == StoryJobStatus.SUCCEEDED
+        assert finished.completed_stages == [StoryJobStage.SETTING, StoryJobStage.LOCATIONS, StoryJobStage.CHARACTERS, StoryJobStage.INDEXED]
+        assert finished.story_id == 7
+        assert job_manager.get_result(job.id).id == 7
+
+    @pytest.mark.asyncio
+    async def test_failed_job_keeps_error(self, create_story):
+        """Test a failing job is marked failed with the error message"""
+        job_manager = StoryJobManager(_factory(FakeStoryService(fail=True)))
+
+        job = job_manager.submit(create_story, user_id=1)
+        finished = await _wait_for(job_manager, job.id)
+
+        assert finished.status == StoryJobStatus.FAILED
+        assert finished.error == "Could not generate world!"
+        assert job_manager.get_result(job.id) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_generations_are_capped(self, create_story):
+        """Test no more than max_concurrency stories are generated at once"""
+        service = FakeStoryService()
+        job_manager = StoryJobManager(_factory(service), max_concurrency=2)
+
+        jobs = [job_manager.submit(create_story, user_id=1) for _ in range(5)]
+        for job in jobs:
+            await _wait_for(job_manager, job.id)
+
+        assert service.max_running == 2
+        assert all(job_manager.get_job(job.id).status == StoryJobStatus.SUCCEEDED for job in jobs)
+
+    @pytest.mark.asyncio
+    async def test_intro_prefetch_does_not_hold_a_slot(self, create_story):
+        """Test the next queued story is generated while the intro of the previous one is still prefetched"""
+        # Arrange
+        release = asyncio.Event()
+
+        class SlowPrefetchService(FakeStoryService):
+            async def prefetch_intro(self, story):
+                await release.wait()
+
+        job_manager = StoryJobManager(_factory(SlowPrefetchService()), max_concurrency=1)
+
+        # Act
+        jobs = [job_manager.submit(create_story, user_id=1) for _ in range(2)]
+        finished = await asyncio.wait_for(_wait_for(job_manager, jobs[1].id), timeout=1)
+
+        # Assert
+        assert finished.status == StoryJobStatus.SUCCEEDED
+        release.set()
+        await job_manager.aclose()
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from server.src.models.story import CreateStoryDTO
+from server.src.service import StoryService
+from server.test.unit.test_world_pool_service import _romance_world
+
+
+class TestStoryService:
+    """Unit tests for StoryService"""
+
+    @pytest.mark.asyncio
+    async def test_indexing_does_not_block_event_loop(self):
+        """Test other requests are served while the world chunks of a new story are embedded"""
+        # Arrange
+        story_repository = Mock()
+        story_repository.get_tag_by_id.return_value = Mock(id=1, tag="romance")
+        story_repository.add_story_and_world.return_value = (Mock(id=1, user_id=1, title="t", tag_id=1), Mock(id=5))
+        llm_service = Mock()
+        llm_service.create_world = AsyncMock(return_value=_romance_world())
+        vector_store = Mock()
+        vector_store.add_story_settings.side_effect = lambda **kwargs: time.sleep(0.3)
+        story_service = StoryService(story_repository, Mock(), llm_service, vector_store)
+        ticks = []
+
+        async def other_request():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        # Act
+        await asyncio.gather(other_request(), story_service.create_story(CreateStoryDTO(tag_id=1, prompt="A lighthouse keeper"), user_id=1))
+
+        # Assert
+        assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.25
+        vector_store.add_story_settings.assert_called_once()
@@ -0,0 +1,216 @@
+import hashlib
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from server.db.embedding_cache import EmbeddingCache
+from server.db.hot_tier import HotTier
+from server.db.vector_store import VectorStore
+from server.src.models.chat import ChatMessage
+from server.src.models.enums import VectorQuantization
+
+
+class CountingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic local embedding function counting the texts it embeds"""
+    def __init__(self) -> None:
+        self.calls: List[List[str]] = []
+
+    def __call__(self, input: Documents) -> Embeddings:
+        self.calls.append(list(input))
+        return [[byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]] for text in input] # type: ignore
+
+    @staticmethod
+    def name() -> str:
+        return "counting"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return CountingEmbeddingFunction()
+
+
+class TestVectorStore:
+    """Unit tests for VectorStore"""
+
+    @pytest.fixture
+    def embedding_fn(self):
+        return CountingEmbeddingFunction()
+
+    @pytest.fixture
+    def vector_store(self, tmp_path, embedding_fn):
+        return VectorStore(path=str(tmp_path / "chroma"), embedding_fn=embedding_fn, embedding_cache=EmbeddingCache())
+
+    def test_story_settings_are_embedded_in_one_batch(self, vector_store, embedding_fn):
+        """Test all chunks of a story are embedded with a single call"""
+        chunks = [('setting', "Eldoria", "World: islands"), ('character', "Mira", "Character: Mira"), ('location', "Vale", "Location: Vale")]
+
+        vector_store.add_story_settings(story_id="1", chunks=chunks)
+
+        assert embedding_fn.calls == [["World: islands", "Character: Mira", "Location: Vale"]]
+        metadatas = vector_store.story_collection.get(where={"story_id": "1"})["metadatas"]
+        assert sorted(metadata["type"] for metadata in metadatas) == ['character', 'location', 'setting']
+
+    def test_retrieve_context_embeds_query_once(self, vector_store, embedding_fn):
+        """Test the query is embedded once per turn and reused for both collections and for retries"""
+        # Arrange
+        vector_store.add_story_settings(story_id="1", chunks=[('setting', "Eldoria", "World: islands")])
+        vector_store.add_chat_message(message_id="1", story_id="1", content="You see a door", role='ai', session_id="1")
+        embedding_fn.calls.clear()
+
+        # Act
+        first = vector_store.retrieve_context(story_id="1", session_id="1", query="open the door")
+        retry = vector_store.retrieve_context(story_id="1", session_id="1", query="open the door")
+
+        # Assert
+        assert embedding_fn.calls == [["open the door"]]
+        assert first["settings"] == [["World: islands"]]
+        assert first["chat_history"] == [["You see a door"]]
+        assert retry == first
+
+    def test_add_chat_messages_embeds_once_and_is_idempotent(self, vector_store, embedding_fn):
+        """Test messages are embedded in one batch and storing them again does not fail or duplicate"""
+        # Arrange
+        messages = [ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=f"Turn {i}") for i in range(1, 4)]
+
+        # Act
+        first = vector_store.add_chat_messages(messages)
+        retry = vector_store.add_chat_messages(messages)
+
+        # Assert
+        assert first == [] and retry == []
+        assert embedding_fn.calls == [["Turn 1", "Turn 2", "Turn 3"]]
+        assert sorted(vector_store.session_collection("1").get()["ids"]) == ["1", "2", "3"]
+
+    def test_add_chat_messages_reports_partial_failures(self, vector_store):
+        """Test a failed write batch is retried per message and only the failing ids are reported"""
+        # Arrange
+        collection = vector_store.session_collection("1")
+        upsert = collection.upsert
+        def flaky_upsert(ids, **kwargs):
+            if "2" in ids:
+                raise ValueError("write failed")
+            return upsert(ids=ids, **kwargs)
+        vector_store.session_collection = Mock(return_value=Mock(wraps=collection, upsert=Mock(side_effect=flaky_upsert)))
+        messages = [ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=f"Turn {i}") for i in range(1, 4)]
+
+        # Act
+        failed = vector_store.add_chat_messages(messages)
+
+        # Assert
+        assert failed == ["2"]
+        assert sorted(collection.get()["ids"]) == ["1", "3"]
+
+    def test_retrieve_context_adds_lexical_matches(self, vector_store):
+        """Test a message naming the queried character is retrieved even when dense similarity misses it"""
+        # Arrange
+        contents = ["The rain keeps falling.", "A cart rolls by.", "Thalric waits at the gate.", "Bells ring twice."]
+        vector_store.add_chat_messages([ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=content) for i, content in enumerate(contents, start=1)])
+
+        # Act
+        context = vector_store.retrieve_context(story_id="1", session_id="1", query="Where is Thalric?", n_results=2)
+
+        # Assert
+        assert "Thalric waits at the gate." in context["chat_history"][0]
+        assert len(context["chat_history"][0]) == len(context["chat_metadata"][0]) == 2
+
+    def test_sessions_are_partitioned_and_deleted(self, vector_store):
+        """Test each session is searched in its own collection, dropped when the session is deleted"""
+        # Arrange
+        vector_store.add_chat_messages([ChatMessage(id=1, story_id=1, user_id=1, session_id=1, role='ai', content="Thalric waits."),
+                                        ChatMessage(id=2, story_id=1, user_id=2, session_id=2, role='ai', content="Thalric sleeps.")])
+
+        # Act
+        before = vector_store.retrieve_context(story_id="1", session_id="2", query="Thalric", n_results=5)
+        vector_store.delete_session("2")
+        after = vector_store.retrieve_context(story_id="1", session_id="2", query="Thalric", n_results=5)
+
+        # Assert
+        assert before["chat_history"] == [["Thalric sleeps."]]
+        assert after["chat_history"] == [[]]
+        assert vector_store.session_collection("2", create=False) is None
+        assert vector_store.session_collection("1").count() == 1
+
+    def test_legacy_history_moves_to_session_collection(self, tmp_path, embedding_fn):
+        """Test messages of the former shared collection are moved to their session's collection on first use"""
+        # Arrange
+        path = str(tmp_path / "chroma")
+        legacy = VectorStore(path=path, embedding_fn=embedding_fn, embedding_cache=EmbeddingCache())
+        chat_history = legacy.client.get_or_create_collection(name="chat_history", embedding_function=embedding_fn)
+        chat_history.add(ids=["1", "2"], documents=["You see a door", "Elsewhere"], metadatas=[{"story_id": "1", "session_id": "1"}, {"story_id": "1", "session_id": "2"}])
+
+        # Act
+        vector_store = VectorStore(path=path, embedding_fn=embedding_fn, embedding_cache=EmbeddingCache())
+        context = vector_store.retrieve_context(story_id="1", session_id="1", query="open the door", n_results=5)
+
+        # Assert
+        assert context["chat_history"] == [["You see a door"]]
+        assert chat_history.get()["ids"] == ["2"]
+
+    def test_session_is_searched_in_hot_tier(self, vector_store):
+        """Test a session is loaded in memory on its first query and kept up to date by later writes"""
+        # Arrange
+        vector_store.add_chat_messages([ChatMessage(id=1, story_id=1, user_id=1, session_id=1, role='ai', content="You see a door")])
+        vector_store.retrieve_context(story_id="1", session_id="1", query="open the door")
+        vector_store.session_collection = Mock(wraps=vector_store.session_collection)
+
+        # Act
+        vector_store.add_chat_messages([ChatMessage(id=2, story_id=1, user_id=1, session_id=1, role='ai', content="The door creaks open")])
+        context = vector_store.retrieve_context(story_id="1", session_id="1", query="The door creaks open", n_results=1)
+
+        # Assert
+        assert "1" in vector_store.hot_tier
+        assert context["chat_history"] == [["The door creaks open"]]
+        vector_store.session_collection.assert_called_once_with("1")
+
+    def test_quantized_hot_tier_is_reranked_at_full_precision(self, tmp_path, embedding_fn):
+        """Test int8 hot tier candidates are re-ranked with the vectors stored in Chroma"""
+        # Arrange
+        hot_tier = HotTier(quantization=VectorQuantization.INT8, rerank_factor=4)
+        vector_store = VectorStore(path=str(tmp_path / "chroma"), embedding_fn=embedding_fn, embedding_cache=EmbeddingCache(), hot_tier=hot_tier)
+        contents = [f"Turn {i}" for i in range(1, 9)]
+        vector_store.add_chat_messages([ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=content) for i, content in enumerate(contents, start=1)])
+        query = vector_store.embed_query("Turn 5")
+        expected = vector_store.session_collection("1").query(query_embeddings=[query], n_results=2)["ids"][0]
+
+        # Act
+        results = vector_store._query_chat("1", query, n_results=2)
+
+        # Assert
+        assert "1" in hot_tier
+        assert results["ids"][0] == expected
+        assert len(results["documents"][0]) == 2
+
+    def test_retrieve_context_skips_near_duplicates(self, tmp_path):
+        """Test a repeated message does not crowd out a different, slightly less relevant one"""
+        # Arrange
+        class TopicEmbeddingFunction(CountingEmbeddingFunction):
+            def __call__(self, input: Documents) -> Embeddings:
+                topics = {"tavern": [0.7, 0.7, 0.1], "dragon": [1.0, 0.0, 0.1]}
+                return [next((vector for topic, vector in topics.items() if topic in text.lower()), [0.0, 1.0, 0.1]) for text in input] # type: ignore
+
+        vector_store = VectorStore(path=str(tmp_path / "chroma"), embedding_fn=TopicEmbeddingFunction(), embedding_cache=EmbeddingCache())
+        contents = ["The dragon burns the village", "The dragon burns the village!", "The dragon lands by the tavern", "Mira sharpens her sword"]
+        vector_store.add_chat_messages([ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=content) for i, content in enumerate(contents, start=1)])
+
+        # Act
+        context = vector_store.retrieve_context(story_id="1", session_id="1", query="dragon?", n_results=2)
+
+        # Assert
+        assert {document.rstrip("!") for document in context["chat_history"][0]} == {"The dragon burns the village", "The dragon lands by the tavern"}
+
+    def test_messages_missing_from_chroma_are_not_picked_for_diversity(self, vector_store):
+        """Test lexical matches without a stored embedding only fill places left after MMR"""
+        # Arrange
+        vector_store.add_chat_messages([ChatMessage(id=i, story_id=1, user_id=1, session_id=1, role='ai', content=f"Thalric turn {i}") for i in range(1, 4)])
+        lexical_results = [("99", "Thalric's ghost", {"session_id": "1"}), ("1", "Thalric turn 1", {"session_id": "1"})]
+        dense_results = vector_store._query_chat("1", vector_store.embed_query("Thalric"), n_results=3)
+
+        # Act
+        documents, _ = vector_store._select_chat_results("1", dense_results, lexical_results, n_results=3)
+
+        # Assert
+        assert "Thalric's ghost" not in documents and len(documents) == 3
@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.orm import sessionmaker
+from server.db.models import TagsDB
+from server.src.models.enums import Tags
+from server.src.models.story import CharactersDTO, CreateStoryDTO, RomanceCharacterDTO, RomanceWorldSettingDTO, WorldDTO
+from server.src.repository import WorldRepository
+from server.src.service import StoryService
+from server.src.service.story_service import is_generic_prompt
+from server.src.service.world_pool_service import WorldPool
+
+
+def _romance_world() -> WorldDTO:
+    protagonist = RomanceCharacterDTO(name="Mina", personality="warm", backstory="baker", age="28", appearance="short", occupation="baker",
+                                      race="human", gender="female", is_protagonist=True, role="protagonist", is_love_interest="False")
+    setting = RomanceWorldSettingDTO(name="Seaside", description="A town", time_period="1950s", location="Lisbon", tone="sweet", societal_norms=[])
+    return WorldDTO(id=-1, setting=setting, locations=None, characters=CharactersDTO(characters=[protagonist]))
+
+
+class TestWorldPool:
+    """Unit tests for WorldPool"""
+
+    @pytest.fixture
+    def session_factory(self, test_db_engine):
+        return sessionmaker(autocommit=False, bind=test_db_engine)
+
+    @pytest.fixture
+    def romance_tag(self, test_db):
+        tag = TagsDB(tag=Tags.ROMANCE)
+        test_db.add(tag)
+        test_db.commit()
+        return tag
+
+    @pytest.fixture
+    def llm_pool(self):
+        llm_pool = Mock()
+        llm_pool.stats.return_value = Mock(in_flight=0)
+        return llm_pool
+
+    @pytest.fixture
+    def llm_service(self):
+        llm_service = Mock()
+        llm_service.create_world = AsyncMock(side_effect=lambda **kwargs: _romance_world())
+        return llm_service
+
+    @pytest.mark.asyncio
+    async def test_refill_tops_up_stock(self, session_factory, romance_tag, llm_pool, llm_service):
+        """Test the filler generates worlds until the target stock is reached"""
+        world_pool = WorldPool(llm_pool, llm_service, session_factory, size=2, tags=[Tags.ROMANCE])
+
+        assert await world_pool.refill_once() == 2
+        assert await world_pool.refill_once() == 0
+        assert world_pool.stats().stock == {Tags.ROMANCE: 2}
+
+    @pytest.mark.asyncio
+    async def test_refill_waits_for_off_peak(self, session_factory, romance_tag, llm_pool, llm_service):
+        """Test nothing is generated while the LLM pool is busy"""
+        llm_pool.stats.return_value = Mock(in_flight=10)
+        world_pool = WorldPool(llm_pool, llm_service, session_factory, size=2, tags=[Tags.ROMANCE])
+
+        assert await world_pool.refill_once() == 0
+        llm_service.create_world.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_claim_tracks_hits_and_misses(self, test_db, session_factory, romance_tag, llm_pool, llm_service):
+        """Test claiming removes a world from the pool and records hit rate"""
+        world_pool = WorldPool(llm_pool, llm_service, session_factory, size=1, tags=[Tags.ROMANCE])
+        await world_pool.refill_once()
+        world_repository = WorldRepository(test_db)
+
+        world = world_pool.claim(world_repository, romance_tag.id)
+        assert world is not None
+        assert world.setting.name == "Seaside"
+        assert world_pool.claim(world_repository, romance_tag.id) is None
+
+        stats = world_pool.stats()
+        assert (stats.hits, stats.misses, stats.hit_rate) == (1, 1, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_create_story_uses_pool_for_generic_prompt(self, romance_tag):
+        """Test generic prompts claim a pooled world instead of calling the LLM"""
+        story_repository = Mock()
+        story_repository.get_tag_by_id.return_value = romance_tag
+        story_repository.add_story_and_world.return_value = (Mock(id=1, user_id=1, title="t", tag_id=romance_tag.id), Mock(id=5))
+        llm_service = Mock()
+        llm_service.create_world = AsyncMock()
+        world_pool = Mock()
+        world_pool.claim.return_value = _romance_world()
+        story_service = StoryService(story_repository, Mock(), llm_service, Mock(), world_pool)
+
+        story = await story_service.create_story(CreateStoryDTO(tag_id=romance_tag.id, prompt="Surprise me!"), user_id=1)
+
+        assert story.world.id == 5
+        llm_service.create_world.assert_not_called()
+
+    def test_is_generic_prompt(self):
+        assert is_generic_prompt("")
+        assert is_generic_prompt("  Surprise me! ")
+        assert not is_generic_prompt("A detective in 1920s Shanghai")